@@ -0,0 +1,150 @@
+########## LICENCE ##########
+# VaLiAnT, (c) 2020, GRL (the "Software")
+# 
+# The Software remains the property of Genome Research Ltd ("GRL").
+# 
+# The Software is distributed "AS IS" under this Licence solely for non-commercial use in the hope that it will be useful,
+# but in order that GRL as a charitable foundation protects its assets for the benefit of its educational and research
+# purposes, GRL makes clear that no condition is made or to be implied, nor is any warranty given or to be implied, as to
+# the accuracy of the Software, or that it will be suitable for any particular purpose or for use under any specific
+# conditions. Furthermore, GRL disclaims all responsibility for the use which is made of the Software. It further
+# disclaims any liability for the outcomes arising from using  the Software.
+# 
+# The Licensee agrees to indemnify GRL and hold GRL harmless from and against any and all claims, damages and liabilities
+# asserted by third parties (including claims for negligence) which arise directly or indirectly from the use of the
+# Software or the sale of any products based on the Software.
+# 
+# No part of the Software may be reproduced, modified, transmitted or transferred in any form or by any means, electronic
+# or mechanical, without the express permission of GRL. The permission of GRL is not required if the said reproduction,
+# modification, transmission or transference is done without financial return, the conditions of this Licence are imposed
+# upon the receiver of the product, and all original and amended source code is included in any transmitted product. You
+# may be held legally responsible for any copyright infringement that is caused or encouraged by your failure to abide by
+# these terms and conditions.
+# 
+# You are not permitted under this Licence to use this Software commercially. Use for which any financial return is
+# received shall be defined as commercial use, and includes (1) integration of all or part of the source code or the
+# Software into a product for sale or license by or on behalf of Licensee to third parties or (2) use of the Software
+# or any derivative of it for research with the final aim of developing software products for sale or license to a third
+# party or (3) use of the Software or any derivative of it for research with the final aim of developing non-software
+# products for sale or license to a third party, or (4) use of the Software to provide any service to an external
+# organisation for which payment is received. If you are interested in using the Software commercially, please contact
+# legal@sanger.ac.uk. Contact details are: legal@sanger.ac.uk quoting reference Valiant-software.
+#############################
+
+from typing import List, Tuple
+import numpy as np
+import pandas as pd
+from .utils import get_sequence_bytes, nt_codes, reverse_complement
+
+
+def get_nucleotides(seq: str, positions: np.ndarray) -> pd.Categorical:
+    seq_bytes: np.ndarray = get_sequence_bytes(seq)
+    symbols, codes = np.unique(seq_bytes, return_inverse=True)
+    return pd.Categorical.from_codes(
+        codes[positions], categories=[chr(symbol) for symbol in symbols])
+
+
+def get_non_overlapping_deletions(seq: str, count: int, offset: int = 0) -> Tuple[np.ndarray, pd.Categorical]:
+    """Get the positions and reference alleles of all non-overlapping deletions of a given length"""
+
+    positions: np.ndarray = np.arange(
+        offset, count * ((len(seq) - offset) // count), count, dtype=np.int32)
+
+    # Gather the deleted subsequences as fixed-width byte strings
+    refs: np.ndarray = get_sequence_bytes(seq)[
+        positions[:, np.newaxis] + np.arange(count, dtype=np.int32)[np.newaxis, :]
+    ].view(f"S{count}").ravel()
+    symbols, codes = np.unique(refs, return_inverse=True)
+
+    return positions, pd.Categorical.from_codes(
+        codes, categories=[symbol.decode('ascii') for symbol in symbols])
+
+
+def replace_single_nucleotides(seq_codes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Get the positions and alternative nucleotide codes of all substitutions"""
+
+    # Sorted by position and alternative nucleotide
+    positions, alt_codes = np.nonzero(seq_codes[:, np.newaxis] != nt_codes[np.newaxis, :])
+    return positions.astype(np.int32), alt_codes.astype(np.int8)
+
+
+def _factorize_alleles(alleles) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+    """Get allele codes (-1 if missing), unique allele lengths, and unique alleles"""
+
+    codes, uniques = pd.factorize(alleles)
+    uniques = [str(allele) for allele in np.asarray(uniques, dtype=object)]
+    return (
+        codes,
+        np.array([len(allele) for allele in uniques], dtype=np.int32),
+        uniques
+    )
+
+
+def _get_allele_lengths(codes: np.ndarray, unique_lengths: np.ndarray) -> np.ndarray:
+    return (
+        np.where(codes >= 0, unique_lengths[codes], 0).astype(np.int32) if unique_lengths.size > 0 else
+        np.zeros(codes.shape[0], dtype=np.int32)
+    )
+
+
+def get_allele_lengths(alleles) -> np.ndarray:
+    codes, unique_lengths, _ = _factorize_alleles(alleles)
+    return _get_allele_lengths(codes, unique_lengths)
+
+
+def _clip_variants(seq_len: int, offsets: np.ndarray, ref_lengths: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+
+    # Mimic string slicing for variants exceeding the sequence
+    offsets = np.minimum(np.asarray(offsets, dtype=np.int64), seq_len)
+    return offsets, np.minimum(ref_lengths, seq_len - offsets)
+
+
+def get_mutated_sequence_lengths(seq_len: int, offsets: np.ndarray, refs, alts) -> np.ndarray:
+    offsets, ref_lengths = _clip_variants(seq_len, offsets, get_allele_lengths(refs))
+    return (seq_len - ref_lengths + get_allele_lengths(alts)).astype(np.int32)
+
+
+def render_mutated_sequences(
+    seq: str,
+    offsets: np.ndarray,
+    refs,
+    alts,
+    prefix: str = '',
+    suffix: str = '',
+    rc: bool = False
+) -> np.ndarray:
+    """
+    Render the mutated sequences described by offsets, reference and alternative alleles
+
+    Missing reference (insertions) and alternative (deletions) alleles are treated as empty.
+    If requested, the reverse complement of the mutated sequence is rendered instead.
+    The prefix and suffix are added after the reverse complement is computed.
+    """
+
+    n: int = len(offsets)
+    seq_len: int = len(seq)
+
+    if n == 0:
+        return np.empty(0, dtype=object)
+
+    # Encode alleles
+    ref_codes, ref_unique_lengths, _ = _factorize_alleles(refs)
+    alt_codes, _, alt_uniques = _factorize_alleles(alts)
+    offsets, ref_lengths = _clip_variants(
+        seq_len, offsets, _get_allele_lengths(ref_codes, ref_unique_lengths))
+
+    # Slice the (reverse complement) reference sequence around each variant
+    if rc:
+        seq = reverse_complement(seq)
+        alt_uniques = [reverse_complement(alt) for alt in alt_uniques]
+        starts: np.ndarray = seq_len - offsets - ref_lengths
+        ends: np.ndarray = seq_len - offsets
+    else:
+        starts = offsets
+        ends = offsets + ref_lengths
+    alt_values: np.ndarray = np.array(alt_uniques + [''], dtype=object)[alt_codes]
+
+    return np.array([
+        f"{prefix}{seq[:start]}{alt}{seq[end:]}{suffix}"
+        for start, end, alt in zip(starts.tolist(), ends.tolist(), alt_values)
+    ], dtype=object)
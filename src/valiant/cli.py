@@ -31,22 +31,28 @@
 # legal@sanger.ac.uk. Contact details are: legal@sanger.ac.uk quoting reference Valiant-software.
 #############################
 
+from collections import deque
+import csv
 from itertools import chain
 import logging
+from multiprocessing import Pool
+from multiprocessing.pool import AsyncResult
 import os
 import sys
-from typing import Dict, Iterable, List, Optional, Set, Tuple
+from typing import Deque, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 import click
 import pandas as pd
 from pyranges import PyRanges
 from . import __version__
-from .constants import DEFAULT_CODON_TABLE_FILE_NAME, DEFAULT_OLIGO_MAX_LENGTH, METADATA_FIELDS, METADATA_FIELDS_SET
+from .constants import DEFAULT_CODON_TABLE_FILE_NAME, DEFAULT_OLIGO_MAX_LENGTH, DEFAULT_REF_CACHE_MAX_SIZE_MB, METADATA_FIELDS, METADATA_FIELDS_SET, MUTATION_METADATA_FIELDS, OLIGO_RENDER_BATCH_SIZE
 from .enums import TargetonMutator
-from .loaders.vcf import write_vcf
+from .loaders.gff import GffRegions
+from .loaders.vcf import VcfRegions, write_vcf
 from .models.base import GenomicRange
 from .models.codon_table import CodonTable
 from .models.exon import AnnotationRepository, CDSContextRepository, GenomicRangePair, TranscriptInfo
 from .models.oligo_generation_info import OligoGenerationInfo
+from .models.oligo_renderer import BaseOligoRenderer
 from .models.oligo_template import InvariantOligoSegment, OligoSegment, OligoTemplate, TargetonOligoSegment
 from .models.options import Options
 from .models.pam_protection import compute_pam_protected_sequence, PamProtectedReferenceSequence, PamProtectionVariantRepository, PamVariant
@@ -55,9 +61,9 @@ from .models.refseq_repository import fetch_reference_sequences, ReferenceSequen
 from .models.sequences import ReferenceSequence
 from .models.snv_table import AuxiliaryTables
 from .models.targeton import BaseTargeton, CDSTargeton, Targeton
-from .models.variant import CustomVariant, get_records, VariantRepository
+from .models.variant import get_records, get_vcf_regions, VariantRepository
 from .utils import get_constant_category, get_data_file_path, is_dna
-from .writers import write_oligo_metadata, write_oligo_unique, write_reference_sequences
+from .writers import get_unique_oligos, write_oligo_metadata, write_oligo_unique
 
 
 def _load_codon_table(fp: Optional[str]) -> CodonTable:
@@ -76,15 +82,23 @@ def _load_codon_table(fp: Optional[str]) -> CodonTable:
         sys.exit(1)
 
 
-def _load_gff_file(fp: Optional[str]) -> Optional[AnnotationRepository]:
+def _load_gff_file(
+    fp: Optional[str],
+    cache_dir: Optional[str] = None,
+    regions: Optional[GffRegions] = None
+) -> Optional[AnnotationRepository]:
     if fp:
         logging.debug("Loading GTF/GFF2 file...")
         try:
-            return AnnotationRepository.from_gff(fp)
+            return AnnotationRepository.from_gff(fp, cache_dir=cache_dir, regions=regions)
         except ValueError as ex:
             logging.critical(ex.args[0])
             logging.critical("Failed to load GTF/GFF2 file!")
             sys.exit(1)
+        except ImportError as ex:
+            logging.critical(ex.args[0])
+            logging.critical("The annotation cache requires pyarrow!")
+            sys.exit(1)
     else:
         logging.info("No GTF/GFF2 file provided.")
         return None
@@ -99,7 +113,11 @@ def _load_oligo_templates(fp: str) -> ReferenceSequenceRangeCollection:
         sys.exit(1)
 
 
-def _load_pam_protection_vcf(sgrna_ids: Set[str], pam: Optional[str]) -> PamProtectionVariantRepository:
+def _load_pam_protection_vcf(
+    sgrna_ids: Set[str],
+    pam: Optional[str],
+    regions: Optional[VcfRegions] = None
+) -> PamProtectionVariantRepository:
     logging.debug("sgRNA ID's: %s" % ', '.join(sorted(sgrna_ids)) if sgrna_ids else "No sgRNA ID's.")
 
     vr = PamProtectionVariantRepository(sgrna_ids=sgrna_ids)
@@ -107,7 +125,7 @@ def _load_pam_protection_vcf(sgrna_ids: Set[str], pam: Optional[str]) -> PamProt
     if pam:
         if len(sgrna_ids) > 0:
             try:
-                vr.load(pam)
+                vr.load(pam, regions=regions)
             except ValueError as ex:
                 logging.critical(ex.args[0])
                 logging.critical("Failed to load the PAM protection variants!")
@@ -124,7 +142,7 @@ def get_oligo_template(
     ref: ReferenceSequenceRepository,
     cds: Optional[CDSContextRepository],
     pam_variants: Set[PamVariant],
-    custom_variants: Set[CustomVariant],
+    custom_variants: Optional[pd.DataFrame],
     adaptor_5: Optional[str] = None,
     adaptor_3: Optional[str] = None
 ) -> OligoTemplate:
@@ -173,7 +191,7 @@ def get_oligo_template(
     def get_targeton(region_pam_seq: PamProtectedReferenceSequence) -> BaseTargeton:
         if cds:
             exg_gr_pair: Optional[GenomicRangePair] = cds.get_cds_extensions(
-                region_pam_seq.genomic_range)
+                region_pam_seq.genomic_range, transcript_id=rsr.transcript_id)
             if exg_gr_pair is not None:
                 return get_cds_targeton(region_pam_seq, exg_gr_pair)
         return Targeton(region_pam_seq)
@@ -189,7 +207,8 @@ def get_oligo_template(
         if not cds:
             return None
         for genomic_range in genomic_ranges:
-            transcript_info: Optional[TranscriptInfo] = cds.get_transcript_info(genomic_range)
+            transcript_info: Optional[TranscriptInfo] = cds.get_transcript_info(
+                genomic_range, transcript_id=rsr.transcript_id)
             if transcript_info:
                 return transcript_info
         return None
@@ -224,8 +243,9 @@ def get_oligo_templates(
     variant_repository: Optional[VariantRepository],
     annotation: Optional[AnnotationRepository],
     adaptor_5: Optional[str] = None,
-    adaptor_3: Optional[str] = None
-) -> List[OligoTemplate]:
+    adaptor_3: Optional[str] = None,
+    transcript_tag: Optional[str] = None
+) -> Iterator[OligoTemplate]:
 
     def match_ref_regions_pam_variants() -> Dict[Tuple[str, int, int], Set[str]]:
         if not pam_variants_available:
@@ -289,53 +309,51 @@ def get_oligo_templates(
             ref,
             annotation.cds if annotation else None,
             pam_variants,
-            variant_repository.get_variants(rsr.ref_range) if variant_repository else set(),
+            variant_repository.get_variant_table(rsr.ref_range) if variant_repository else None,
             adaptor_5=adaptor_5,
             adaptor_3=adaptor_3)
 
-    # Pass sgRNA variants to oligonucleotide template generation
-    pam_variants_available: bool = pam.count > 0
-    ref_ranges_sgrna_ids = match_ref_regions_pam_variants()
-
-    # Generate oligonucleotide templates
-    ots: List[OligoTemplate] = list(map(get_rsr_oligo_template, rsrs._rsrs.values()))
-
-    # Retrieve reference ranges of oligonucleotide templates with no transcript info (if any)
-    ref_ranges_no_info: Set[GenomicRange] = set(
-        ot.ref_range
-        for ot in ots
-        if not ot.transcript_info
-    )
-
-    # Return oligonucleotide templates if all have transcript information
-    if not ref_ranges_no_info:
-        return ots
-
-    if annotation and annotation.utr:
+    def get_utr_transcript_infos() -> Dict[GenomicRange, TranscriptInfo]:
+        if not (annotation and annotation.utr):
+            return {}
 
         # Collect transcript information from UTR features
-        utr_transcript_info: Dict[GenomicRange, TranscriptInfo] = annotation.utr.get_transcript_infos(
-            genomic_ranges_to_pyranges(ref_ranges_no_info))
+        return annotation.utr.get_transcript_infos(
+            genomic_ranges_to_pyranges(rsrs.ref_ranges),
+            transcript_ids={
+                rsr.ref_range: rsr.transcript_id
+                for rsr in rsrs._rsrs.values()
+                if rsr.transcript_id
+            },
+            transcript_tag=transcript_tag)
+
+    def set_utr_transcript_info(ot: OligoTemplate) -> None:
+        utr_transcript_info: Optional[TranscriptInfo] = utr_transcript_infos.get(ot.ref_range)
 
         if utr_transcript_info:
+            logging.info(f"UTR found within region {ot.ref_range.region}.")
+            ot.transcript_info = utr_transcript_info
+        else:
 
-            utr_ranges: Set[GenomicRange] = set(utr_transcript_info.keys())
-            ref_ranges_no_info -= utr_ranges
+            # Log missing transcript information if it could not be retrieved
+            logging.info(f"No transcript information found for region {ot.ref_range.region}.")
 
-            # Log UTR matches
-            for genomic_range in utr_ranges:
-                logging.info(f"UTR found within region {genomic_range.region}.")
+    # Pass sgRNA variants to oligonucleotide template generation
+    pam_variants_available: bool = pam.count > 0
+    ref_ranges_sgrna_ids = match_ref_regions_pam_variants()
 
-            # Set retrieved transcript information
-            for ot in ots:
-                if ot.ref_range in utr_ranges:
-                    ot.transcript_info = utr_transcript_info[ot.ref_range]
+    # Map reference ranges to the transcript information of their UTR features (if any)
+    utr_transcript_infos: Dict[GenomicRange, TranscriptInfo] = get_utr_transcript_infos()
 
-    # Log missing transcript information if it could not be retrieved
-    for genomic_range in ref_ranges_no_info:
-        logging.info(f"No transcript information found for region {genomic_range.region}.")
+    # Generate oligonucleotide templates one targeton at a time
+    for rsr in rsrs._rsrs.values():
+        ot: OligoTemplate = get_rsr_oligo_template(rsr)
 
-    return ots
+        # Retrieve transcript information from UTR features if CDS features provided none
+        if not ot.transcript_info:
+            set_utr_transcript_info(ot)
+
+        yield ot
 
 
 def get_oligo_template_qc_info(
@@ -357,6 +375,31 @@ def get_oligo_template_qc_info(
     return [ot.name, ot.ref_range.region] + list(chain.from_iterable(zip(ranges, sequences)))
 
 
+def write_oligo_template_qc_info(
+    ref: ReferenceSequenceRepository,
+    oligo_templates: Iterable[OligoTemplate],
+    fp: str
+) -> Iterator[OligoTemplate]:
+    with open(fp, 'w') as fh:
+        writer = csv.writer(fh)
+        for ot in oligo_templates:
+            writer.writerow(get_oligo_template_qc_info(ref, ot))
+            yield ot
+
+
+def render_oligo_batches(ot: OligoTemplate, metadata: pd.DataFrame, options: Options) -> Iterator[pd.DataFrame]:
+    renderer: BaseOligoRenderer = ot.get_renderer()
+    for start in range(0, metadata.shape[0], OLIGO_RENDER_BATCH_SIZE):
+        batch: pd.DataFrame = metadata.iloc[start:start + OLIGO_RENDER_BATCH_SIZE].copy()
+
+        # Insert the oligonucleotide sequences next to the variant alleles
+        batch.insert(
+            batch.columns.get_loc('new') + 1 if 'new' in batch.columns else batch.shape[1],
+            'mseq',
+            renderer.render_mutated_sequences(batch, options))
+        yield batch
+
+
 def generate_oligos(output: str, ref_repository: ReferenceSequenceRepository, aux: AuxiliaryTables, ot: OligoTemplate, species: str, assembly: str, options: Options) -> OligoGenerationInfo:
     # Generate mutations
     metadata: pd.DataFrame = ot.get_mutation_table(aux, options)
@@ -366,8 +409,8 @@ def generate_oligos(output: str, ref_repository: ReferenceSequenceRepository, au
     metadata['species'] = get_constant_category(species, rown)
     metadata['assembly'] = get_constant_category(assembly, rown)
 
-    # Add missing columns
-    for field in METADATA_FIELDS_SET - set(metadata.columns):
+    # Add missing columns (the oligonucleotide sequences are rendered on output)
+    for field in METADATA_FIELDS_SET - set(metadata.columns) - {'mseq'}:
         metadata[field] = None
 
     fn_prefix: str = (
@@ -381,25 +424,27 @@ def generate_oligos(output: str, ref_repository: ReferenceSequenceRepository, au
     long_oligo_n: int = len(oligo_length_mask) - short_oligo_n
 
     if short_oligo_n > 0:
+        short_metadata: pd.DataFrame = metadata[oligo_length_mask] if long_oligo_n > 0 else metadata
 
-        # Save metadata to file (filtered and reordered columns)
+        # Save metadata (filtered and reordered columns) and unique oligonucleotides to file
         metadata_fn: str = fn_prefix + '_meta.csv'
-        write_oligo_metadata(
-            (
-                metadata.loc[oligo_length_mask, METADATA_FIELDS] if long_oligo_n > 0 else
-                metadata[METADATA_FIELDS]
-            ),
-            os.path.join(output, metadata_fn))
+        unique_oligos_fn: str = fn_prefix + '_unique.csv'
+        unique_oligo_digests: Set[bytes] = set()
+        with open(os.path.join(output, metadata_fn), 'w', newline='') as metadata_fh, \
+                open(os.path.join(output, unique_oligos_fn), 'w', newline='') as unique_oligos_fh:
+            for i, batch in enumerate(render_oligo_batches(ot, short_metadata[MUTATION_METADATA_FIELDS], options)):
+                header: bool = i == 0
+                write_oligo_metadata(batch[METADATA_FIELDS], metadata_fh, header=header)
+                write_oligo_unique(
+                    get_unique_oligos(batch[['oligo_name', 'mseq']], unique_oligo_digests),
+                    unique_oligos_fh,
+                    header=header)
+        del unique_oligo_digests
 
         # Save variants to file (VCF format)
         vcf_fn: str = fn_prefix + '.vcf'
         contigs: List[str] = list(metadata.ref_chr.cat.categories.values)
-        write_vcf(os.path.join(output, vcf_fn), contigs, get_records(
-            ref_repository, (
-                metadata[oligo_length_mask] if long_oligo_n > 0 else
-                metadata
-            )
-        ))
+        write_vcf(os.path.join(output, vcf_fn), contigs, get_records(ref_repository, short_metadata))
 
     else:
         logging.warning(
@@ -407,33 +452,170 @@ def generate_oligos(output: str, ref_repository: ReferenceSequenceRepository, au
                 ot.ref_range.region,
                 ', '.join(ot.sgrna_ids) if ot.sgrna_ids else 'no PAM protection'
             ))
+        logging.warning(
+            "Empty unique oligonucleotides table for targeton at %s (%s): no file generated!" % (
+                ot.ref_range.region,
+                ', '.join(ot.sgrna_ids) if ot.sgrna_ids else 'no PAM protection'
+            ))
 
     if long_oligo_n > 0:
 
         # Save discarded metadata to file
         excluded_metadata_fn: str = fn_prefix + '_meta_excluded.csv'
-        write_oligo_metadata(
-            metadata[~oligo_length_mask],
-            os.path.join(output, excluded_metadata_fn))
+        with open(os.path.join(output, excluded_metadata_fn), 'w', newline='') as excluded_metadata_fh:
+            for i, batch in enumerate(render_oligo_batches(ot, metadata[~oligo_length_mask], options)):
+                write_oligo_metadata(batch, excluded_metadata_fh, header=i == 0)
 
-    if short_oligo_n > 0:
+    return OligoGenerationInfo(long_oligo_n)
 
-        # Save unique oligonucleotides to file (and filter by length)
-        unique_oligos_fn: str = fn_prefix + '_unique.csv'
-        unique_oligos: pd.DataFrame = metadata.loc[
-            oligo_length_mask,
-            ['oligo_name', 'mseq']
-        ].drop_duplicates(subset=['mseq'], keep='first')
-        write_oligo_unique(unique_oligos, os.path.join(output, unique_oligos_fn))
 
-    else:
-        logging.warning(
-            "Empty unique oligonucleotides table for targeton at %s (%s): no file generated!" % (
-                ot.ref_range.region,
-                ', '.join(ot.sgrna_ids) if ot.sgrna_ids else 'no PAM protection'
-            ))
+class _LogRecordBuffer(logging.Handler):
+    """Collect the log records of a worker process to be replayed by the parent"""
 
-    return OligoGenerationInfo(long_oligo_n)
+    def __init__(self) -> None:
+        super().__init__()
+        self.records: List[logging.LogRecord] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+
+        # Render the message to make the record safe to pickle
+        record.msg = record.getMessage()
+        record.args = None
+        record.exc_info = None
+        self.records.append(record)
+
+
+# Read-only state shared by the oligonucleotide generation worker processes
+_worker_state: Optional[Tuple[str, ReferenceSequenceRepository, AuxiliaryTables, str, str, Options]] = None
+_worker_log_buffer: Optional[_LogRecordBuffer] = None
+
+OligoGenerationResult = Tuple[Optional[OligoGenerationInfo], Optional[str], List[logging.LogRecord]]
+
+
+def _init_oligo_generation_worker(
+    log_level: int,
+    output: str,
+    ref_repository: ReferenceSequenceRepository,
+    aux: AuxiliaryTables,
+    species: str,
+    assembly: str,
+    options: Options
+) -> None:
+    global _worker_state, _worker_log_buffer
+
+    # Buffer log records for the parent process to emit them in order
+    _worker_log_buffer = _LogRecordBuffer()
+    root_logger: logging.Logger = logging.getLogger()
+    root_logger.handlers = [_worker_log_buffer]
+    root_logger.setLevel(log_level)
+
+    _worker_state = (output, ref_repository, aux, species, assembly, options)
+
+
+def _generate_oligos_worker(ot: OligoTemplate) -> OligoGenerationResult:
+    if _worker_state is None or _worker_log_buffer is None:
+        raise RuntimeError("Worker process not initialised!")
+
+    output, ref_repository, aux, species, assembly, options = _worker_state
+    _worker_log_buffer.records = []
+
+    try:
+        info: OligoGenerationInfo = generate_oligos(
+            output, ref_repository, aux, ot, species, assembly, options)
+    except ValueError as ex:
+        return None, ex.args[0], _worker_log_buffer.records
+
+    return info, None, _worker_log_buffer.records
+
+
+def _generate_oligos_serial(
+    output: str,
+    ref_repository: ReferenceSequenceRepository,
+    aux: AuxiliaryTables,
+    oligo_templates: Iterable[OligoTemplate],
+    species: str,
+    assembly: str,
+    options: Options
+) -> Iterable[OligoGenerationResult]:
+    for ot in oligo_templates:
+        try:
+            yield generate_oligos(output, ref_repository, aux, ot, species, assembly, options), None, []
+        except ValueError as ex:
+            yield None, ex.args[0], []
+
+
+def _generate_oligos_parallel(
+    threads: int,
+    output: str,
+    ref_repository: ReferenceSequenceRepository,
+    aux: AuxiliaryTables,
+    oligo_templates: Iterable[OligoTemplate],
+    species: str,
+    assembly: str,
+    options: Options
+) -> Iterable[OligoGenerationResult]:
+    # Limit the number of templates held in memory at any time
+    max_pending: int = 2 * threads
+
+    with Pool(
+        processes=threads,
+        initializer=_init_oligo_generation_worker,
+        initargs=(
+            logging.getLogger().level,
+            output,
+            ref_repository,
+            aux,
+            species,
+            assembly,
+            options
+        )
+    ) as pool:
+        pending: Deque[AsyncResult] = deque()
+
+        # Results are returned in the same order as the templates
+        for ot in oligo_templates:
+            pending.append(pool.apply_async(_generate_oligos_worker, (ot,)))
+            if len(pending) >= max_pending:
+                yield pending.popleft().get()
+
+        while pending:
+            yield pending.popleft().get()
+
+
+def generate_all_oligos(
+    threads: int,
+    output: str,
+    ref_repository: ReferenceSequenceRepository,
+    aux: AuxiliaryTables,
+    oligo_templates: Iterable[OligoTemplate],
+    species: str,
+    assembly: str,
+    options: Options
+) -> int:
+    results: Iterable[OligoGenerationResult] = (
+        _generate_oligos_parallel(
+            threads, output, ref_repository, aux, oligo_templates, species, assembly, options) if threads > 1 else
+        _generate_oligos_serial(
+            output, ref_repository, aux, oligo_templates, species, assembly, options)
+    )
+
+    # Long oligonucleotides counter
+    long_oligo_n: int = 0
+
+    for info, err, records in results:
+
+        # Emit the log messages of the worker process (if any)
+        for record in records:
+            logging.getLogger(record.name).handle(record)
+
+        if info is None:
+            logging.critical(err)
+            logging.critical("Failed to generate oligonucleotides!")
+            sys.exit(1)
+
+        long_oligo_n += info.long_oligo_n
+
+    return long_oligo_n
 
 
 @click.command()
@@ -462,6 +644,31 @@ def generate_oligos(output: str, ref_repository: ReferenceSequenceRepository, au
     type=int,
     default=DEFAULT_OLIGO_MAX_LENGTH,
     help="Maximum oligonucleotide length")
+@click.option(
+    '--threads',
+    type=click.IntRange(min=1),
+    default=1,
+    help="Number of worker processes loading custom variants and generating oligonucleotides")
+@click.option(
+    '--ref-cache',
+    type=click.Path(file_okay=False),
+    help="Directory of the persistent reference sequence cache")
+@click.option(
+    '--ref-cache-size',
+    type=click.IntRange(min=1),
+    default=DEFAULT_REF_CACHE_MAX_SIZE_MB,
+    help="Maximum size of the reference sequence cache (megabases)")
+@click.option(
+    '--vcf-cache',
+    type=click.Path(file_okay=False),
+    help="Directory of the persistent cache of normalised custom variants")
+@click.option(
+    '--gff-cache',
+    type=click.Path(file_okay=False),
+    help="Directory of the persistent cache of processed GTF/GFF2 annotation")
+@click.option(
+    '--transcript-tag',
+    help="GTF/GFF2 tag of the transcripts to prefer when a target overlaps multiple transcripts (e.g., MANE_Select)")
 @click.version_option(__version__)
 def main(
 
@@ -490,7 +697,13 @@ def main(
     max_length: int,
 
     # Extra
-    log: str
+    log: str,
+    threads: int,
+    ref_cache: Optional[str],
+    ref_cache_size: int,
+    vcf_cache: Optional[str],
+    gff_cache: Optional[str],
+    transcript_tag: Optional[str]
 
 ) -> None:
     """
@@ -519,15 +732,17 @@ def main(
     # Load codon table
     ct: CodonTable = _load_codon_table(codon_table)
 
-    # Load CDS, stop codon, and UTR features from GTF/GFF2 file (if any)
-    annotation: Optional[AnnotationRepository] = _load_gff_file(gff)
-    exons: Optional[CDSContextRepository] = annotation.cds if annotation else None
-
     # Load oligonucleotide templates
     rsrs: ReferenceSequenceRangeCollection = _load_oligo_templates(oligo_info)
+    ref_regions: VcfRegions = get_vcf_regions(rsrs._ref_ranges)
+
+    # Load CDS, stop codon, and UTR features from GTF/GFF2 file (if any)
+    annotation: Optional[AnnotationRepository] = _load_gff_file(gff, cache_dir=gff_cache, regions=ref_regions)
+    exons: Optional[CDSContextRepository] = annotation.cds if annotation else None
 
     # Load PAM protection variants
-    pam_repository: PamProtectionVariantRepository = _load_pam_protection_vcf(rsrs.sgrna_ids, pam)
+    pam_repository: PamProtectionVariantRepository = _load_pam_protection_vcf(
+        rsrs.sgrna_ids, pam, regions=ref_regions)
 
     # Collect all genomic ranges for which reference sequences have to be fetched
     ref_ranges: Set[GenomicRange] = rsrs.ref_ranges
@@ -537,7 +752,8 @@ def main(
     if vcf:
         logging.debug("Loading custom variants...")
         try:
-            variant_repository = VariantRepository.load(vcf, rsrs._ref_ranges)
+            variant_repository = VariantRepository.load(
+                vcf, rsrs._ref_ranges, workers=threads, cache_dir=vcf_cache)
         except ValueError as ex:
             logging.critical(ex.args[0])
             logging.critical("Failed to load custom variants!")
@@ -546,14 +762,18 @@ def main(
             logging.critical(ex.args[0])
             logging.critical("Failed to load custom variants!")
             sys.exit(1)
+        except ImportError as ex:
+            logging.critical(ex.args[0])
+            logging.critical("The custom variant cache requires pyarrow!")
+            sys.exit(1)
 
     if exons:
-        exons.register_target_ranges(rsrs.target_ranges)
+        exons.register_target_ranges(rsrs.target_ranges, transcript_ids=rsrs.transcript_ids)
 
         # Retrieve CDS context (if any) for target regions
         # Only exonic sequences will have a CDS context
         try:
-            exons.compute_cds_contexts()
+            exons.compute_cds_contexts(transcript_tag=transcript_tag)
         except ValueError as ex:
             logging.critical(ex.args[0])
             logging.critical("Failed to match the CDS context!")
@@ -577,45 +797,35 @@ def main(
 
     # Fetch reference sequences
     try:
-        ref: ReferenceSequenceRepository = fetch_reference_sequences(ref_fasta, ref_ranges)
+        ref: ReferenceSequenceRepository = fetch_reference_sequences(
+            ref_fasta, ref_ranges, cache_dir=ref_cache, cache_max_size=ref_cache_size * 1000000)
     except ValueError as ex:
         logging.critical(ex.args[0])
         logging.critical("Failed to retrieve reference sequences!")
         sys.exit(1)
 
-    # Prepare oligonucleotides
-    oligo_templates: List[OligoTemplate] = get_oligo_templates(
-        rsrs,
+    # Prepare oligonucleotide templates (one targeton at a time)
+    oligo_templates: Iterator[OligoTemplate] = write_oligo_template_qc_info(
         ref,
-        pam_repository,
-        variant_repository,
-        annotation,
-        adaptor_5=adaptor_5,
-        adaptor_3=adaptor_3)
-
-    def get_qc_row(ot: OligoTemplate) -> List[str]:
-        return get_oligo_template_qc_info(ref, ot)
-
-    write_reference_sequences(
-        map(get_qc_row, oligo_templates),
+        get_oligo_templates(
+            rsrs,
+            ref,
+            pam_repository,
+            variant_repository,
+            annotation,
+            adaptor_5=adaptor_5,
+            adaptor_3=adaptor_3,
+            transcript_tag=transcript_tag),
         os.path.join(output, "ref_sequences.csv"))
 
     if sequences_only:
+        for _ in oligo_templates:
+            pass
         sys.exit(0)
 
-    # Long oligonucleotides counter
-    long_oligo_n: int = 0
-
-    for ot in oligo_templates:
-        try:
-            # Generate all oligonucleotides and write to file
-            info = generate_oligos(output, ref, aux, ot, species, assembly, options)
-        except ValueError as ex:
-            logging.critical(ex.args[0])
-            logging.critical("Failed to generate oligonucleotides!")
-            sys.exit(1)
-
-        long_oligo_n += info.long_oligo_n
+    # Generate all oligonucleotides and write to file
+    long_oligo_n: int = generate_all_oligos(
+        threads, output, ref, aux, oligo_templates, species, assembly, options)
 
     # Log number of oligonucleotides discarded due to excessive length
     if long_oligo_n:
@@ -41,6 +41,12 @@ CUSTOM_MUTATOR = 'custom'
 
 DEFAULT_OLIGO_MAX_LENGTH = 300
 
+# Maximum number of nucleotides kept in the reference sequence cache (megabases)
+DEFAULT_REF_CACHE_MAX_SIZE_MB = 1000
+
+# Number of oligonucleotide sequences rendered at once on output
+OLIGO_RENDER_BATCH_SIZE = 4096
+
 METADATA_FIELDS = [
     'oligo_name',
     'species',
@@ -68,3 +74,6 @@ METADATA_FIELDS = [
 ]
 
 METADATA_FIELDS_SET = set(METADATA_FIELDS)
+
+# Metadata fields available before the oligonucleotide sequences are rendered
+MUTATION_METADATA_FIELDS = [field for field in METADATA_FIELDS if field != 'mseq']
@@ -31,12 +31,25 @@
 # legal@sanger.ac.uk. Contact details are: legal@sanger.ac.uk quoting reference Valiant-software.
 #############################
 
+from contextlib import closing, contextmanager
+import csv
+import gzip
+import hashlib
+from itertools import chain
 import logging
-from typing import Dict, Set, Tuple
+import os
+import re
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
 import numpy as np
 import pandas as pd
-from pyranges import PyRanges, read_gtf
-from ..utils import get_frame_complement, i8_0, i8_2, validate_strand
+from pyranges import PyRanges
+from pysam import TabixFile
+from ..utils import get_frame_complement, i8_0, i8_2, merge_regions, validate_strand
+
+# Genomic regions to query (one-based, end included), sorted and disjoint
+GffRegions = Dict[str, List[Tuple[int, int]]]
+
+GffRecordTuple = Tuple[str, str, int, int, str, str, Optional[str], Optional[str], str]
 
 GFF_FIELDS = [
     'Chromosome',
@@ -46,7 +59,8 @@ GFF_FIELDS = [
     'Frame',
     'Feature',
     'gene_id',
-    'transcript_id'
+    'transcript_id',
+    'tags'
 ]
 
 GFF_FEATURES = {
@@ -55,28 +69,200 @@ GFF_FEATURES = {
     'UTR'
 }
 
+GFF_TRANSCRIPT_FEATURE = 'transcript'
+
+gff_attribute_res: Dict[str, re.Pattern] = {
+    attribute: re.compile(rf'(?:^|;)\s*{attribute}\s+"?([^";]*)"?')
+    for attribute in ['gene_id', 'transcript_id']
+}
+
+# Transcript tags (e.g., `tag "MANE_Select";`), possibly repeated
+gff_tag_re: re.Pattern = re.compile(r'(?:^|;)\s*tag\s+"?([^";]*)"?')
+
+# Version of the processed annotation tables (to be increased whenever their content changes)
+GFF_CACHE_VERSION = 2
+
+
+def _get_gff_attribute(attributes: str, attribute: str) -> Optional[str]:
+    m: Optional[re.Match] = gff_attribute_res[attribute].search(attributes)
+    return m.group(1) if m else None
+
+
+def _get_gff_tags(attributes: str) -> str:
+    return ','.join(gff_tag_re.findall(attributes))
+
+
+def _get_gff_rows(lines: Iterable[str]) -> Iterator[List[str]]:
+
+    # Parse tab-separated fields (possibly quoted)
+    for row in csv.reader(lines, delimiter='\t'):
+        if not row or row[0].startswith('#'):
+            continue
+        if len(row) != 9:
+            raise ValueError("Invalid GTF/GFF2 record: unexpected number of fields!")
+        yield row
+
+
+def _get_gff_records(
+    rows: Iterable[List[str]],
+    chromosomes: Optional[Set[str]] = None,
+    transcript_ids: Optional[Set[str]] = None
+) -> Iterator[GffRecordTuple]:
+    for chromosome, _, feature, start, end, _, strand, frame, attributes in rows:
+
+        # Parse the attributes of the required features only
+        if feature not in GFF_FEATURES or (chromosomes is not None and chromosome not in chromosomes):
+            continue
+        transcript_id: Optional[str] = _get_gff_attribute(attributes, 'transcript_id')
+        if transcript_ids is not None and transcript_id not in transcript_ids:
+            continue
+
+        yield (
+            chromosome,
+            strand,
+            int(start) - 1,
+            int(end),
+            frame,
+            feature,
+            _get_gff_attribute(attributes, 'gene_id'),
+            transcript_id,
+            _get_gff_tags(attributes)
+        )
+
+
+def _get_gff_table(records: Iterable[GffRecordTuple]) -> pd.DataFrame:
+    df: pd.DataFrame = pd.DataFrame.from_records(records, columns=GFF_FIELDS)
+
+    # Compress information
+    df.Chromosome = df.Chromosome.astype('category')
+    df.Strand = df.Strand.astype('category')
+    df.Start = df.Start.astype(np.int32)
+    df.End = df.End.astype(np.int32)
+    df.Feature = df.Feature.astype('category')
+    df.tags = df.tags.astype('category')
+
+    return df
+
+
+@contextmanager
+def _open_gff(fp: str) -> Iterator[Iterable[str]]:
+    with (gzip.open(fp, 'rt') if fp.endswith('.gz') else open(fp)) as f:
+        yield f
+
+
+def _is_indexed(fp: str) -> bool:
+    return os.path.isfile(f"{fp}.tbi") or os.path.isfile(f"{fp}.csi")
+
+
+def _fetch_region_lines(tbx: TabixFile, regions: GffRegions) -> Iterator[str]:
+    contigs: Set[str] = set(tbx.contigs)
+    for chromosome, chromosome_regions in regions.items():
+        if chromosome not in contigs:
+            continue
+
+        prev_end: int = 0
+        for start, end in chromosome_regions:
+            for line in tbx.fetch(chromosome, start - 1, end):
+
+                # Skip records overlapping the previous region (already retrieved)
+                if int(line.split('\t', 4)[3].strip('"')) - 1 >= prev_end:
+                    yield line
+
+            prev_end = end
+
+
+def _read_indexed_gff_features(fp: str, regions: GffRegions) -> pd.DataFrame:
+    transcript_spans: Dict[str, Tuple[str, int, int]] = {}
+    transcript_chromosomes: Dict[str, str] = {}
+
+    with closing(TabixFile(fp)) as tbx:
+
+        # Find the transcripts with features overlapping the regions
+        for chromosome, _, feature, start, end, _, _, _, attributes in _get_gff_rows(
+                _fetch_region_lines(tbx, regions)):
+            if feature != GFF_TRANSCRIPT_FEATURE and feature not in GFF_FEATURES:
+                continue
+            transcript_id: Optional[str] = _get_gff_attribute(attributes, 'transcript_id')
+            if transcript_id is None:
+                continue
+            if feature == GFF_TRANSCRIPT_FEATURE:
+                transcript_spans[transcript_id] = (chromosome, int(start), int(end))
+            else:
+                transcript_chromosomes[transcript_id] = chromosome
+
+        # Collect the full extent of those transcripts
+        # (the whole chromosome if no transcript feature is available)
+        chromosomes: Set[str] = set()
+        spans: Dict[str, List[Tuple[int, int]]] = {}
+        for transcript_id, chromosome in transcript_chromosomes.items():
+            if transcript_id in transcript_spans:
+                chromosome, start, end = transcript_spans[transcript_id]
+                spans.setdefault(chromosome, []).append((start, end))
+            else:
+                chromosomes.add(chromosome)
+
+        logging.debug("GTF/GFF2 file: %d transcripts overlapping the regions." % len(transcript_chromosomes))
+
+        # Read the features of those transcripts only
+        return _get_gff_table(_get_gff_records(_get_gff_rows(chain(
+            chain.from_iterable(tbx.fetch(chromosome) for chromosome in chromosomes),
+            _fetch_region_lines(tbx, {
+                chromosome: merge_regions(chromosome_spans)
+                for chromosome, chromosome_spans in spans.items()
+                if chromosome not in chromosomes
+            })
+        )), transcript_ids=set(transcript_chromosomes)))
+
+
+def read_gff_features(fp: str, regions: Optional[GffRegions] = None) -> pd.DataFrame:
+
+    # Query the regions only if the file is indexed
+    if regions is not None and _is_indexed(fp):
+        return _read_indexed_gff_features(fp, regions)
+
+    with _open_gff(fp) as lines:
+        return _get_gff_table(_get_gff_records(
+            _get_gff_rows(lines), chromosomes=set(regions) if regions is not None else None))
+
+
+def get_tagged_transcript_ids(ranges: pd.DataFrame, tag: str) -> Set[str]:
+    if 'tags' not in ranges.columns:
+        return set()
+
+    # Match the tag against the list of tags of each transcript
+    transcript_tags: pd.DataFrame = ranges[['transcript_id', 'tags']].drop_duplicates()
+    return set(
+        transcript_id
+        for transcript_id, tags in transcript_tags.itertuples(index=False, name=None)
+        if isinstance(tags, str) and tag in tags.split(',')
+    )
+
 
 def get_exon_indices(g: pd.core.groupby.generic.DataFrameGroupBy) -> pd.Series:
 
-    # Validate strand information
-    strand_counts: pd.Series = g.Strand.value_counts()
+    # Validate strand information (per transcript)
+    strand_counts: pd.Series = g.Strand.nunique()
 
-    n = strand_counts.shape[0]
-    if n == 0:
+    if strand_counts.shape[0] == 0 or (strand_counts == 0).any():
         raise ValueError("No strand information available!")
-    if n > 1:
+    if (strand_counts > 1).any():
         raise ValueError("Inconsistent strand information for transcript!")
 
-    strand: str = strand_counts.index.get_level_values(1).to_numpy()[0]
-    validate_strand(strand)
+    strands: pd.Series = g.obj.Strand
+    for strand in strands.unique():
+        validate_strand(strand)
 
     # Assign indices based on strand
-    is_plus_strand: bool = strand == '+'
-    return g.cumcount(ascending=is_plus_strand).astype(np.int32)
+    is_plus_strand: np.ndarray = (strands == '+').to_numpy()
+    return pd.Series(np.where(
+        is_plus_strand,
+        g.cumcount(ascending=True).to_numpy(),
+        g.cumcount(ascending=False).to_numpy()
+    ), index=strands.index).astype(np.int32)
 
 
 def _get_last_cds_indices(cds_ranges: pd.DataFrame, strand: str) -> np.ndarray:
-    return cds_ranges[cds_ranges.Strand == strand].groupby('transcript_id', sort=False).exon_index.idxmax()
+    return cds_ranges[cds_ranges.Strand == strand].groupby('transcript_id', sort=False, observed=True).exon_index.idxmax()
 
 
 def _get_frames(frame: pd.Series) -> pd.Series:
@@ -94,20 +280,20 @@ def _get_frames(frame: pd.Series) -> pd.Series:
     return get_frame_complement(frame)
 
 
-def load_gff_cds(fp: str) -> Tuple[PyRanges, PyRanges]:
+def _load_gff_cds(fp: str, regions: Optional[GffRegions] = None) -> Tuple[PyRanges, PyRanges]:
 
-    # Load necessary fields from GTF/GFF2 file
-    ranges: pd.DataFrame = read_gtf(fp, as_df=True)[GFF_FIELDS].rename(columns={
+    # Load necessary features and fields from GTF/GFF2 file
+    ranges: pd.DataFrame = read_gff_features(fp, regions=regions).rename(columns={
         'Frame': 'frame'
     })
 
-    logging.debug("GTF/GFF2 file: %d features found." % ranges.shape[0])
-
-    # Drop unnecessary features
-    ranges = ranges[ranges.Feature.isin(GFF_FEATURES)]
-
     logging.debug("GTF/GFF2 file: %d CDS features found." % ranges.shape[0])
 
+    # Allow for no features overlapping the regions
+    if regions is not None and ranges.shape[0] == 0:
+        logging.info("No GTF/GFF2 features overlapping the target regions.")
+        return PyRanges(), PyRanges()
+
     # Compress identifiers
     ranges.transcript_id = ranges.transcript_id.astype('category')
     ranges.gene_id = ranges.gene_id.astype('category')
@@ -146,27 +332,19 @@ def load_gff_cds(fp: str) -> Tuple[PyRanges, PyRanges]:
     if gene_n == 0 or transcript_n == 0:
         raise ValueError("No gene or transcript ID found in GTF/GFF file!")
 
-    if transcript_n > gene_n:
-        raise ValueError("Multiple transcripts per gene in GTF/GFF file are not supported!")
-
     # Check for missing identifiers
     if ranges.gene_id.isnull().values.any():
         raise ValueError("Missing gene ID in GTF/GFF2 file!")
     if ranges.transcript_id.isnull().values.any():
         raise ValueError("Missing transcript ID in GTF/GFF2 file!")
 
-    # Check only one transcript per gene is present
-    gene_transcript_counts: pd.DataFrame = ranges.groupby([
-        'gene_id',
-        'transcript_id'
-    ], sort=False).size().reset_index(name='counts')
-    gene_transcript_counts = gene_transcript_counts[gene_transcript_counts.counts > 0]
-    if gene_transcript_counts.shape[0] > gene_n:
-        raise ValueError("Multiple transcripts per gene in GTF/GFF file are not supported!")
+    # Check each transcript belongs to one gene only
+    if ranges.groupby('transcript_id', sort=False, observed=True).gene_id.nunique().gt(1).any():
+        raise ValueError("Multiple genes per transcript in GTF/GFF2 file!")
 
     # Assign a sequential index to each CDS feature (5' to 3')
     ranges['exon_index'] = ranges.groupby(
-        ['transcript_id'], sort=False).pipe(get_exon_indices)
+        ['transcript_id'], sort=False, observed=True).pipe(get_exon_indices)
 
     # Append the stop codons to the last CDS features
     strands: Set[str] = set(ranges.Strand.cat.categories.values)
@@ -188,3 +366,52 @@ def load_gff_cds(fp: str) -> Tuple[PyRanges, PyRanges]:
     cds_ranges: PyRanges = PyRanges(df=ranges)
 
     return cds_ranges, utr_ranges
+
+
+def get_gff_cache_paths(cache_dir: str, fp: str) -> Tuple[str, str]:
+    stat = os.stat(fp)
+    key: str = '|'.join([
+        os.path.abspath(fp),
+        str(stat.st_mtime_ns),
+        str(stat.st_size),
+        str(GFF_CACHE_VERSION)
+    ])
+    prefix: str = os.path.join(cache_dir, hashlib.sha1(key.encode()).hexdigest())
+    return f"{prefix}.cds.parquet", f"{prefix}.utr.parquet"
+
+
+def _write_gff_cache_table(ranges: PyRanges, cache_fp: str) -> None:
+
+    # Write cache file atomically (concurrent runs may share it)
+    ranges.df.to_parquet(f"{cache_fp}.{os.getpid()}.tmp", index=False)
+    os.replace(f"{cache_fp}.{os.getpid()}.tmp", cache_fp)
+
+
+def _read_gff_cache_table(cache_fp: str) -> PyRanges:
+    df: pd.DataFrame = pd.read_parquet(cache_fp)
+    return PyRanges(df=df) if df.shape[0] > 0 else PyRanges()
+
+
+def load_gff_cds(
+    fp: str,
+    cache_dir: Optional[str] = None,
+    regions: Optional[GffRegions] = None
+) -> Tuple[PyRanges, PyRanges]:
+    if not cache_dir:
+        return _load_gff_cds(fp, regions=regions)
+
+    # The cache holds the complete annotation
+
+    cds_cache_fp, utr_cache_fp = get_gff_cache_paths(cache_dir, fp)
+    if os.path.isfile(cds_cache_fp) and os.path.isfile(utr_cache_fp):
+        logging.debug("Loading cached annotation for GTF/GFF2 file '%s'." % fp)
+        return _read_gff_cache_table(cds_cache_fp), _read_gff_cache_table(utr_cache_fp)
+
+    # Process and cache the annotation (only if valid)
+    cds_ranges, utr_ranges = _load_gff_cds(fp)
+    logging.info("Caching annotation from GTF/GFF2 file '%s'..." % fp)
+    os.makedirs(cache_dir, exist_ok=True)
+    _write_gff_cache_table(utr_ranges, utr_cache_fp)
+    _write_gff_cache_table(cds_ranges, cds_cache_fp)
+
+    return cds_ranges, utr_ranges
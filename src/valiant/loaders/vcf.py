@@ -33,7 +33,9 @@
 
 from contextlib import closing, contextmanager
 from functools import partial
+import hashlib
 import logging
+from multiprocessing import Pool
 import os
 import shutil
 from tempfile import NamedTemporaryFile
@@ -46,6 +48,20 @@ from ..utils import get_constant_category
 
 VariantRecordTuple = Tuple[str, int, int, Optional[str], Optional[str], Optional[str], int, int]
 
+# Genomic regions to query (one-based, end included), sorted and disjoint
+VcfRegions = Dict[str, List[Tuple[int, int]]]
+
+
+VARIANT_TABLE_COLUMNS = [
+    'Chromosome',
+    'Start',
+    'End',
+    'ref',
+    'alt',
+    'vcf_var_id',
+    'var_type',
+    'var_class'
+]
 
 VCF_MANIFEST_HEADER = {
     'vcf_alias',
@@ -137,25 +153,55 @@ def normalise_variant_record(
             return chromosome, start, end, ref, alt, var_id, var_type_sub, var_class_unclass
 
 
+def _is_single_alt(record: VariantRecord) -> bool:
+    return record.alts is None or len(record.alts) == 1
+
+
 def _filter_var(chromosomes: Dict[str, Tuple[int, int]], record: VariantRecord) -> bool:
     chromosome: str = record.contig
     if chromosome not in chromosomes:
         return False
 
     pos_min, pos_max = chromosomes[chromosome]
-    return (
-        pos_min <= record.pos <= pos_max
-        and (
-            record.alts is None
-            or len(record.alts) == 1
-        )
-    )
+    return pos_min <= record.pos <= pos_max and _is_single_alt(record)
 
 
-# TODO: if indexed, fetch by chromosome?
-def load_vcf(fp: str, chromosomes: Dict[str, Tuple[int, int]], vcf_id_tag: Optional[str] = None) -> pd.DataFrame:
-    if not vcf_id_tag:
-        logging.info("No INFO tag specified as variant identifier for VCF file '%s', falling back to the ID field." % fp)
+def _fetch_region_records(vcf: VariantFile, regions: VcfRegions) -> Iterator[VariantRecord]:
+    for chromosome, chromosome_regions in regions.items():
+        prev_end: int = 0
+        for start, end in chromosome_regions:
+
+            # Include insertions anchored at the nucleotide preceding the region
+            fetch_start: int = max(start - 2, 0)
+
+            try:
+                records: Iterator[VariantRecord] = vcf.fetch(chromosome, fetch_start, end)
+            except ValueError:
+
+                # Chromosome not in the index
+                break
+
+            for record in records:
+
+                # Skip records overlapping the previous region (already retrieved)
+                if record.start >= prev_end:
+                    yield record
+
+            prev_end = end
+
+
+def fetch_vcf_records(vcf: VariantFile, regions: Optional[VcfRegions] = None) -> Iterator[VariantRecord]:
+
+    # Query the regions only if the file is indexed
+    if regions is not None and vcf.index is not None:
+        logging.debug("Querying %d regions of indexed VCF file '%s'." % (
+            sum(map(len, regions.values())), os.fsdecode(vcf.filename)))
+        return _fetch_region_records(vcf, regions)
+
+    return vcf.fetch()
+
+
+def _get_var_id_getter(vcf_id_tag: Optional[str]) -> Callable[[VariantRecord], Optional[str]]:
 
     def get_var_id_from_info(record: VariantRecord) -> Optional[str]:
         vcf_var_id: Any = record.info.get(vcf_id_tag, None)
@@ -164,31 +210,11 @@ def load_vcf(fp: str, chromosomes: Dict[str, Tuple[int, int]], vcf_id_tag: Optio
     def get_var_id_from_id(record: VariantRecord) -> Optional[str]:
         return str(record.id) if record.id is not None else None
 
-    get_var: Callable[[VariantRecord], VariantRecordTuple] = partial(
-        normalise_variant_record,
-        get_var_id_from_info if vcf_id_tag else get_var_id_from_id)
-
-    filter_var: Callable[[VariantRecord], bool] = partial(
-        _filter_var, chromosomes)
+    return get_var_id_from_info if vcf_id_tag else get_var_id_from_id
 
-    with get_vcf(fp) as vcf:
-        if vcf_id_tag and vcf_id_tag not in vcf.header.info:
-            raise ValueError(f"INFO tag '{vcf_id_tag}' not found in VCF file '{fp}'!")
 
-        df: pd.DataFrame = pd.DataFrame.from_records([
-            get_var(record)
-            for record in vcf.fetch()
-            if filter_var(record)
-        ], columns=[
-            'Chromosome',
-            'Start',
-            'End',
-            'ref',
-            'alt',
-            'vcf_var_id',
-            'var_type',
-            'var_class'
-        ])
+def _get_variant_table(records: Iterable[Tuple], columns: List[str]) -> pd.DataFrame:
+    df: pd.DataFrame = pd.DataFrame.from_records(records, columns=columns)
 
     # Compress information
     df.Chromosome = df.Chromosome.astype('category')
@@ -203,15 +229,139 @@ def load_vcf(fp: str, chromosomes: Dict[str, Tuple[int, int]], vcf_id_tag: Optio
     return df
 
 
-def load_vcf_manifest(fp: str, chromosomes: Dict[str, Tuple[int, int]]) -> pd.DataFrame:
+@contextmanager
+def _get_vcf_with_id_tag(fp: str, vcf_id_tag: Optional[str]) -> Iterator[VariantFile]:
+    if not vcf_id_tag:
+        logging.info("No INFO tag specified as variant identifier for VCF file '%s', falling back to the ID field." % fp)
+
+    with get_vcf(fp) as vcf:
+        if vcf_id_tag and vcf_id_tag not in vcf.header.info:
+            raise ValueError(f"INFO tag '{vcf_id_tag}' not found in VCF file '{fp}'!")
+        yield vcf
+
 
-    def load_vcf_manifest_item(r: pd.Series) -> pd.DataFrame:
-        vcf_id_tag: Optional[str] = r.vcf_id_tag if not pd.isnull(r.vcf_id_tag) else None
-        df = load_vcf(r.vcf_path, chromosomes, vcf_id_tag=vcf_id_tag)
-        df['vcf_alias'] = get_constant_category(
-            r.vcf_alias, df.shape[0], categories=vcf_aliases)
-        return df
+def load_vcf(
+    fp: str,
+    chromosomes: Dict[str, Tuple[int, int]],
+    vcf_id_tag: Optional[str] = None,
+    regions: Optional[VcfRegions] = None,
+    cache_dir: Optional[str] = None
+) -> pd.DataFrame:
+    if cache_dir:
+        return _load_vcf_cached(fp, chromosomes, vcf_id_tag, cache_dir, regions=regions)
+
+    get_var: Callable[[VariantRecord], VariantRecordTuple] = partial(
+        normalise_variant_record, _get_var_id_getter(vcf_id_tag))
+
+    filter_var: Callable[[VariantRecord], bool] = partial(
+        _filter_var, chromosomes)
+
+    with _get_vcf_with_id_tag(fp, vcf_id_tag) as vcf:
+        return _get_variant_table((
+            get_var(record)
+            for record in fetch_vcf_records(vcf, regions=regions)
+            if filter_var(record)
+        ), VARIANT_TABLE_COLUMNS)
+
+
+def get_vcf_cache_path(cache_dir: str, fp: str, vcf_id_tag: Optional[str]) -> str:
+    stat = os.stat(fp)
+    key: str = '|'.join([
+        os.path.abspath(fp),
+        str(stat.st_mtime_ns),
+        str(stat.st_size),
+        vcf_id_tag or ''
+    ])
+    return os.path.join(cache_dir, f"{hashlib.sha1(key.encode()).hexdigest()}.parquet")
 
+
+def _normalise_cached_variant_record(
+    get_var: Callable[[VariantRecord], VariantRecordTuple],
+    record: VariantRecord
+) -> Tuple:
+    try:
+        return (record.pos, *get_var(record), None)
+
+    except ValueError as ex:
+
+        # Store the error, to be raised only if the record is loaded
+        logging.warning("Invalid variant at %s:%d: %s" % (record.contig, record.pos, ex.args[0]))
+        return record.pos, record.contig, record.pos, record.pos, None, None, None, var_type_unk, var_class_unclass, ex.args[0]
+
+
+def _build_vcf_cache(fp: str, vcf_id_tag: Optional[str], cache_fp: str) -> None:
+    get_var: Callable[[VariantRecord], VariantRecordTuple] = partial(
+        normalise_variant_record, _get_var_id_getter(vcf_id_tag))
+
+    # Normalise all records, retaining the original positions
+    logging.info("Caching normalised variants from VCF file '%s'..." % fp)
+    with _get_vcf_with_id_tag(fp, vcf_id_tag) as vcf:
+        df: pd.DataFrame = _get_variant_table((
+            _normalise_cached_variant_record(get_var, record)
+            for record in vcf.fetch()
+            if _is_single_alt(record)
+        ), ['pos', *VARIANT_TABLE_COLUMNS, 'error'])
+    df.pos = df.pos.astype(np.int32)
+    df.error = df.error.astype('string')
+
+    # Write cache file atomically (concurrent runs may share it)
+    df.sort_values(['Chromosome', 'pos'], kind='stable', ignore_index=True).to_parquet(
+        f"{cache_fp}.{os.getpid()}.tmp", index=False)
+    os.replace(f"{cache_fp}.{os.getpid()}.tmp", cache_fp)
+
+
+def _in_regions(regions: VcfRegions, chromosome: str, pos: int) -> bool:
+
+    # Include insertions anchored at the nucleotide preceding a region (as when querying indexed files)
+    return any(start - 1 <= pos <= end for start, end in regions.get(chromosome, []))
+
+
+def _load_vcf_cached(
+    fp: str,
+    chromosomes: Dict[str, Tuple[int, int]],
+    vcf_id_tag: Optional[str],
+    cache_dir: str,
+    regions: Optional[VcfRegions] = None
+) -> pd.DataFrame:
+    cache_fp: str = get_vcf_cache_path(cache_dir, fp, vcf_id_tag)
+    if not os.path.isfile(cache_fp):
+        os.makedirs(cache_dir, exist_ok=True)
+        _build_vcf_cache(fp, vcf_id_tag, cache_fp)
+    else:
+        logging.debug("Loading cached normalised variants for VCF file '%s'." % fp)
+
+    if not chromosomes:
+        return _get_variant_table([], VARIANT_TABLE_COLUMNS)
+
+    # Read the variants within the chromosome boundaries only
+    df: pd.DataFrame = pd.read_parquet(cache_fp, filters=[
+        [('Chromosome', '==', chromosome), ('pos', '>=', pos_min), ('pos', '<=', pos_max)]
+        for chromosome, (pos_min, pos_max) in chromosomes.items()
+    ])
+
+    # Raise the normalisation errors of the records within the regions (if any)
+    error_mask: np.ndarray = df.error.notna().to_numpy()
+    if error_mask.any():
+        for chromosome, pos, error in df.loc[error_mask, ['Chromosome', 'pos', 'error']].itertuples(
+                index=False, name=None):
+            if regions is None or _in_regions(regions, chromosome, pos):
+                raise ValueError(error)
+        df = df[~error_mask]
+
+    # Drop unused categories
+    for column in ['Chromosome', 'ref', 'alt']:
+        df[column] = df[column].cat.remove_unused_categories()
+
+    return df[VARIANT_TABLE_COLUMNS].reset_index(drop=True)
+
+
+def load_vcf_manifest(
+    fp: str,
+    chromosomes: Dict[str, Tuple[int, int]],
+    regions: Optional[VcfRegions] = None,
+    workers: int = 1,
+    cache_dir: Optional[str] = None
+) -> pd.DataFrame:
     manifest_df: pd.DataFrame = pd.read_csv(fp)
 
     if set(manifest_df.columns) != VCF_MANIFEST_HEADER:
@@ -230,9 +380,26 @@ def load_vcf_manifest(fp: str, chromosomes: Dict[str, Tuple[int, int]]) -> pd.Da
             raise FileNotFoundError(f"VCF file not found: '{fp}'!")
 
     vcf_aliases: List[str] = list(manifest_df.vcf_alias.to_numpy())
-    return pd.concat(
-        list(manifest_df.apply(load_vcf_manifest_item, axis=1)),
-        ignore_index=True)
+    load_vcf_args: List[Tuple[str, Dict[str, Tuple[int, int]], Optional[str], Optional[VcfRegions], Optional[str]]] = [
+        (vcf_path, chromosomes, vcf_id_tag if not pd.isnull(vcf_id_tag) else None, regions, cache_dir)
+        for vcf_path, vcf_id_tag in manifest_df[['vcf_path', 'vcf_id_tag']].itertuples(index=False, name=None)
+    ]
+
+    # Load VCF files (concurrently, if multiple workers are available)
+    workers = min(workers, len(load_vcf_args))
+    dfs: List[pd.DataFrame]
+    if workers > 1:
+        with Pool(processes=workers) as pool:
+            dfs = pool.starmap(load_vcf, load_vcf_args)
+    else:
+        dfs = [load_vcf(*args) for args in load_vcf_args]
+
+    # Label variants in manifest order
+    for vcf_alias, df in zip(vcf_aliases, dfs):
+        df['vcf_alias'] = get_constant_category(
+            vcf_alias, df.shape[0], categories=vcf_aliases)
+
+    return pd.concat(dfs, ignore_index=True)
 
 
 def _get_vcf_header_info_items(id_: str, type_: str, n: int) -> List[Tuple[str, Union[str, int]]]:
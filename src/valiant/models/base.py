@@ -49,6 +49,11 @@ class GenomicPosition:
         if not self.chromosome or self.position < 1:
             raise ValueError("Invalid genomic position!")
 
+    # Required to allow multiprocessing to pickle the object
+    def __setstate__(self, state: Tuple) -> None:
+        for slot, value in state[1].items():
+            object.__setattr__(self, slot, value)
+
     def __add__(self, other) -> GenomicPosition:
         if not isinstance(other, int):
             raise TypeError("Invalid position offset!")
@@ -33,13 +33,11 @@
 
 from __future__ import annotations
 from dataclasses import dataclass
-from typing import List, Optional, Tuple
 import numpy as np
 import pandas as pd
 from .mutated_sequences import BaseMutationCollection
 from .oligo_renderer import BaseOligoRenderer
 from .pam_protection import PamProtectedReferenceSequence
-from .variant import BaseVariant, CustomVariant
 
 
 @dataclass(init=False)
@@ -63,26 +61,10 @@ class CustomVariantOligoRenderer(BaseOligoRenderer):
     ) -> None:
         super().__init__(ref_seq, gene_id, transcript_id, adaptor_5, adaptor_3)
 
-    def get_oligo_name(self, vcf_alias: str, var_type: int, start: int, ref: Optional[str], alt: Optional[str]) -> str:
-        return super()._get_oligo_name(var_type, vcf_alias, start, ref, alt)
+    def get_custom_oligo_names(self, df: pd.DataFrame) -> pd.Series:
+        """Generate the oligonucleotide names using the VCF aliases as sources"""
 
-
-@dataclass
-class CustomVariantMutation:
-    variant: CustomVariant
-    sequence: str
-
-    def to_row(self) -> Tuple[Optional[str], Optional[str], int, int, Optional[str], Optional[str], str]:
-        var: BaseVariant = self.variant.base_variant
-        return (
-            self.variant.vcf_alias,
-            self.variant.vcf_variant_id,
-            var.type.value,
-            var.genomic_position.position,
-            getattr(var, 'ref', None),
-            getattr(var, 'alt', None),
-            self.sequence
-        )
+        return self.get_oligo_names(df, df.vcf_alias.to_numpy(dtype=object))
 
 
 @dataclass
@@ -90,27 +72,20 @@ class CustomVariantMutationCollection(BaseMutationCollection):
     __slots__ = {'df'}
 
     @classmethod
-    def from_variants(cls, mutations: List[CustomVariantMutation]) -> CustomVariantMutationCollection:
-        df: pd.DataFrame = pd.DataFrame.from_records([
-            mutation.to_row()
-            for mutation in mutations
-        ], columns=[
-            'vcf_alias',
-            'vcf_var_id',
-            'var_type',
-            'mut_position',
-            'ref',
-            'new',
-            'mseq'
-        ])
+    def from_variant_table(cls, variants: pd.DataFrame) -> CustomVariantMutationCollection:
+        """Build the collection from a custom variant table (zero-based start positions)"""
+
+        df: pd.DataFrame = pd.DataFrame({
+            'vcf_alias': pd.Categorical(variants.vcf_alias.to_numpy(dtype=object)),
+            'vcf_var_id': pd.array(variants.vcf_var_id.to_numpy(dtype=object), dtype='string'),
+            'var_type': variants.var_type.to_numpy().astype(np.int8),
+            'mut_position': variants.Start.to_numpy().astype(np.int32) + 1,
+            'ref': pd.Categorical(variants.ref.to_numpy(dtype=object)),
+            'new': pd.Categorical(variants.alt.to_numpy(dtype=object))
+        })
 
-        # Compress table
-        df.vcf_alias = df.vcf_alias.astype('category')
-        df.vcf_var_id = df.vcf_var_id.astype('string')
-        df.var_type = df.var_type.astype(np.int8)
-        df.mut_position = df.mut_position.astype(np.int32)
-        df.ref = df.ref.astype('category')
-        df.new = df.new.astype('category')
-        df.mseq = df.mseq.astype('string')
+        # Sort variants (independently of the order of the VCF files and records)
+        df = df.sort_values(
+            ['mut_position', 'var_type', 'ref', 'new', 'vcf_alias', 'vcf_var_id'], ignore_index=True)
 
         return cls(df=df)
@@ -33,14 +33,13 @@
 
 from __future__ import annotations
 from dataclasses import dataclass
-from itertools import chain
-from typing import Dict, Optional, Set, Tuple
+import logging
+from typing import Dict, List, Optional, Set, Tuple
 import numpy as np
 import pandas as pd
 from pyranges import PyRanges
 from .base import GenomicRange, TranscriptInfo
-from ..loaders.gff import load_gff_cds
-from ..utils import validate_strand
+from ..loaders.gff import GffRegions, get_tagged_transcript_ids, load_gff_cds
 
 GenomicRangePair = Tuple[Optional[GenomicRange], Optional[GenomicRange]]
 
@@ -49,6 +48,46 @@ def pyrange_to_genomic_range(k: Tuple[str, str], record) -> GenomicRange:
     return GenomicRange(k[0], record.Start + 1, record.End, k[1])
 
 
+def select_transcripts(
+    matches: pd.DataFrame,
+    target_fields: List[str],
+    tagged_transcript_ids: Set[str],
+    feature: str
+) -> pd.DataFrame:
+    """Filter the transcripts matching each target, sorting ambiguous matches by transcript ID"""
+
+    if matches.shape[0] == 0:
+        return matches
+
+    # Retain the matches of the selected transcripts only
+    selections: np.ndarray = matches.transcript_selection.to_numpy(dtype=object)
+    transcript_ids: np.ndarray = matches.transcript_id.to_numpy(dtype=object)
+    matches = matches[(selections == '') | (transcript_ids == selections)]
+
+    # Prefer the transcripts bearing the tag (if any matches)
+    if tagged_transcript_ids:
+        is_tagged: pd.Series = matches.transcript_id.isin(tagged_transcript_ids)
+        has_tagged: pd.Series = is_tagged.groupby([
+            matches[field] for field in target_fields
+        ], observed=True, sort=False).transform('any')
+        matches = matches[is_tagged | ~has_tagged]
+
+    # Report targets matching multiple transcripts
+    transcript_counts: pd.Series = matches.groupby(
+        target_fields, observed=True, sort=False).transcript_id.nunique()
+    ambiguous_n: int = int((transcript_counts > 1).sum())
+    if ambiguous_n > 0:
+        logging.warning(
+            "%d target regions overlap the %s of multiple transcripts: "
+            "the last transcript ID in lexicographical order will be used." % (ambiguous_n, feature))
+
+        # Sort matches by transcript (stable, so as to retain the order of the exons)
+        matches = matches.iloc[np.argsort(
+            matches.transcript_id.to_numpy(dtype=object), kind='stable')]
+
+    return matches
+
+
 @dataclass
 class ExonInfo:
     __slots__ = {'transcript_info', 'genomic_range', 'exon_index'}
@@ -66,205 +105,308 @@ class ExonInfo:
         return self.transcript_info.gene_id
 
 
+# (chromosome, start, end, strand, selected transcript ID or empty string)
+TargetKey = Tuple[str, int, int, str, str]
+
+# (transcript ID, exon index) -> (chromosome, strand, start, end), or None if not unique
+ExonIndex = Dict[Tuple[str, int], Optional[Tuple[str, str, int, int]]]
+
+
+def _build_exon_index(cds_ranges: Optional[PyRanges]) -> ExonIndex:
+    if not cds_ranges or not {'transcript_id', 'exon_index'} <= set(cds_ranges.columns):
+        return {}
+
+    df: pd.DataFrame = cds_ranges.as_df()
+    exon_index: ExonIndex = {}
+    for k, v in zip(
+        zip(df.transcript_id.tolist(), df.exon_index.tolist()),
+        zip(df.Chromosome.tolist(), df.Strand.tolist(), (df.Start + 1).tolist(), df.End.tolist())
+    ):
+        exon_index[k] = v if k not in exon_index else None
+
+    return exon_index
+
+
 @dataclass(init=False)
 class CDSContextRepository:
-    __slots__ = {'cds_ranges', '_target_ranges', '_target_cds_contexts'}
+    __slots__ = {
+        'cds_ranges',
+        '_exon_index',
+        '_target_ranges',
+        '_target_transcript_ids',
+        '_target_cds_columns',
+        '_target_indices'
+    }
 
     cds_ranges: PyRanges
+    _exon_index: ExonIndex
     _target_ranges: Optional[PyRanges]
-    _target_cds_contexts: Optional[Dict[GenomicRange, Tuple[ExonInfo, GenomicRangePair]]]
+    _target_transcript_ids: Dict[int, str]
+    _target_cds_columns: Dict[str, np.ndarray]
+    _target_indices: Optional[Dict[TargetKey, int]]
 
     def __init__(self, cds_ranges: PyRanges) -> None:
         self.cds_ranges = cds_ranges
+        self._exon_index = _build_exon_index(cds_ranges)
         self._target_ranges = None
-        self._target_cds_contexts = None
+        self._target_transcript_ids = {}
+        self._target_cds_columns = {}
+        self._target_indices = None
 
-    def register_target_ranges(self, target_ranges: PyRanges) -> None:
+    def register_target_ranges(
+        self,
+        target_ranges: PyRanges,
+        transcript_ids: Optional[Dict[int, str]] = None
+    ) -> None:
         self._target_ranges = target_ranges
 
-    # TODO: investigate whether binding the chromosome and strand to each transcript
-    # would speed up things (only one DataFrame to go through)
-    def get_cds_by_index(self, transcript_id: str, exon_index: int) -> GenomicRange:
-        exon_ranges: PyRanges = self.cds_ranges[
-            (self.cds_ranges.transcript_id == transcript_id)
-            & (self.cds_ranges.exon_index == exon_index)
-        ]
+        # Targeton ID -> selected transcript ID
+        self._target_transcript_ids = transcript_ids or {}
 
-        if not exon_ranges:
-            raise RuntimeError(f"Exon index {exon_index} for transcript '{transcript_id}' not found!")
+    def _get_exon_row(self, transcript_id: str, exon_index: int) -> Tuple[str, str, int, int]:
+        k: Tuple[str, int] = (transcript_id, exon_index)
 
-        rows: np.ndarray = exon_ranges.as_df()[[
-            'Chromosome',
-            'Strand',
-            'Start',
-            'End'
-        ]].to_numpy()
+        if k not in self._exon_index:
+            raise RuntimeError(f"Exon index {exon_index} for transcript '{transcript_id}' not found!")
 
-        n = len(rows)
+        row: Optional[Tuple[str, str, int, int]] = self._exon_index[k]
 
-        if n > 1:
+        if row is None:
             raise RuntimeError(f"Exon index {exon_index} is not unique for transcript '{transcript_id}'!")
 
-        row = rows[0]
-        return GenomicRange(row[0], row[2] + 1, row[3], row[1])
+        return row
 
-    def get_cds_genomic_ranges(
+    def _get_adjacent_exon_bounds(
         self,
-        transcript_id: str,
-        strand: str,
-        exon_index: int,
-        genomic_range: GenomicRange,
-        delta_5p: int,
-        delta_3p: int,
-        cds_ext_5_length: int,
-        cds_ext_3_length: int
-    ) -> GenomicRangePair:
-
-        def get_ext_5() -> Optional[GenomicRange]:
-
-            def get_ext_5_from_previous_exon() -> GenomicRange:
-                return self.get_cds_by_index(
-                    transcript_id,
-                    exon_index - 1
-                ).get_from_3_prime(cds_ext_5_length)
-
-            if cds_ext_5_length == 0:
-                return None
-
-            if exon_index == 0:
-                raise ValueError("The first exon can't be out-of-frame!")
-
-            if delta_5p == 1 and cds_ext_5_length > 1:
-                raise ValueError("Unsupported partial exon: CDS extension would include both same and previous exon nucleotides!")
-
-            return (
-                get_ext_5_from_previous_exon() if delta_5p == 0 else
-                genomic_range.get_before_5_prime(cds_ext_5_length)
-            )
-
-        def get_ext_3() -> Optional[GenomicRange]:
-
-            def get_ext_3_from_next_exon() -> GenomicRange:
-                return self.get_cds_by_index(
-                    transcript_id,
-                    exon_index + 1
-                ).get_from_5_prime(cds_ext_3_length)
-
-            if cds_ext_3_length == 0:
-                return None
-
-            if delta_3p == 1 and cds_ext_3_length > 1:
-                raise ValueError("Unsupported partial exon: CDS extension would include both same and next exon nucleotides!")
-
-            return (
-                get_ext_3_from_next_exon() if delta_3p == 0 else
-                genomic_range.get_past_3_prime(cds_ext_3_length)
-            )
-
-        validate_strand(strand)
-
-        if cds_ext_5_length == 0 and cds_ext_3_length == 0:
-            return None, None
-
-        return (
-            (get_ext_5(), get_ext_3()) if strand == '+' else
-            (get_ext_3(), get_ext_5())
+        transcript_ids: np.ndarray,
+        exon_indices: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        bounds: np.ndarray = np.array([
+            self._get_exon_row(transcript_id, exon_index)[2:]
+            for transcript_id, exon_index in zip(transcript_ids.tolist(), exon_indices.tolist())
+        ], dtype=np.int64)
+        return bounds[:, 0], bounds[:, 1]
+
+    def _get_cds_extension_bounds(
+        self,
+        df: pd.DataFrame,
+        is_plus: np.ndarray,
+        delta_5p: np.ndarray,
+        delta_3p: np.ndarray,
+        ext_5_length: np.ndarray,
+        ext_3_length: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        start: np.ndarray = df.Start.to_numpy() + 1
+        end: np.ndarray = df.End.to_numpy()
+        transcript_ids: np.ndarray = df.transcript_id.to_numpy(dtype=object)
+        exon_indices: np.ndarray = df.exon_index.to_numpy()
+
+        # Validate CDS extensions
+        has_ext_5: np.ndarray = ext_5_length > 0
+        has_ext_3: np.ndarray = ext_3_length > 0
+        if (has_ext_5 & (exon_indices == 0)).any():
+            raise ValueError("The first exon can't be out-of-frame!")
+        if (has_ext_5 & (delta_5p == 1) & (ext_5_length > 1)).any():
+            raise ValueError("Unsupported partial exon: CDS extension would include both same and previous exon nucleotides!")
+        if (has_ext_3 & (delta_3p == 1) & (ext_3_length > 1)).any():
+            raise ValueError("Unsupported partial exon: CDS extension would include both same and next exon nucleotides!")
+
+        # 5' extensions from the same exon (one-based, end included)
+        ext_5_start: np.ndarray = np.where(is_plus, start - ext_5_length, end + 1)
+        ext_5_end: np.ndarray = np.where(is_plus, start - 1, end + ext_5_length)
+
+        # 3' extensions from the same exon
+        ext_3_start: np.ndarray = np.where(is_plus, end + 1, start - ext_3_length)
+        ext_3_end: np.ndarray = np.where(is_plus, end + ext_3_length, start - 1)
+
+        # 5' extensions from the 3' end of the previous exon
+        prev_mask: np.ndarray = has_ext_5 & (delta_5p == 0)
+        if prev_mask.any():
+            exon_start, exon_end = self._get_adjacent_exon_bounds(
+                transcript_ids[prev_mask], exon_indices[prev_mask] - 1)
+            length: np.ndarray = ext_5_length[prev_mask]
+            if (length > exon_end - exon_start + 1).any():
+                raise ValueError("Genomic range bounds out of parent range!")
+            ext_5_start[prev_mask] = np.where(is_plus[prev_mask], exon_end - length + 1, exon_start)
+            ext_5_end[prev_mask] = np.where(is_plus[prev_mask], exon_end, exon_start + length - 1)
+
+        # 3' extensions from the 5' end of the next exon
+        next_mask: np.ndarray = has_ext_3 & (delta_3p == 0)
+        if next_mask.any():
+            exon_start, exon_end = self._get_adjacent_exon_bounds(
+                transcript_ids[next_mask], exon_indices[next_mask] + 1)
+            length = ext_3_length[next_mask]
+            if (length > exon_end - exon_start + 1).any():
+                raise ValueError("Genomic range bounds out of parent range!")
+            ext_3_start[next_mask] = np.where(is_plus[next_mask], exon_start, exon_end - length + 1)
+            ext_3_end[next_mask] = np.where(is_plus[next_mask], exon_start + length - 1, exon_end)
+
+        # Mark missing extensions
+        ext_5_start[~has_ext_5] = 0
+        ext_3_start[~has_ext_3] = 0
+
+        return ext_5_start, ext_5_end, ext_3_start, ext_3_end
+
+    def _select_transcripts(self, exonic_ranges: pd.DataFrame, transcript_tag: Optional[str]) -> pd.DataFrame:
+        target_fields: List[str] = ['Chromosome', 'Start', 'End', 'Strand', 'transcript_selection']
+
+        # Assign the transcript selected for each targeton (if any)
+        exonic_ranges['transcript_selection'] = (
+            exonic_ranges.targeton_id.map(self._target_transcript_ids).fillna('').astype(str)
+            if self._target_transcript_ids and 'targeton_id' in exonic_ranges.columns else
+            ''
         )
+        return select_transcripts(
+            exonic_ranges,
+            target_fields,
+            get_tagged_transcript_ids(self.cds_ranges.as_df(), transcript_tag) if transcript_tag else set(),
+            'CDS')
 
-    def compute_cds_contexts(self) -> None:
-
-        def get_delta_start(df: pd.DataFrame, mask: pd.Series) -> pd.Series:
-            return df.loc[mask, 'Start'] - df.loc[mask, 'Start_b']
-
-        def get_delta_end(df: pd.DataFrame, mask: pd.Series) -> pd.Series:
-            return df.loc[mask, 'End_b'] - df.loc[mask, 'End']
-
+    def compute_cds_contexts(self, transcript_tag: Optional[str] = None) -> None:
         if self._target_ranges is None:
             return
 
         exonic_ranges: pd.DataFrame = self._target_ranges.join(
             self.cds_ranges, strandedness='same').drop(['Strand_b', 'is_const']).as_df()
 
+        # Warn about selected transcripts missing from the annotation
+        missing_transcript_ids: Set[str] = set(self._target_transcript_ids.values()) - set(
+            transcript_id for transcript_id, _ in self._exon_index)
+        if missing_transcript_ids:
+            logging.warning("Selected transcripts not found among the CDS features: %s." % (
+                ', '.join(sorted(missing_transcript_ids))))
+
+        # Select one transcript per target
+        exonic_ranges = self._select_transcripts(exonic_ranges, transcript_tag)
+
+        # Retain the last match per target
+        exonic_ranges = exonic_ranges.drop_duplicates([
+            'Chromosome',
+            'Start',
+            'End',
+            'Strand',
+            'transcript_selection'
+        ], keep='last', ignore_index=True)
+
         # Skip if no CDS targets are found
         if exonic_ranges.shape[0] == 0:
-            self._target_cds_contexts = {}
+            self._target_cds_columns = {}
+            self._target_indices = {}
             return
 
         # Compute target offsets within exons
-        plus_strand_mask: pd.Series = exonic_ranges.Strand == '+'
-        minus_strand_mask: pd.Series = ~plus_strand_mask
-        exonic_ranges.loc[plus_strand_mask, 'delta_5p'] = get_delta_start(exonic_ranges, plus_strand_mask)
-        exonic_ranges.loc[minus_strand_mask, 'delta_5p'] = get_delta_end(exonic_ranges, minus_strand_mask)
-        exonic_ranges.loc[plus_strand_mask, 'delta_3p'] = get_delta_end(exonic_ranges, plus_strand_mask)
-        exonic_ranges.loc[minus_strand_mask, 'delta_3p'] = get_delta_start(exonic_ranges, minus_strand_mask)
-        del plus_strand_mask, minus_strand_mask
-
-        exonic_ranges['exon_frame'] = exonic_ranges.frame
-        exonic_ranges['len'] = exonic_ranges.End - exonic_ranges.Start
-        exonic_ranges.frame = (exonic_ranges.exon_frame + exonic_ranges.delta_5p.mod(3).astype(np.int8)).mod(3)
+        is_plus: np.ndarray = (exonic_ranges.Strand == '+').to_numpy()
+        start_offsets: np.ndarray = (exonic_ranges.Start - exonic_ranges.Start_b).to_numpy()
+        end_offsets: np.ndarray = (exonic_ranges.End_b - exonic_ranges.End).to_numpy()
+        delta_5p: np.ndarray = np.where(is_plus, start_offsets, end_offsets)
+        delta_3p: np.ndarray = np.where(is_plus, end_offsets, start_offsets)
+        del start_offsets, end_offsets
 
         # Detect and validate partial exon targets
-        if exonic_ranges.delta_5p.lt(0).any() or exonic_ranges.delta_3p.lt(0).any():
+        if (delta_5p < 0).any() or (delta_3p < 0).any():
             raise NotImplementedError("Mixed exonic and intronic targets not supported!")
 
-        exonic_ranges['cds_ext_3_length'] = (3 - (exonic_ranges.len + exonic_ranges.frame) % 3) % 3
-
-        target_cds_extension_info: Dict[GenomicRange, Tuple[str, str, str, int, int, int, int, int]] = {
-            pyrange_to_genomic_range(k, record): (
-                record.gene_id,
-                record.transcript_id,
-                record.Strand,
-                record.exon_index,
-                record.delta_5p,
-                record.delta_3p,
-                record.frame,
-                record.cds_ext_3_length
-            )
-            for k, ranges in PyRanges(df=exonic_ranges)
-            for record in ranges.itertuples()
+        # Compute target frames and CDS extension lengths
+        exon_frames: np.ndarray = exonic_ranges.frame.to_numpy().astype(np.int64)
+        frames: np.ndarray = (exon_frames + delta_5p % 3) % 3
+        lengths: np.ndarray = (exonic_ranges.End - exonic_ranges.Start).to_numpy()
+        cds_ext_3_lengths: np.ndarray = (3 - (lengths + frames) % 3) % 3
+
+        ext_5_start, ext_5_end, ext_3_start, ext_3_end = self._get_cds_extension_bounds(
+            exonic_ranges, is_plus, delta_5p, delta_3p, frames, cds_ext_3_lengths)
+
+        # Store CDS extensions in genomic order (as plain arrays for scalar access)
+        self._target_cds_columns = {
+            'Chromosome': exonic_ranges.Chromosome.to_numpy(dtype=object),
+            'Strand': exonic_ranges.Strand.to_numpy(dtype=object),
+            'gene_id': exonic_ranges.gene_id.to_numpy(dtype=object),
+            'transcript_id': exonic_ranges.transcript_id.to_numpy(dtype=object),
+            'exon_index': exonic_ranges.exon_index.to_numpy(),
+            'cds_pre_start': np.where(is_plus, ext_5_start, ext_3_start),
+            'cds_pre_end': np.where(is_plus, ext_5_end, ext_3_end),
+            'cds_suf_start': np.where(is_plus, ext_3_start, ext_5_start),
+            'cds_suf_end': np.where(is_plus, ext_3_end, ext_5_end)
         }
-        del exonic_ranges
-
-        # TODO: optimise the retrieval of exons by transcript and index
-        self._target_cds_contexts = {
-            genomic_range: (
-                ExonInfo(TranscriptInfo(gene_id, transcript_id), genomic_range, exon_index),
-                self.get_cds_genomic_ranges(
-                    transcript_id, strand, exon_index, genomic_range, delta_5p, delta_3p, cds_ext_5_length, cds_ext_3_length))
-            for genomic_range, (
-                gene_id,
-                transcript_id,
-                strand,
-                exon_index,
-                delta_5p,
-                delta_3p,
-                cds_ext_5_length,
-                cds_ext_3_length
-            ) in target_cds_extension_info.items()
+
+        # Map target ranges to table rows
+        self._target_indices = {
+            k: i
+            for i, k in enumerate(zip(
+                exonic_ranges.Chromosome.tolist(),
+                (exonic_ranges.Start + 1).tolist(),
+                exonic_ranges.End.tolist(),
+                exonic_ranges.Strand.tolist(),
+                exonic_ranges.transcript_selection.tolist()
+            ))
         }
 
-    def get_cds_extensions(self, genomic_range: GenomicRange) -> Optional[GenomicRangePair]:
-        if not self._target_cds_contexts or genomic_range not in self._target_cds_contexts:
+    def _get_target_index(self, genomic_range: GenomicRange, transcript_id: Optional[str] = None) -> Optional[int]:
+        if not self._target_indices:
             return None
-        return self._target_cds_contexts[genomic_range][1]
+        return self._target_indices.get((
+            genomic_range.chromosome,
+            genomic_range.start,
+            genomic_range.end,
+            genomic_range.strand,
+            transcript_id or ''
+        ), None)
+
+    def _get_cds_extensions(self, i: int) -> GenomicRangePair:
+        columns: Dict[str, np.ndarray] = self._target_cds_columns
+        chromosome: str = columns['Chromosome'][i]
+        strand: str = columns['Strand'][i]
+
+        def get_range(start_col: str, end_col: str) -> Optional[GenomicRange]:
+            start: int = int(columns[start_col][i])
+            return GenomicRange(chromosome, start, int(columns[end_col][i]), strand) if start > 0 else None
+
+        return get_range('cds_pre_start', 'cds_pre_end'), get_range('cds_suf_start', 'cds_suf_end')
+
+    def get_cds_extensions(
+        self,
+        genomic_range: GenomicRange,
+        transcript_id: Optional[str] = None
+    ) -> Optional[GenomicRangePair]:
+        i: Optional[int] = self._get_target_index(genomic_range, transcript_id=transcript_id)
+        return self._get_cds_extensions(i) if i is not None else None
 
     def get_all_cds_extensions(self) -> Set[GenomicRange]:
-        return set(
-            genomic_range
-            for genomic_range in chain.from_iterable((
-                cds_ranges
-                for exon_info, cds_ranges in
-                self._target_cds_contexts.values()))
-            if genomic_range
-        ) if self._target_cds_contexts else set()
-
-    def get_exon_info(self, genomic_range: GenomicRange) -> Optional[ExonInfo]:
-        if not self._target_cds_contexts or genomic_range not in self._target_cds_contexts:
+        if not self._target_indices:
+            return set()
+
+        columns: Dict[str, np.ndarray] = self._target_cds_columns
+        cds_extensions: Set[GenomicRange] = set()
+        for start_col, end_col in [
+            ('cds_pre_start', 'cds_pre_end'),
+            ('cds_suf_start', 'cds_suf_end')
+        ]:
+            mask: np.ndarray = columns[start_col] > 0
+            cds_extensions.update(map(
+                GenomicRange,
+                columns['Chromosome'][mask].tolist(),
+                columns[start_col][mask].tolist(),
+                columns[end_col][mask].tolist(),
+                columns['Strand'][mask].tolist()))
+
+        return cds_extensions
+
+    def get_exon_info(self, genomic_range: GenomicRange, transcript_id: Optional[str] = None) -> Optional[ExonInfo]:
+        i: Optional[int] = self._get_target_index(genomic_range, transcript_id=transcript_id)
+        if i is None:
             return None
-        return self._target_cds_contexts[genomic_range][0]
 
-    def get_transcript_info(self, genomic_range: GenomicRange) -> Optional[TranscriptInfo]:
-        exon_info: Optional[ExonInfo] = self.get_exon_info(genomic_range)
+        columns: Dict[str, np.ndarray] = self._target_cds_columns
+        return ExonInfo(
+            TranscriptInfo(columns['gene_id'][i], columns['transcript_id'][i]),
+            genomic_range,
+            int(columns['exon_index'][i]))
+
+    def get_transcript_info(
+        self,
+        genomic_range: GenomicRange,
+        transcript_id: Optional[str] = None
+    ) -> Optional[TranscriptInfo]:
+        exon_info: Optional[ExonInfo] = self.get_exon_info(genomic_range, transcript_id=transcript_id)
         return exon_info.transcript_info if exon_info else None
 
 
@@ -274,7 +416,12 @@ class UTRRepository:
 
     utr_ranges: PyRanges
 
-    def get_transcript_infos(self, ref_ranges: PyRanges) -> Dict[GenomicRange, TranscriptInfo]:
+    def get_transcript_infos(
+        self,
+        ref_ranges: PyRanges,
+        transcript_ids: Optional[Dict[GenomicRange, str]] = None,
+        transcript_tag: Optional[str] = None
+    ) -> Dict[GenomicRange, TranscriptInfo]:
         if not ref_ranges:
             return {}
 
@@ -283,12 +430,27 @@ class UTRRepository:
         if not matches:
             return {}
 
+        target_fields: List[str] = ['Chromosome', 'Start', 'End', 'Strand']
+        df: pd.DataFrame = matches.as_df()
+
+        # Assign the transcript selected for each target (if any)
+        df['transcript_selection'] = [
+            transcript_ids.get(GenomicRange(chromosome, start + 1, end, strand), '')
+            for chromosome, start, end, strand in df[target_fields].itertuples(index=False, name=None)
+        ] if transcript_ids else ''
+
+        df = select_transcripts(
+            df,
+            target_fields,
+            get_tagged_transcript_ids(self.utr_ranges.as_df(), transcript_tag) if transcript_tag else set(),
+            'UTR')
+
+        # The last match of each target takes precedence
         return {
-            pyrange_to_genomic_range(k, record): TranscriptInfo(
-                record.gene_id,
-                record.transcript_id)
-            for k, ranges in matches
-            for record in ranges.itertuples()
+            GenomicRange(chromosome, int(start) + 1, int(end), strand): TranscriptInfo(gene_id, transcript_id)
+            for chromosome, start, end, strand, gene_id, transcript_id in df[
+                target_fields + ['gene_id', 'transcript_id']
+            ].itertuples(index=False, name=None)
         }
 
 
@@ -308,6 +470,11 @@ class AnnotationRepository:
         return cls(CDSContextRepository(cds_ranges), UTRRepository(utr_ranges))
 
     @classmethod
-    def from_gff(cls, fp: str) -> AnnotationRepository:
-        cds_ranges, utr_ranges = load_gff_cds(fp)
+    def from_gff(
+        cls,
+        fp: str,
+        cache_dir: Optional[str] = None,
+        regions: Optional[GffRegions] = None
+    ) -> AnnotationRepository:
+        cds_ranges, utr_ranges = load_gff_cds(fp, cache_dir=cache_dir, regions=regions)
         return cls.from_ranges(cds_ranges, utr_ranges)
@@ -32,14 +32,15 @@
 #############################
 
 from dataclasses import dataclass
-from typing import Callable, List, Optional, Tuple, Any
+from typing import List, Tuple, Any, Union
 import numpy as np
 import pandas as pd
 from .options import Options
 from .pam_protection import PamProtectedReferenceSequence
+from ..array_mutators import get_mutated_sequence_lengths, render_mutated_sequences
 from ..constants import REVCOMP_OLIGO_NAME_SUFFIX
 from ..enums import VariantType
-from ..utils import get_constant_category, reverse_complement
+from ..utils import get_constant_category
 
 
 var_type_sub: int = VariantType.SUBSTITUTION.value
@@ -47,6 +48,13 @@ var_type_del: int = VariantType.DELETION.value
 var_type_ins: int = VariantType.INSERTION.value
 
 
+def _get_allele_array(alleles) -> np.ndarray:
+    """Get alleles as an object array with missing alleles as empty strings"""
+
+    codes, uniques = pd.factorize(alleles)
+    return np.append(np.asarray(uniques, dtype=object), '')[codes]
+
+
 @dataclass(init=False)
 class BaseOligoRenderer:
     __slots__ = {
@@ -107,61 +115,76 @@ class BaseOligoRenderer:
             ('pam_seq', self.ref_seq.pam_protected_sequence)
         ]
 
-    def _render_mutated_sequence(self, mseq: str) -> str:
-        return f"{self.adaptor_5}{mseq}{self.adaptor_3}"
-
-    def _render_mutated_sequence_rc(self, mseq: str) -> str:
-        return f"{self.adaptor_5}{reverse_complement(mseq)}{self.adaptor_3}"
-
-    def _get_renderer(self, reverse_complement: bool) -> Callable[[str], str]:
-        if reverse_complement:
-            if self.strand != '-':
-                raise ValueError("Attempted reverse complement of plus strand sequence!")
-            return self._render_mutated_sequence_rc
-        else:
-            return self._render_mutated_sequence
-
-    def _get_oligo_name(self, var_type: int, source: str, start: int, ref: Optional[str], alt: Optional[str]) -> str:
-
-        # Insertion
-        if var_type == var_type_ins:
-            if not alt:
-                raise ValueError("Invalid insertion: missing alternative!")
-            return f"{self._oligo_name_prefix}{start}_{alt}_{source}"
-
-        else:
-            if not ref:
-                if var_type == var_type_sub:
-                    raise ValueError(f"Invalid substitution: missing reference!")
-                if var_type == var_type_del:
-                    raise ValueError(f"Invalid deletion: missing reference!")
-                else:
-                    raise ValueError("Invalid variant type!")
-
-            ref_len: int = len(ref)
-            end: int = (start + ref_len - 1) if ref_len > 1 else start
-
-            # Substitution
-            if var_type == var_type_sub:
-                if not alt:
-                    raise ValueError("Invalid substitution: missing alternative!")
-                return (
-                    f"{self._oligo_name_prefix}{start}_{ref}>{alt}_{source}" if end == start else
-                    f"{self._oligo_name_prefix}{start}_{end}_{ref}>{alt}_{source}"
-                )
-
-            # Deletion
-            if var_type == var_type_del:
-                return (
-                    f"{self._oligo_name_prefix}{start}_{source}" if end == start else
-                    f"{self._oligo_name_prefix}{start}_{end}_{source}"
-                )
-
+    def _is_reverse_complement(self, options: Options) -> bool:
+        return self.strand == '-' and options.revcomp_minus_strand
+
+    def _get_offsets(self, df: pd.DataFrame) -> np.ndarray:
+        return df.mut_position.to_numpy() - self.start
+
+    def get_oligo_lengths(self, df: pd.DataFrame) -> np.ndarray:
+        return len(self.adaptor_5) + len(self.adaptor_3) + get_mutated_sequence_lengths(
+            len(self.ref_seq.pam_protected_sequence), self._get_offsets(df), df.ref, df.new)
+
+    def render_mutated_sequences(self, df: pd.DataFrame, options: Options) -> pd.Series:
+        """Render the full oligonucleotide sequences from the variant descriptors"""
+
+        return pd.Series(render_mutated_sequences(
+            self.ref_seq.pam_protected_sequence,
+            self._get_offsets(df),
+            df.ref,
+            df.new,
+            prefix=self.adaptor_5,
+            suffix=self.adaptor_3,
+            rc=self._is_reverse_complement(options)
+        ), index=df.index, dtype='string')
+
+    def get_oligo_names(self, df: pd.DataFrame, source: Union[str, np.ndarray], start_offset: int = 0) -> pd.Series:
+        """Generate the oligonucleotide names from the variant metadata table"""
+
+        if df.shape[0] == 0:
+            return pd.Series([], index=df.index, dtype='string')
+
+        var_types: np.ndarray = df.var_type.to_numpy()
+        refs: np.ndarray = _get_allele_array(df.ref)
+        alts: np.ndarray = _get_allele_array(df.new)
+        has_ref: np.ndarray = refs.astype(bool)
+        has_alt: np.ndarray = alts.astype(bool)
+        ins_mask: np.ndarray = var_types == var_type_ins
+        sub_mask: np.ndarray = var_types == var_type_sub
+        del_mask: np.ndarray = var_types == var_type_del
+
+        # Validate variants
+        if (ins_mask & ~has_alt).any():
+            raise ValueError("Invalid insertion: missing alternative!")
+        if (sub_mask & ~has_ref).any():
+            raise ValueError("Invalid substitution: missing reference!")
+        if (del_mask & ~has_ref).any():
+            raise ValueError("Invalid deletion: missing reference!")
+        if not (ins_mask | sub_mask | del_mask).all():
             raise ValueError("Invalid variant type!")
+        if (sub_mask & ~has_alt).any():
+            raise ValueError("Invalid substitution: missing alternative!")
+
+        # Format the affected genomic positions
+        starts: np.ndarray = df.mut_position.to_numpy().astype(np.int64) + start_offset
+        ends: np.ndarray = starts + np.fromiter(map(len, refs), dtype=np.int64, count=refs.shape[0]) - 1
+        positions: np.ndarray = starts.astype(str).astype(object)
+        multi_mask: np.ndarray = ends > starts
+        positions[multi_mask] += '_' + ends[multi_mask].astype(str).astype(object)
+
+        # Format the alleles
+        alleles: np.ndarray = np.full(df.shape[0], '', dtype=object)
+        alleles[ins_mask] = '_' + alts[ins_mask]
+        alleles[sub_mask] = '_' + refs[sub_mask] + '>' + alts[sub_mask]
+
+        return pd.Series(
+            self._oligo_name_prefix + positions + alleles + '_' + source,
+            index=df.index,
+            dtype='string')
 
     # TODO: add mutation type (missense &c.)
     def get_metadata_table(self, df: pd.DataFrame, options: Options) -> pd.DataFrame:
-        if set(df.columns.array) < {'oligo_name', 'mut_position', 'ref', 'new', 'mutator', 'mseq'}:
+        if set(df.columns.array) < {'oligo_name', 'mut_position', 'ref', 'new', 'mutator'}:
             raise ValueError("Invalid mutation metadata data frame!")
 
         rown: int = df.shape[0]
@@ -177,12 +200,9 @@ class BaseOligoRenderer:
             df[col_name] = get_constant_category(col_value, rown)
 
         # Add reverse complement information to the metadata
-        rc: bool = self.ref_seq.genomic_range.strand == '-' and options.revcomp_minus_strand
+        rc: bool = self._is_reverse_complement(options)
         df['revc'] = np.repeat(rc, rown).astype(np.int8)
         if rc:
             df.oligo_name = df.oligo_name + REVCOMP_OLIGO_NAME_SUFFIX
 
-        # Render full oligonucleotide sequences
-        df.mseq = df.mseq.apply(self._get_renderer(rc)).astype('string')
-
         return df
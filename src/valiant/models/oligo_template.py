@@ -34,19 +34,17 @@
 from __future__ import annotations
 import abc
 from dataclasses import dataclass
-from functools import partial
-from typing import Callable, Dict, List, Optional, Set, Tuple
+from typing import Dict, List, Optional, Set, Tuple
 import numpy as np
 import pandas as pd
 from .base import GenomicRange, TranscriptInfo
-from .custom_variants import CustomVariantMutation, CustomVariantMutationCollection, CustomVariantOligoRenderer
-from .mutated_sequences import MutatedSequence, MutationCollection
+from .custom_variants import CustomVariantMutationCollection, CustomVariantOligoRenderer
+from .mutated_sequences import MutationCollection
 from .oligo_renderer import BaseOligoRenderer
 from .options import Options
 from .pam_protection import PamProtectedReferenceSequence
 from .snv_table import AuxiliaryTables
 from .targeton import BaseTargeton, CDSTargeton, Targeton
-from .variant import CustomVariant
 from ..constants import CUSTOM_MUTATOR
 from ..enums import MutationType, TargetonMutator
 from ..utils import get_constant_category
@@ -146,43 +144,9 @@ class RegionOligoRenderer(BaseOligoRenderer):
         'transcript_id',
         'adaptor_5',
         'adaptor_3',
-        'prefix',
-        'suffix',
         '_oligo_name_prefix'
     }
 
-    prefix: str
-    suffix: str
-
-    def __init__(
-        self,
-        ref_seq: PamProtectedReferenceSequence,
-        gene_id: str,
-        transcript_id: str,
-        adaptor_5: str,
-        adaptor_3: str,
-        prefix: str,
-        suffix: str
-    ) -> None:
-        super().__init__(ref_seq, gene_id, transcript_id, adaptor_5, adaptor_3)
-        self.prefix = prefix
-        self.suffix = suffix
-
-    def get_oligo_name(self, mutator: TargetonMutator, start_offset: int, ms: MutatedSequence) -> str:
-        return super()._get_oligo_name(
-            ms.type.value, mutator.value, start_offset + ms.position, ms.ref, ms.new)
-
-    def _render_mutated_ref_sequence(self, mseq: str) -> str:
-        return f"{self.prefix}{mseq}{self.suffix}"
-
-    def _render_mutated_sequence(self, mseq: str) -> str:
-        return super()._render_mutated_sequence(
-            self._render_mutated_ref_sequence(mseq))
-
-    def _render_mutated_sequence_rc(self, mseq: str) -> str:
-        return super()._render_mutated_sequence_rc(
-            self._render_mutated_ref_sequence(mseq))
-
 
 @dataclass
 class OligoMutationCollection:
@@ -203,15 +167,9 @@ class OligoMutationCollection:
             raise RuntimeError(
                 f"Empty mutation collection for mutator '{self.mutator}'!")
 
-        get_oligo_name: Callable[[MutatedSequence], str] = partial(
-            self.renderer.get_oligo_name,
-            self.mutator,
-            self.target_region.genomic_range.start)
-
         df: pd.DataFrame = self.mutation_collection.df
-        df['oligo_name'] = pd.Series(
-            map(get_oligo_name, self.mutation_collection.mutations),
-            dtype='string')
+        df['oligo_name'] = self.renderer.get_oligo_names(
+            df, self.mutator.value, start_offset=self.target_region.genomic_range.start)
         df['mutator'] = get_constant_category(self.mutator.value, df.shape[0])
         df.mut_position += self.target_region.genomic_range.start
 
@@ -233,7 +191,7 @@ class OligoTemplate:
     transcript_info: Optional[TranscriptInfo]
     ref_seq: PamProtectedReferenceSequence
     sgrna_ids: Set[str]
-    custom_variants: Set[CustomVariant]
+    custom_variants: Optional[pd.DataFrame]
     adaptor_5: Optional[str]
     adaptor_3: Optional[str]
     segments: List[OligoSegment]
@@ -263,12 +221,6 @@ class OligoTemplate:
             'plus' if self.ref_range.strand == '+' else 'minus'
         ])
 
-    @property
-    def segment_strings(self) -> List[str]:
-        """Render PAM protected sequences to populate the oligonucleotide prefix and suffix"""
-
-        return [s.pam_protected_sequence for s in self.segments]
-
     @property
     def target_segments(self) -> List[Tuple[int, TargetonOligoSegment]]:
         return [
@@ -282,32 +234,39 @@ class OligoTemplate:
         return self.segments
 
     def _compute_custom_variants(self) -> CustomVariantMutationCollection:
-        return CustomVariantMutationCollection.from_variants([
-            CustomVariantMutation(
-                variant, self.ref_seq.apply_variant(
-                    variant.base_variant, ref_check=False))
-            for variant in self.custom_variants
-        ])
+        if (self.custom_variants.Chromosome != self.ref_range.chromosome).any():
+            raise ValueError("Variant not in genomic range!")
+
+        mc: CustomVariantMutationCollection = CustomVariantMutationCollection.from_variant_table(
+            self.custom_variants)
+
+        # Validate variant positions
+        positions: np.ndarray = mc.df.mut_position.to_numpy()
+        if ((positions < self.ref_range.start) | (positions > self.ref_range.end)).any():
+            raise ValueError("Variant not in genomic range!")
+
+        return mc
+
+    def get_renderer(self) -> BaseOligoRenderer:
+        return BaseOligoRenderer(
+            self.ref_seq,
+            self.gene_id or '',
+            self.transcript_id or '',
+            self.adaptor_5 or '',
+            self.adaptor_3 or '')
 
     def _get_mutation_collection(
         self,
-        i: int,
         target_segment: TargetonOligoSegment,
         mutator: TargetonMutator,
         mutation_collection: MutationCollection
     ) -> OligoMutationCollection:
-        segment_strings: List[str] = self.segment_strings
-        prefix: str = ''.join(segment_strings[:i])
-        suffix: str = ''.join(segment_strings[i + 1:])
-
         renderer: RegionOligoRenderer = RegionOligoRenderer(
             self.ref_seq,
             self.gene_id or '',
             self.transcript_id or '',
             self.adaptor_5 or '',
-            self.adaptor_3 or '',
-            prefix,
-            suffix)
+            self.adaptor_3 or '')
 
         return OligoMutationCollection(
             renderer,
@@ -329,13 +288,7 @@ class OligoTemplate:
             return pd.DataFrame()
 
         df: pd.DataFrame = mc.df
-        df['oligo_name'] = pd.Series(
-            df.apply(lambda r: renderer.get_oligo_name(
-                r.vcf_alias,
-                r.var_type,
-                r.mut_position,
-                r.ref if not pd.isnull(r.ref) else None,
-                r.new if not pd.isnull(r.new) else None), axis=1), dtype='string')
+        df['oligo_name'] = renderer.get_custom_oligo_names(df)
         df['mutator'] = get_constant_category(CUSTOM_MUTATOR, df.shape[0])
         return renderer.get_metadata_table(df, options)
 
@@ -348,7 +301,6 @@ class OligoTemplate:
                 'ref',
                 'new',
                 'mutator',
-                'mseq',
                 'oligo_length'
             ])
 
@@ -356,16 +308,16 @@ class OligoTemplate:
         region_mutations: pd.DataFrame = pd.concat([
             pd.concat([
                 self._get_mutation_collection(
-                    i, segment, mutator, mutation_collection).get_metadata_table(options)
+                    segment, mutator, mutation_collection).get_metadata_table(options)
                 for mutator, mutation_collection in segment.compute_mutations(aux).items()
             ])
-            for i, segment in self.target_segments
+            for _, segment in self.target_segments
         ], ignore_index=True)
 
         # Compute global mutations (custom variants)
-        if self.custom_variants:
+        if self.custom_variants is not None and self.custom_variants.shape[0] > 0:
             global_mutations: pd.DataFrame = self._get_custom_variant_collection(options)
-            if global_mutations.shape[0] != len(self.custom_variants):
+            if global_mutations.shape[0] != self.custom_variants.shape[0]:
                 raise RuntimeError("Unexpected number of custom variants!")
             all_mutations = pd.concat([region_mutations, global_mutations])
         else:
@@ -377,7 +329,7 @@ class OligoTemplate:
             all_mutations.mut_type = all_mutations.mut_type.apply(
                 lambda x: MUTATION_TYPE_LABELS[x] if not pd.isnull(x) else x)
 
-        # Compute oligonucleotide lengths
-        all_mutations['oligo_length'] = all_mutations.mseq.str.len().astype(np.int32)
+        # Compute oligonucleotide lengths (the sequences are rendered on output)
+        all_mutations['oligo_length'] = self.get_renderer().get_oligo_lengths(all_mutations).astype(np.int32)
 
         return all_mutations
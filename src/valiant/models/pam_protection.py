@@ -33,39 +33,66 @@
 
 from __future__ import annotations
 from dataclasses import dataclass
-from itertools import chain
 import logging
-from typing import Dict, Optional, Set
+from typing import Dict, List, Optional, Set
+import numpy as np
 import pandas as pd
 from pyranges import PyRanges
 from pysam import VariantRecord
-from .base import GenomicRange
-from .sequences import ReferenceSequence
+from .base import GenomicPosition, GenomicRange
+from .sequences import PackedSequence, ReferenceSequence, SequenceData
 from .variant import BaseVariant, get_variant, SubstitutionVariant
-from ..loaders.vcf import get_vcf
-from ..utils import get_id_column
+from ..loaders.vcf import fetch_vcf_records, get_vcf, VcfRegions
+from ..utils import encode_dna, get_id_column, NT_UNKNOWN
 
 
-@dataclass
 class PamProtectedReferenceSequence(ReferenceSequence):
-    __slots__ = {'sequence', 'genomic_range', 'pam_protected_sequence'}
+    __slots__ = {'_pam_sequence', '_pam_packed'}
 
-    pam_protected_sequence: str
-
-    def __post_init__(self) -> None:
-        super().__post_init__()
-        if len(self.pam_protected_sequence) != len(self.genomic_range):
+    def __init__(
+        self,
+        sequence: SequenceData,
+        genomic_range: GenomicRange,
+        pam_protected_sequence: SequenceData
+    ) -> None:
+        super().__init__(sequence, genomic_range)
+        self._pam_sequence: Optional[str] = None
+        self._pam_packed: Optional[PackedSequence] = None
+        if isinstance(pam_protected_sequence, PackedSequence):
+            self._pam_packed = pam_protected_sequence
+        else:
+            self._pam_sequence = pam_protected_sequence
+        if len(pam_protected_sequence) != len(self.genomic_range):
             raise ValueError("PAM protected sequence and genomic range have different lengths!")
 
+    @property
+    def pam_protected_sequence(self) -> str:
+        if self._pam_sequence is None:
+            self._pam_sequence = str(self._pam_packed)
+        return self._pam_sequence
+
+    @property
+    def pam_protected_packed(self) -> PackedSequence:
+        if self._pam_packed is None:
+            self._pam_packed = PackedSequence(encode_dna(self._pam_sequence))
+        return self._pam_packed
+
+    def __eq__(self, other) -> bool:
+        return super().__eq__(other) and self.pam_protected_sequence == other.pam_protected_sequence
+
+    def __repr__(self) -> str:
+        return (
+            f"{type(self).__name__}(sequence='{self.sequence}', genomic_range={self.genomic_range!r}, "
+            f"pam_protected_sequence='{self.pam_protected_sequence}')")
+
     @classmethod
-    def from_reference_sequence(cls, ref_seq: ReferenceSequence, pam_seq: str) -> PamProtectedReferenceSequence:
-        return cls(ref_seq.sequence, ref_seq.genomic_range, pam_seq)
+    def from_reference_sequence(cls, ref_seq: ReferenceSequence, pam_seq: SequenceData) -> PamProtectedReferenceSequence:
+        return cls(ref_seq.packed, ref_seq.genomic_range, pam_seq)
 
     def get_subsequence(self, genomic_range: GenomicRange) -> PamProtectedReferenceSequence:
         start, end = self.genomic_range.get_relative_subrange(genomic_range)
-        ref_seq: ReferenceSequence = super().get_subsequence(genomic_range)
-        pam_seq: str = self.pam_protected_sequence[start:end]
-        return PamProtectedReferenceSequence.from_reference_sequence(ref_seq, pam_seq)
+        return PamProtectedReferenceSequence(
+            self.packed[start:end], genomic_range, self.pam_protected_packed[start:end])
 
     def apply_variant(self, variant: BaseVariant, ref_check: bool = False) -> str:
         if not self.genomic_range.contains_position(variant.genomic_position):
@@ -97,80 +124,169 @@ class PamVariant(SubstitutionVariant):
         return cls.from_substitution(var)
 
 
+def _validate_pam_alleles(refs: List[str], alts: List[str]) -> None:
+    ref_lengths: np.ndarray = np.fromiter(map(len, refs), dtype=np.int64, count=len(refs))
+    alt_lengths: np.ndarray = np.fromiter(map(len, alts), dtype=np.int64, count=len(alts))
+    if (ref_lengths != alt_lengths).any():
+        raise ValueError("PAM protection variants must be substitutions!")
+    if (ref_lengths != 1).any():
+        raise ValueError(
+            "Only single-nucleotide substitutions are allowed "
+            "for the purposes of PAM protection!")
+
+    # Validate all nucleotides at once
+    for label, alleles in [('reference', refs), ('alternative', alts)]:
+        invalid: np.ndarray = np.flatnonzero(encode_dna(''.join(alleles)) == NT_UNKNOWN)
+        if invalid.shape[0] > 0:
+            raise ValueError(f"Invalid {label} sequence '{alleles[invalid[0]]}'!")
+
+
 class PamProtectionVariantRepository:
-    __slots__ = {'sgrna_ids', '_variants', '_ranges'}
+    __slots__ = {'sgrna_ids', '_sgrna_variants', '_variants', '_table', '_ranges'}
 
     def __init__(self, sgrna_ids: Set[str] = None) -> None:
         self.sgrna_ids = sgrna_ids or set()
-        self._variants: Dict[str, Set[PamVariant]] = {
-            sgrna_id: set()
+        self._sgrna_variants: Dict[str, np.ndarray] = {
+            sgrna_id: np.empty(0, dtype=np.int64)
             for sgrna_id in sgrna_ids
         } if sgrna_ids else {}
+        self._variants: Dict[int, PamVariant] = {}
+        self._table: Optional[pd.DataFrame] = None
         self._ranges: Optional[PyRanges] = None
 
     @property
     def count(self) -> int:
-        return sum(map(len, self._variants.values()))
+        return sum(map(len, self._sgrna_variants.values()))
 
-    def get_sgrna_variants(self, sgrna_id: str) -> Set[PamVariant]:
-        return self._variants[sgrna_id]
-
-    def get_sgrna_variants_bulk(self, sgrna_ids: Set[str]) -> Set[PamVariant]:
+    def get_sgrna_variant_ids(self, sgrna_ids: Set[str]) -> np.ndarray:
         try:
-            return set(chain.from_iterable(
-                self.get_sgrna_variants(sgrna_id)
+            return np.unique(np.concatenate([
+                self._sgrna_variants[sgrna_id]
                 for sgrna_id in sgrna_ids
-            ))
+            ])) if sgrna_ids else np.empty(0, dtype=np.int64)
 
         except KeyError as ex:
             sgrna_id: str = ex.args[0]
             raise RuntimeError(f"sgRNA ID '{sgrna_id} not found!'")
 
-    def load(self, fp: str) -> None:
+    def get_sgrna_variants(self, sgrna_id: str) -> Set[PamVariant]:
+        return self.get_sgrna_variants_bulk({sgrna_id})
+
+    def get_sgrna_variants_bulk(self, sgrna_ids: Set[str]) -> Set[PamVariant]:
+        variant_ids: List[int] = self.get_sgrna_variant_ids(sgrna_ids).tolist()
+
+        # Build the variant objects not accessed yet in one pass over the table
+        new_ids: List[int] = [var_id for var_id in variant_ids if var_id not in self._variants]
+        if new_ids:
+            for var_id, (chromosome, start, ref, alt) in zip(new_ids, self._table.iloc[new_ids][[
+                'Chromosome',
+                'Start',
+                'ref',
+                'alt'
+            ]].itertuples(index=False, name=None)):
+                self._variants[var_id] = PamVariant(GenomicPosition(chromosome, int(start) + 1), ref, alt)
 
-        # Load variants from VCF
+        return set(self._variants[var_id] for var_id in variant_ids)
+
+    def load(self, fp: str, regions: Optional[VcfRegions] = None) -> None:
+        chromosomes: List[str] = []
+        positions: List[int] = []
+        refs: List[str] = []
+        alts: List[str] = []
+        sgrna_ids: List[str] = []
+
+        # Load variants from VCF (restricted to the given regions if indexed)
         with get_vcf(fp) as variant_file:
-            for record in variant_file.fetch():
+            for record in fetch_vcf_records(variant_file, regions=regions):
                 sgrna_id: str = record.info['SGRNA'].strip()
-                if sgrna_id in self._variants:
-                    self._variants[sgrna_id].add(
-                        PamVariant.from_variant_record(record))
+                if sgrna_id in self._sgrna_variants:
+                    chromosomes.append(record.contig)
+                    positions.append(record.pos)
+                    refs.append(record.ref)
+                    alts.append(record.alts[0] if record.alts else '')
+                    sgrna_ids.append(sgrna_id)
+
+        # Validate alleles
+        _validate_pam_alleles(refs, alts)
+
+        # Populate variant table (with duplicates per sgRNA removed)
+        pos: np.ndarray = np.array(positions, dtype=np.int32) - 1
+        df: pd.DataFrame = pd.DataFrame({
+            'Chromosome': pd.Categorical(chromosomes),
+            'Start': pos,
+            'End': pos,
+            'ref': pd.Categorical(refs),
+            'alt': pd.Categorical(alts),
+            'sgrna_id': pd.Categorical(sgrna_ids)
+        }).drop_duplicates(ignore_index=True)
+        df['variant_id'] = get_id_column(df.shape[0])
+        self._table = df
+        self._variants = {}
+
+        # Index variants by sgRNA
+        for sgrna_id, variant_ids in df.groupby('sgrna_id', observed=True).indices.items():
+            self._sgrna_variants[sgrna_id] = variant_ids
 
         # Log loaded variant statistics
         logging.debug("Collected %d PAM protection variants." % self.count)
         for sgrna_id in self.sgrna_ids:
-            if not self._variants[sgrna_id]:
+            if len(self._sgrna_variants[sgrna_id]) == 0:
                 logging.info("No PAM protection variants for sgRNA %s." % sgrna_id)
 
         # Populate genomic range table
-        df: pd.DataFrame = pd.DataFrame.from_records([
-            (*variant.get_pyrange_record(), sgrna_id)
-            for sgrna_id, variants in self._variants.items()
-            for variant in variants
-        ], columns=[
+        self._ranges = PyRanges(df[[
             'Chromosome',
             'Start',
             'End',
-            'sgrna_id'
-        ])
-        df.sgrna_id = df.sgrna_id.astype('category')
-        df['variant_id'] = get_id_column(df.shape[0])
-        self._ranges = PyRanges(df)
+            'sgrna_id',
+            'variant_id'
+        ]])
 
 
 def compute_pam_protected_sequence(
     ref_seq: ReferenceSequence,
     pam_variants: Set[PamVariant]
 ) -> PamProtectedReferenceSequence:
-    pam_seq: str = ref_seq.sequence
+    if len(pam_variants) == 0:
+        return PamProtectedReferenceSequence.from_reference_sequence(ref_seq, ref_seq.sequence)
+
+    variants: List[PamVariant] = sorted(pam_variants, key=lambda variant: variant.genomic_position.position)
+
+    # Validate variant genomic positions relative to the sequence's
+    out_of_range: List[PamVariant] = [
+        variant
+        for variant in variants
+        if not ref_seq.genomic_range.contains_position(variant.genomic_position)
+    ]
+    if out_of_range:
+        raise ValueError("PAM protection variants not in genomic range %s: %s!" % (
+            ref_seq.genomic_range.region,
+            ', '.join(str(variant.genomic_position) for variant in out_of_range)))
+
+    # Encode all single-nucleotide variants
+    codes: np.ndarray = ref_seq.packed.codes
+    offsets: np.ndarray = np.array([
+        variant.genomic_position.position for variant in variants
+    ], dtype=np.int64) - ref_seq.genomic_range.start
+    refs: np.ndarray = encode_dna(''.join(variant.ref for variant in variants))
+    alts: np.ndarray = encode_dna(''.join(variant.alt for variant in variants))
 
-    if len(pam_variants) > 0:
-        for variant in pam_variants:
+    # Validate there is at most one variant per position
+    unique_offsets, counts = np.unique(offsets, return_counts=True)
+    if (counts > 1).any():
+        raise RuntimeError("Multiple PAM protection variants at %s!" % ', '.join(
+            str(GenomicPosition(ref_seq.genomic_range.chromosome, offset + ref_seq.genomic_range.start))
+            for offset in unique_offsets[counts > 1].tolist()))
 
-            # Validate variant genomic position relative to the sequence's
-            offset: int = variant.get_ref_offset(ref_seq)
+    # Validate all reference nucleotides at once
+    mismatches: np.ndarray = np.flatnonzero(codes[offsets] != refs)
+    if mismatches.shape[0] > 0:
+        raise RuntimeError("Invalid PAM protection variants: %s!" % ', '.join(
+            f"expected {variants[i].ref}, found {ref_seq.sequence[offsets[i]]} at {variants[i].genomic_position}"
+            for i in mismatches))
 
-            # Update PAM-protected sequence
-            pam_seq = variant.mutate(pam_seq, offset, ref_check=True)
+    # Apply all substitutions to a copy of the reference sequence
+    pam_codes: np.ndarray = codes.copy()
+    pam_codes[offsets] = alts
 
-    return PamProtectedReferenceSequence.from_reference_sequence(ref_seq, pam_seq)
+    return PamProtectedReferenceSequence.from_reference_sequence(ref_seq, PackedSequence(pam_codes))
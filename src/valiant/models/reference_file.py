@@ -0,0 +1,280 @@
+########## LICENCE ##########
+# VaLiAnT, (c) 2020, GRL (the "Software")
+# 
+# The Software remains the property of Genome Research Ltd ("GRL").
+# 
+# The Software is distributed "AS IS" under this Licence solely for non-commercial use in the hope that it will be useful,
+# but in order that GRL as a charitable foundation protects its assets for the benefit of its educational and research
+# purposes, GRL makes clear that no condition is made or to be implied, nor is any warranty given or to be implied, as to
+# the accuracy of the Software, or that it will be suitable for any particular purpose or for use under any specific
+# conditions. Furthermore, GRL disclaims all responsibility for the use which is made of the Software. It further
+# disclaims any liability for the outcomes arising from using  the Software.
+# 
+# The Licensee agrees to indemnify GRL and hold GRL harmless from and against any and all claims, damages and liabilities
+# asserted by third parties (including claims for negligence) which arise directly or indirectly from the use of the
+# Software or the sale of any products based on the Software.
+# 
+# No part of the Software may be reproduced, modified, transmitted or transferred in any form or by any means, electronic
+# or mechanical, without the express permission of GRL. The permission of GRL is not required if the said reproduction,
+# modification, transmission or transference is done without financial return, the conditions of this Licence are imposed
+# upon the receiver of the product, and all original and amended source code is included in any transmitted product. You
+# may be held legally responsible for any copyright infringement that is caused or encouraged by your failure to abide by
+# these terms and conditions.
+# 
+# You are not permitted under this Licence to use this Software commercially. Use for which any financial return is
+# received shall be defined as commercial use, and includes (1) integration of all or part of the source code or the
+# Software into a product for sale or license by or on behalf of Licensee to third parties or (2) use of the Software
+# or any derivative of it for research with the final aim of developing software products for sale or license to a third
+# party or (3) use of the Software or any derivative of it for research with the final aim of developing non-software
+# products for sale or license to a third party, or (4) use of the Software to provide any service to an external
+# organisation for which payment is received. If you are interested in using the Software commercially, please contact
+# legal@sanger.ac.uk. Contact details are: legal@sanger.ac.uk quoting reference Valiant-software.
+#############################
+
+from __future__ import annotations
+import abc
+from dataclasses import dataclass
+import logging
+import os
+import struct
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from pysam import FastaFile
+from ..constants import DNA_ALPHABET_SET
+from ..utils import is_dna
+
+TWOBIT_SIGNATURE = 0x1A412743
+TWOBIT_EXTENSION = '.2bit'
+
+# 2bit nucleotide encoding, most significant bits first
+TWOBIT_NUCLEOTIDES = b'TCAG'
+TWOBIT_UNPACK_TABLE = np.array([
+    [TWOBIT_NUCLEOTIDES[(byte >> shift) & 3] for shift in (6, 4, 2, 0)]
+    for byte in range(256)
+], dtype=np.uint8)
+
+N_CODE = ord('N')
+LOWER_CASE_BIT = 0x20
+
+
+def _normalise_ref_seq(sequence: str) -> str:
+
+    # Remove soft-masking
+    norm_sequence = sequence.upper()
+
+    # Validate sequence
+    if not is_dna(norm_sequence):
+        invalid_symbols = ', '.join(set(norm_sequence) - DNA_ALPHABET_SET)
+        raise ValueError(f"The reference sequence contains invalid symbols: {invalid_symbols}!")
+
+    return norm_sequence
+
+
+class ReferenceFile(abc.ABC):
+
+    @property
+    @abc.abstractmethod
+    def references(self) -> List[str]:
+        pass
+
+    @abc.abstractmethod
+    def fetch(self, chromosome: str, start: int, end: int) -> str:
+        """Fetch the sequence of a region (one-based, end included), as stored"""
+
+        pass
+
+    def fetch_normalised(self, chromosome: str, start: int, end: int) -> str:
+        """Fetch the upper-case sequence of a region, rejecting non-DNA symbols"""
+
+        return _normalise_ref_seq(self.fetch(chromosome, start, end))
+
+    @abc.abstractmethod
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> ReferenceFile:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+class FastaReferenceFile(ReferenceFile):
+    __slots__ = {'fasta'}
+
+    def __init__(self, fasta: FastaFile) -> None:
+        self.fasta: FastaFile = fasta
+
+    @classmethod
+    def load(cls, fp: str) -> FastaReferenceFile:
+        return cls(FastaFile(fp))
+
+    @property
+    def references(self) -> List[str]:
+        return list(self.fasta.references)
+
+    def fetch(self, chromosome: str, start: int, end: int) -> str:
+        return self.fasta.fetch(reference=chromosome, start=start - 1, end=end)
+
+    def close(self) -> None:
+        self.fasta.close()
+
+
+@dataclass(frozen=True)
+class TwoBitRecord:
+    __slots__ = {'size', 'dna_offset', 'n_starts', 'n_ends', 'mask_starts', 'mask_ends'}
+
+    size: int
+    dna_offset: int
+    n_starts: np.ndarray
+    n_ends: np.ndarray
+    mask_starts: np.ndarray
+    mask_ends: np.ndarray
+
+
+def _get_block_mask(block_starts: np.ndarray, block_ends: np.ndarray, start: int, end: int) -> Optional[np.ndarray]:
+    """Flag the positions of a zero-based half-open region covered by any block"""
+
+    # Select blocks overlapping the region (blocks are sorted and disjoint)
+    i: int = int(np.searchsorted(block_ends, start, side='right'))
+    j: int = int(np.searchsorted(block_starts, end, side='left'))
+    if i >= j:
+        return None
+
+    # Mark block boundaries relative to the region and propagate
+    delta: np.ndarray = np.zeros(end - start + 1, dtype=np.int32)
+    np.add.at(delta, np.clip(block_starts[i:j] - start, 0, end - start), 1)
+    np.add.at(delta, np.clip(block_ends[i:j] - start, 0, end - start), -1)
+    return np.cumsum(delta[:-1]) > 0
+
+
+class TwoBitReferenceFile(ReferenceFile):
+    """
+    Memory-mapped UCSC 2bit reference genome
+
+    The file is mapped read-only, so that concurrent processes share the
+    page cache; only the packed bytes of the requested regions are decoded.
+    """
+
+    __slots__ = {'_data', '_byte_order', '_offsets', '_records'}
+
+    def __init__(self, fp: str) -> None:
+        self._data: np.memmap = np.memmap(fp, dtype=np.uint8, mode='r')
+        self._records: Dict[str, TwoBitRecord] = {}
+        self._byte_order: str
+        self._offsets: Dict[str, int] = self._read_index()
+
+    def _unpack(self, fmt: str, offset: int) -> Tuple:
+        return struct.unpack_from(f"{self._byte_order}{fmt}", self._data, offset)
+
+    def _read_index(self) -> Dict[str, int]:
+        for byte_order in ('<', '>'):
+            self._byte_order = byte_order
+            if self._unpack('I', 0)[0] == TWOBIT_SIGNATURE:
+                break
+        else:
+            raise ValueError("Invalid 2bit file signature!")
+
+        version, sequence_count = self._unpack('II', 4)
+        if version not in (0, 1):
+            raise ValueError(f"Unsupported 2bit file version: {version}!")
+        offset_fmt: str = 'Q' if version == 1 else 'I'
+        offset_size: int = struct.calcsize(offset_fmt)
+
+        offsets: Dict[str, int] = {}
+        p: int = 16
+        for _ in range(sequence_count):
+            name_size: int = int(self._data[p])
+            name: str = self._data[p + 1:p + 1 + name_size].tobytes().decode('ascii')
+            p += 1 + name_size
+            offsets[name] = self._unpack(offset_fmt, p)[0]
+            p += offset_size
+
+        return offsets
+
+    def _read_blocks(self, p: int) -> Tuple[np.ndarray, np.ndarray, int]:
+        block_count: int = self._unpack('I', p)[0]
+        dtype: np.dtype = np.dtype(f"{self._byte_order}u4")
+        p += 4
+        starts: np.ndarray = np.frombuffer(self._data, dtype=dtype, count=block_count, offset=p).astype(np.int64)
+        p += 4 * block_count
+        sizes: np.ndarray = np.frombuffer(self._data, dtype=dtype, count=block_count, offset=p).astype(np.int64)
+        p += 4 * block_count
+        return starts, starts + sizes, p
+
+    def _get_record(self, chromosome: str) -> TwoBitRecord:
+        if chromosome in self._records:
+            return self._records[chromosome]
+
+        if chromosome not in self._offsets:
+            raise KeyError(f"Sequence '{chromosome}' not found in reference file!")
+
+        p: int = self._offsets[chromosome]
+        size: int = self._unpack('I', p)[0]
+        n_starts, n_ends, p = self._read_blocks(p + 4)
+        mask_starts, mask_ends, p = self._read_blocks(p)
+
+        # Skip reserved field
+        record = TwoBitRecord(size, p + 4, n_starts, n_ends, mask_starts, mask_ends)
+        self._records[chromosome] = record
+        return record
+
+    @property
+    def references(self) -> List[str]:
+        return list(self._offsets.keys())
+
+    def _fetch_codes(self, chromosome: str, start: int, end: int) -> Tuple[TwoBitRecord, int, int, np.ndarray]:
+        record: TwoBitRecord = self._get_record(chromosome)
+
+        # Convert to a zero-based half-open region, truncated at the end of the sequence
+        start_0: int = max(start - 1, 0)
+        end_0: int = min(end, record.size)
+        if end_0 <= start_0:
+            return record, start_0, start_0, np.empty(0, dtype=np.uint8)
+
+        # Decode the packed bytes spanning the region
+        byte_start: int = start_0 >> 2
+        byte_end: int = (end_0 + 3) >> 2
+        packed: np.ndarray = self._data[record.dna_offset + byte_start:record.dna_offset + byte_end]
+        offset: int = start_0 - (byte_start << 2)
+        codes: np.ndarray = TWOBIT_UNPACK_TABLE[packed].ravel()[offset:offset + end_0 - start_0]
+        return record, start_0, end_0, codes
+
+    def fetch(self, chromosome: str, start: int, end: int) -> str:
+        record, start_0, end_0, codes = self._fetch_codes(chromosome, start, end)
+
+        n_mask: Optional[np.ndarray] = _get_block_mask(record.n_starts, record.n_ends, start_0, end_0)
+        if n_mask is not None:
+            codes[n_mask] = N_CODE
+
+        # Apply soft-masking
+        soft_mask: Optional[np.ndarray] = _get_block_mask(record.mask_starts, record.mask_ends, start_0, end_0)
+        if soft_mask is not None:
+            codes[soft_mask] |= LOWER_CASE_BIT
+
+        return codes.tobytes().decode('ascii')
+
+    def fetch_normalised(self, chromosome: str, start: int, end: int) -> str:
+        record, start_0, end_0, codes = self._fetch_codes(chromosome, start, end)
+
+        # Only unknown nucleotides can be invalid (soft-masking is ignored)
+        if _get_block_mask(record.n_starts, record.n_ends, start_0, end_0) is not None:
+            raise ValueError("The reference sequence contains invalid symbols: N!")
+
+        return codes.tobytes().decode('ascii')
+
+    def close(self) -> None:
+        self._records.clear()
+        self._data = None
+
+
+def is_two_bit_file(fp: str) -> bool:
+    return os.path.splitext(fp)[1].lower() == TWOBIT_EXTENSION
+
+
+def open_reference_file(fp: str) -> ReferenceFile:
+    try:
+        return TwoBitReferenceFile(fp) if is_two_bit_file(fp) else FastaReferenceFile.load(fp)
+    except (IOError, ValueError) as ex:
+        logging.critical("Failed to load reference file!")
+        raise ex
@@ -0,0 +1,163 @@
+########## LICENCE ##########
+# VaLiAnT, (c) 2020, GRL (the "Software")
+# 
+# The Software remains the property of Genome Research Ltd ("GRL").
+# 
+# The Software is distributed "AS IS" under this Licence solely for non-commercial use in the hope that it will be useful,
+# but in order that GRL as a charitable foundation protects its assets for the benefit of its educational and research
+# purposes, GRL makes clear that no condition is made or to be implied, nor is any warranty given or to be implied, as to
+# the accuracy of the Software, or that it will be suitable for any particular purpose or for use under any specific
+# conditions. Furthermore, GRL disclaims all responsibility for the use which is made of the Software. It further
+# disclaims any liability for the outcomes arising from using  the Software.
+# 
+# The Licensee agrees to indemnify GRL and hold GRL harmless from and against any and all claims, damages and liabilities
+# asserted by third parties (including claims for negligence) which arise directly or indirectly from the use of the
+# Software or the sale of any products based on the Software.
+# 
+# No part of the Software may be reproduced, modified, transmitted or transferred in any form or by any means, electronic
+# or mechanical, without the express permission of GRL. The permission of GRL is not required if the said reproduction,
+# modification, transmission or transference is done without financial return, the conditions of this Licence are imposed
+# upon the receiver of the product, and all original and amended source code is included in any transmitted product. You
+# may be held legally responsible for any copyright infringement that is caused or encouraged by your failure to abide by
+# these terms and conditions.
+# 
+# You are not permitted under this Licence to use this Software commercially. Use for which any financial return is
+# received shall be defined as commercial use, and includes (1) integration of all or part of the source code or the
+# Software into a product for sale or license by or on behalf of Licensee to third parties or (2) use of the Software
+# or any derivative of it for research with the final aim of developing software products for sale or license to a third
+# party or (3) use of the Software or any derivative of it for research with the final aim of developing non-software
+# products for sale or license to a third party, or (4) use of the Software to provide any service to an external
+# organisation for which payment is received. If you are interested in using the Software commercially, please contact
+# legal@sanger.ac.uk. Contact details are: legal@sanger.ac.uk quoting reference Valiant-software.
+#############################
+
+from __future__ import annotations
+from dataclasses import dataclass
+import hashlib
+import logging
+import os
+import sqlite3
+import time
+from typing import Dict, Iterable, List, Tuple
+
+REF_CACHE_FILE_NAME = 'refseq_cache.sqlite'
+
+# Seconds to wait for concurrent runs to release the cache
+REF_CACHE_TIMEOUT = 120.0
+
+REF_CACHE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS regions (
+    reference TEXT NOT NULL,
+    chromosome TEXT NOT NULL,
+    start INTEGER NOT NULL,
+    end INTEGER NOT NULL,
+    sequence TEXT NOT NULL,
+    last_access REAL NOT NULL,
+    PRIMARY KEY (reference, chromosome, start, end)
+) WITHOUT ROWID
+"""
+
+
+def _get_file_stat_key(fp: str) -> str:
+    stat = os.stat(fp)
+    return f"{os.path.abspath(fp)}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def get_reference_file_key(fp: str) -> str:
+    """Identify a reference file by path, size, and modification time (including its index, if any)"""
+
+    keys: List[str] = [_get_file_stat_key(fp)]
+    fai_fp: str = f"{fp}.fai"
+    if os.path.isfile(fai_fp):
+        keys.append(_get_file_stat_key(fai_fp))
+    return hashlib.sha1('|'.join(keys).encode()).hexdigest()
+
+
+@dataclass(init=False)
+class ReferenceSequenceCache:
+    """
+    Persistent cache of normalised reference sequences
+
+    Sequences are stored by reference file identity and region; the least
+    recently used regions are evicted once the total number of cached
+    nucleotides exceeds the maximum size.
+    """
+
+    __slots__ = {'_connection', 'reference_key', 'max_size'}
+
+    _connection: sqlite3.Connection
+    reference_key: str
+    max_size: int
+
+    def __init__(self, directory: str, reference_fp: str, max_size: int) -> None:
+        if max_size < 1:
+            raise ValueError("Invalid reference cache size!")
+
+        os.makedirs(directory, exist_ok=True)
+        self._connection = sqlite3.connect(
+            os.path.join(directory, REF_CACHE_FILE_NAME), timeout=REF_CACHE_TIMEOUT)
+        self._connection.execute(REF_CACHE_SCHEMA)
+        self._connection.commit()
+        self.reference_key = get_reference_file_key(reference_fp)
+        self.max_size = max_size
+
+    def get_sequences(self, chromosome: str, regions: Iterable[Tuple[int, int]]) -> Dict[Tuple[int, int], str]:
+        sequences: Dict[Tuple[int, int], str] = {}
+        cursor = self._connection.cursor()
+        for start, end in regions:
+            row = cursor.execute(
+                "SELECT sequence FROM regions WHERE reference = ? AND chromosome = ? AND start = ? AND end = ?",
+                (self.reference_key, chromosome, start, end)).fetchone()
+            if row is not None:
+                sequences[(start, end)] = row[0]
+
+        # Refresh access time
+        if sequences:
+            now: float = time.time()
+            with self._connection:
+                self._connection.executemany(
+                    "UPDATE regions SET last_access = ? WHERE reference = ? AND chromosome = ? AND start = ? AND end = ?",
+                    [(now, self.reference_key, chromosome, start, end) for start, end in sequences])
+
+        return sequences
+
+    def set_sequences(self, chromosome: str, sequences: Dict[Tuple[int, int], str]) -> None:
+        now: float = time.time()
+        with self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO regions VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (self.reference_key, chromosome, start, end, seq, now)
+                    for (start, end), seq in sequences.items()
+                ])
+
+    @property
+    def size(self) -> int:
+        return self._connection.execute(
+            "SELECT COALESCE(SUM(LENGTH(sequence)), 0) FROM regions").fetchone()[0]
+
+    def evict(self) -> int:
+        """Evict the least recently used regions in excess of the maximum size"""
+
+        excess: int = self.size - self.max_size
+        if excess <= 0:
+            return 0
+
+        keys: List[Tuple[str, str, int, int]] = []
+        for key in self._connection.execute(
+            "SELECT reference, chromosome, start, end, LENGTH(sequence) FROM regions ORDER BY last_access"
+        ):
+            keys.append(key[:4])
+            excess -= key[4]
+            if excess <= 0:
+                break
+
+        with self._connection:
+            self._connection.executemany(
+                "DELETE FROM regions WHERE reference = ? AND chromosome = ? AND start = ? AND end = ?", keys)
+
+        logging.debug("Evicted %d regions from the reference cache." % len(keys))
+        return len(keys)
+
+    def close(self) -> None:
+        self._connection.close()
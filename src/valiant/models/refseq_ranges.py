@@ -59,6 +59,9 @@ CSV_HEADER = [
     'sgrna_vector'
 ]
 
+# Optional field selecting the transcript of the targeton
+CSV_HEADER_TRANSCRIPT = 'transcript_id'
+
 # Mutation vector pattern, e.g.: `(1del), (snv, 1del), (3del)`
 mutator_vector_re: re.Pattern = re.compile(
     r'\s*,\s*'.join([r'\((\s*[\w\-_]+\s*(?:,\s*[\w\-_]+)*)?\s*\)'] * 3))
@@ -85,18 +88,25 @@ class TargetReferenceRegion:
     genomic_range: GenomicRange
     mutators: Set[TargetonMutator]
 
+    # Required to allow multiprocessing to pickle the object
+    def __setstate__(self, state: Tuple) -> None:
+        for slot, value in state[1].items():
+            object.__setattr__(self, slot, value)
+
 
 @dataclass(init=False)
 class ReferenceSequenceRanges:
     __slots__ = {
         'ref_range',
         'sgrna_ids',
+        'transcript_id',
         '_const_regions',
         '_target_regions'
     }
 
     ref_range: GenomicRange
     sgrna_ids: Set[str]
+    transcript_id: Optional[str]
     _const_regions: Tuple[Optional[GenomicRange], Optional[GenomicRange]]
     _target_regions: Tuple[
         Optional[TargetReferenceRegion],
@@ -114,13 +124,15 @@ class ReferenceSequenceRanges:
         target_region_2_end: int,
         target_region_2_extension: Tuple[int, int],
         mutators: Tuple[Set[TargetonMutator], Set[TargetonMutator], Set[TargetonMutator]],
-        sgrna_ids: Set[str]
+        sgrna_ids: Set[str],
+        transcript_id: Optional[str] = None
     ) -> None:
 
         def get_genomic_range(start: int, end: int) -> GenomicRange:
             return GenomicRange(chromosome, start, end, strand)
 
         self.sgrna_ids = sgrna_ids
+        self.transcript_id = transcript_id
 
         if len(target_region_2_extension) != 2 or any(x < 0 for x in target_region_2_extension):
             raise ValueError("Invalid extension vector!")
@@ -219,6 +231,9 @@ class ReferenceSequenceRanges:
         # sgRNA ID vector
         sgrna_ids: Set[str] = set(parse_list(row[8]))
 
+        # Transcript ID (optional)
+        transcript_id: Optional[str] = (row[9].strip() or None) if len(row) > 9 else None
+
         return cls(
             row[0],
             row[1],
@@ -228,7 +243,8 @@ class ReferenceSequenceRanges:
             int(row[5]),
             (extensions[0], extensions[1]),
             (mutators[0], mutators[1], mutators[2]),
-            sgrna_ids)
+            sgrna_ids,
+            transcript_id=transcript_id)
 
     @property
     def mutators(self) -> Set[TargetonMutator]:
@@ -298,7 +314,8 @@ class ReferenceSequenceRangeCollection:
         # Load oligonucleotide templates
         with open(fp, encoding=encoding) as fh:
             reader = csv.reader(fh, delimiter='\t')
-            if next(reader) != CSV_HEADER:
+            header: List[str] = next(reader)
+            if header != CSV_HEADER and header != CSV_HEADER + [CSV_HEADER_TRANSCRIPT]:
                 raise ValueError("Invalid header!")
 
             return cls(map(ReferenceSequenceRanges.from_row, reader))
@@ -307,6 +324,14 @@ class ReferenceSequenceRangeCollection:
     def sgrna_ids(self) -> Set[str]:
         return set.union(*[rsr.sgrna_ids for rsr in self._rsrs.values()])
 
+    @property
+    def transcript_ids(self) -> Dict[int, str]:
+        return {
+            rsr_id: rsr.transcript_id
+            for rsr_id, rsr in self._rsrs.items()
+            if rsr.transcript_id
+        }
+
     @property
     def target_ranges(self) -> PyRanges:
         return self._region_ranges[~self._region_ranges.is_const]
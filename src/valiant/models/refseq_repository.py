@@ -32,52 +32,72 @@
 #############################
 
 from __future__ import annotations
+from bisect import bisect_right
 from dataclasses import dataclass
-from functools import partial
 import logging
-from typing import Dict, Iterable, Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple, Union
 from pysam import FastaFile
 from .base import GenomicRange
-from ..constants import DNA_ALPHABET_SET
-from ..utils import is_dna
+from ..constants import DEFAULT_REF_CACHE_MAX_SIZE_MB
+from ..utils import merge_regions
+from .reference_file import FastaReferenceFile, ReferenceFile, _normalise_ref_seq, open_reference_file
+from .refseq_cache import ReferenceSequenceCache
 
 
-# TODO: use explicit index path instead?
-def get_fasta_file(fp: str) -> FastaFile:
-    try:
-        return FastaFile(fp)
-    except IOError as ex:
-        logging.critical("Failed to load reference file!")
-        raise ex
+def _stitch_sequences(sequences: Iterable[Tuple[int, int, str]]) -> List[Tuple[int, int, str]]:
+    stitched: List[Tuple[int, int, str]] = []
+    for start, end, seq in sorted(sequences):
 
+        # Join overlapping and adjacent sequences
+        if stitched and start <= stitched[-1][1] + 1:
+            block_start, block_end, block_seq = stitched[-1]
+            if end > block_end:
+                stitched[-1] = (block_start, end, block_seq + seq[block_end - start + 1:])
+        else:
+            stitched.append((start, end, seq))
 
-def _normalise_ref_seq(sequence: str) -> str:
+    return stitched
 
-    # Remove soft-masking
-    norm_sequence = sequence.upper()
 
-    # Validate sequence
-    if not is_dna(norm_sequence):
-        invalid_symbols = ', '.join(set(norm_sequence) - DNA_ALPHABET_SET)
-        raise ValueError(f"The reference sequence contains invalid symbols: {invalid_symbols}!")
+@dataclass(init=False)
+class _SequenceBlocks:
+    __slots__ = {'starts', 'ends', 'sequences'}
 
-    return norm_sequence
+    starts: List[int]
+    ends: List[int]
+    sequences: List[str]
 
+    def __init__(self) -> None:
+        self.starts = []
+        self.ends = []
+        self.sequences = []
+
+    def append(self, start: int, end: int, sequence: str) -> None:
+        self.starts.append(start)
+        self.ends.append(end)
+        self.sequences.append(sequence)
+
+    def get_slice(self, start: int, end: int) -> Optional[str]:
+        i: int = bisect_right(self.starts, start) - 1
+        if i < 0 or end > self.ends[i]:
+            return None
 
-def _fetch_sequence(fasta: FastaFile, chromosome: str, start: int, end: int) -> str:
-    return fasta.fetch(reference=chromosome, start=start - 1, end=end)
+        block_start: int = self.starts[i]
+        return self.sequences[i][start - block_start:end - block_start + 1]
 
 
 @dataclass(init=False)
 class ReferenceSequenceRepository:
-    __slots__ = {'_sequences', '_nucleotides'}
+    __slots__ = {'_sequences', '_nucleotides', '_blocks'}
 
     _sequences: Dict[str, Dict[Tuple[int, int], Optional[str]]]
     _nucleotides: Dict[str, Dict[int, Optional[str]]]
+    _blocks: Dict[str, _SequenceBlocks]
 
     def __init__(self) -> None:
         self._sequences = {}
         self._nucleotides = {}
+        self._blocks = {}
 
     @property
     def region_count(self) -> int:
@@ -116,33 +136,70 @@ class ReferenceSequenceRepository:
     def register_nucleotide(self, chromosome: str, position: int, nt: str) -> None:
         self._nucleotides[chromosome][position] = _normalise_ref_seq(nt)
 
-    def fetch_sequences(self, fasta: FastaFile) -> None:
-        fetch_start: int
-        start_gt_1: bool
-        fetch = partial(_fetch_sequence, fasta)
+    def _get_fetch_regions(self, chromosome: str) -> List[Tuple[int, int]]:
+
+        # Extend each region by one to include the preceding nucleotide (unless it is at the start of the chromosome)
+        return sorted(set(
+            ((start - 1) if start > 1 else start, end)
+            for start, end in self._sequences.get(chromosome, {})
+        ))
+
+    def fetch_sequences(
+        self,
+        reference: Union[ReferenceFile, FastaFile],
+        cache: Optional[ReferenceSequenceCache] = None
+    ) -> None:
+        if not isinstance(reference, ReferenceFile):
+            reference = FastaReferenceFile(reference)
+
+        block_count: int = 0
+        base_count: int = 0
+        cached_count: int = 0
         logging.debug("Fetching %d reference sequences..." % self.region_count)
-        for chromosome, regions in self._sequences.items():
-            for start, end in regions:
-
-                # Fetch the region sequence extended by one (unless it is at the start of the chromosome)
-                start_gt_1 = start > 1
-                fetch_start = (start - 1) if start > 1 else start
-                logging.debug("Fetching reference sequence at %s:%d-%d." % (chromosome, fetch_start, end))
-                seq: str = fetch(chromosome, fetch_start, end)
-
-                # Register the region sequence
-                self.register_sequence(chromosome, start, end, seq[1:] if start_gt_1 else seq)
-
-                # Register nucleotide preceding the start of the region
-                if start_gt_1:
-                    self.register_nucleotide(chromosome, fetch_start, seq[0])
+        for chromosome in self._sequences:
+            regions: List[Tuple[int, int]] = self._get_fetch_regions(chromosome)
+
+            # Retrieve cached sequences (if any)
+            cached: Dict[Tuple[int, int], str] = cache.get_sequences(chromosome, regions) if cache else {}
+            cached_count += len(cached)
+            sequences: List[Tuple[int, int, str]] = [
+                (start, end, seq) for (start, end), seq in cached.items()
+            ]
+
+            missing: List[Tuple[int, int]] = [r for r in regions if r not in cached]
+            for start, end in merge_regions(missing):
+
+                # Fetch the merged region sequence once
+                logging.debug("Fetching reference sequence at %s:%d-%d." % (chromosome, start, end))
+                sequences.append((start, end, reference.fetch_normalised(chromosome, start, end)))
+                block_count += 1
+                base_count += end - start + 1
+
+            blocks: _SequenceBlocks = _SequenceBlocks()
+            for start, end, seq in _stitch_sequences(sequences):
+                blocks.append(start, end, seq)
+            self._blocks[chromosome] = blocks
+
+            # Store fetched sequences
+            if cache and missing:
+                cache.set_sequences(chromosome, {
+                    (start, end): blocks.get_slice(start, end)
+                    for start, end in missing
+                })
+
+        logging.info("Read %d reference bases in %d blocks for %d regions (%d cached)." % (
+            base_count, block_count, self.region_count, cached_count))
+
+    def _get_block_sequence(self, chromosome: str, start: int, end: int) -> Optional[str]:
+        blocks: Optional[_SequenceBlocks] = self._blocks.get(chromosome, None)
+        return blocks.get_slice(start, end) if blocks else None
 
     def get_sequence(self, chromosome: str, start: int, end: int) -> Optional[str]:
         if chromosome not in self._sequences:
             return None
 
         t = (start, end) if end >= start else (end, start)
-        return self._sequences[chromosome].get(t, None)
+        return self._sequences[chromosome].get(t, None) or self._get_block_sequence(chromosome, *t)
 
     def get_genomic_range_sequence(self, genomic_range: GenomicRange) -> Optional[str]:
         return self.get_sequence(
@@ -151,6 +208,12 @@ class ReferenceSequenceRepository:
     def get_genomic_range_subsequence(self, genomic_range: GenomicRange, start: int, end: int) -> Optional[str]:
         if start < genomic_range.start or end > genomic_range.end:
             raise ValueError("Invalid subsequence!")
+
+        # Slice the fetched block directly
+        seq: Optional[str] = self._get_block_sequence(genomic_range.chromosome, start, end)
+        if seq:
+            return seq
+
         seq = self.get_genomic_range_sequence(genomic_range)
         return seq[start - genomic_range.start:end - genomic_range.start + 1] if seq else None
 
@@ -158,7 +221,8 @@ class ReferenceSequenceRepository:
         if chromosome not in self._nucleotides:
             return None
 
-        return self._nucleotides[chromosome].get(position, None)
+        return self._nucleotides[chromosome].get(position, None) or self._get_block_sequence(
+            chromosome, position, position)
 
     def get_nucleotide_unsafe(self, chromosome: str, position: int) -> str:
         nt: Optional[str] = self.get_nucleotide(chromosome, position)
@@ -169,21 +233,34 @@ class ReferenceSequenceRepository:
 
 def fetch_reference_sequences(
     ref_fasta: str,
-    ref_ranges: Iterable[GenomicRange]
+    ref_ranges: Iterable[GenomicRange],
+    cache_dir: Optional[str] = None,
+    cache_max_size: int = DEFAULT_REF_CACHE_MAX_SIZE_MB * 1000000
 ) -> ReferenceSequenceRepository:
 
-    # Open reference genome file
-    fasta_file: FastaFile = get_fasta_file(ref_fasta)
+    # Open reference genome file (FASTA or 2bit)
+    reference: ReferenceFile = open_reference_file(ref_fasta)
+    cache: Optional[ReferenceSequenceCache] = None
 
     try:
+
+        # Open reference sequence cache (if any)
+        if cache_dir:
+            cache = ReferenceSequenceCache(cache_dir, ref_fasta, cache_max_size)
+
         ref: ReferenceSequenceRepository = ReferenceSequenceRepository()
         if ref_ranges:
             ref.register_genomic_ranges(ref_ranges)
-            ref.fetch_sequences(fasta_file)
+            ref.fetch_sequences(reference, cache=cache)
+
+        if cache:
+            cache.evict()
 
     finally:
 
-        # Close reference genome file
-        fasta_file.close()
+        # Close reference genome file and cache
+        reference.close()
+        if cache:
+            cache.close()
 
     return ref
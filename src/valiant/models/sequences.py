@@ -33,37 +33,97 @@
 
 from __future__ import annotations
 from collections.abc import Sized
-from dataclasses import dataclass
+from typing import Optional, Union
+import numpy as np
 from .base import GenomicRange
-from ..utils import is_dna
+from ..utils import decode_dna, encode_dna, is_dna
+
+
+class PackedSequence(Sized):
+    """DNA sequence stored as nucleotide codes (one byte each), sliced as views"""
+
+    __slots__ = {'codes'}
+
+    def __init__(self, codes: np.ndarray) -> None:
+        self.codes: np.ndarray = codes
+
+    def __len__(self) -> int:
+        return self.codes.shape[0]
+
+    def __getitem__(self, key: slice) -> PackedSequence:
+        return PackedSequence(self.codes[key])
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, PackedSequence) and np.array_equal(self.codes, other.codes)
+
+    def __str__(self) -> str:
+        return decode_dna(self.codes)
+
+    def __repr__(self) -> str:
+        return f"PackedSequence('{self}')"
+
+
+SequenceData = Union[str, PackedSequence]
 
 
-@dataclass
 class Sequence(Sized):
-    __slots__ = {'sequence'}
+    """
+    DNA sequence
+
+    Sequences provided as strings are validated; packed sequences (e.g.,
+    slices of other sequences) are trusted. Either representation is
+    computed on first access and retained.
+    """
+
+    __slots__ = {'_sequence', '_packed'}
+
+    def __init__(self, sequence: SequenceData) -> None:
+        self._sequence: Optional[str] = None
+        self._packed: Optional[PackedSequence] = None
+        if isinstance(sequence, PackedSequence):
+            self._packed = sequence
+        else:
+            if not is_dna(sequence):
+                raise ValueError("Invalid symbols in sequence!")
+            self._sequence = sequence
 
-    sequence: str
+    @property
+    def sequence(self) -> str:
+        if self._sequence is None:
+            self._sequence = str(self._packed)
+        return self._sequence
 
-    def __post_init__(self) -> None:
-        if not is_dna(self.sequence):
-            raise ValueError("Invalid symbols in sequence!")
+    @property
+    def packed(self) -> PackedSequence:
+        if self._packed is None:
+            self._packed = PackedSequence(encode_dna(self._sequence))
+        return self._packed
 
     def __len__(self) -> int:
-        return len(self.sequence)
+        return len(self._packed) if self._packed is not None else len(self._sequence)
 
+    def __eq__(self, other) -> bool:
+        return type(self) is type(other) and self.sequence == other.sequence
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(sequence='{self.sequence}')"
 
-@dataclass
-class ReferenceSequence(Sequence):
-    __slots__ = {'sequence', 'genomic_range'}
 
-    genomic_range: GenomicRange
+class ReferenceSequence(Sequence):
+    __slots__ = {'genomic_range'}
 
-    def __post_init__(self) -> None:
-        super().__post_init__()
-        if len(self.sequence) != len(self.genomic_range):
+    def __init__(self, sequence: SequenceData, genomic_range: GenomicRange) -> None:
+        super().__init__(sequence)
+        self.genomic_range: GenomicRange = genomic_range
+        if len(self) != len(self.genomic_range):
             raise ValueError("Sequence and genomic range have different lengths!")
 
+    def __eq__(self, other) -> bool:
+        return super().__eq__(other) and self.genomic_range == other.genomic_range
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(sequence='{self.sequence}', genomic_range={self.genomic_range!r})"
+
     def get_subsequence(self, genomic_range: GenomicRange) -> ReferenceSequence:
         start, end = self.genomic_range.get_relative_subrange(genomic_range)
-        seq: str = self.sequence[start:end]
-        return ReferenceSequence(seq, genomic_range)
+        return ReferenceSequence(self.packed[start:end], genomic_range)
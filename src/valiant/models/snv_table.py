@@ -34,9 +34,10 @@
 from __future__ import annotations
 from dataclasses import dataclass
 import logging
-from typing import Dict, Set, Optional
+from typing import Dict, Set, Optional, Tuple
+import numpy as np
 import pandas as pd
-from ..snv import _build_base_snv_table, build_snv_table, get_fast_exon_snv, get_all_syn_codons, get_fast_snvre, get_top_syn_codons, build_aa_sub_table, get_fast_aa_subs
+from ..snv import _build_base_snv_table, build_codon_snvre_table, build_snv_table, get_fast_exon_snv, get_all_syn_codons, get_fast_snvre, get_top_syn_codons, build_aa_sub_table, get_fast_codon_subs
 from .base import GenomicRange
 from .codon_table import CodonTable, STOP_CODE
 
@@ -54,7 +55,7 @@ class AllAminoAcidsTable:
         }
 
     def get_subs(self, genomic_range: GenomicRange, frame: int, seq: str) -> pd.DataFrame:
-        return get_fast_aa_subs(
+        return get_fast_codon_subs(
             self._strand_table[genomic_range.strand], frame, seq)
 
 
@@ -102,11 +103,12 @@ class SnvTable:
 
 @dataclass
 class SnvReTable:
-    __slots__ = {'_snv_table', '_strand_all_syn_table', '_strand_top_syn_table'}
+    __slots__ = {'_snv_table', '_strand_all_syn_table', '_strand_top_syn_table', '_strand_codon_snvre_table'}
 
     _snv_table: SnvTable
     _strand_all_syn_table: Dict[str, pd.DataFrame]
     _strand_top_syn_table: Dict[str, pd.DataFrame]
+    _strand_codon_snvre_table: Dict[str, Tuple[pd.DataFrame, np.ndarray]]
 
     def __init__(self, snv_table: SnvTable) -> None:
         self._snv_table = snv_table
@@ -129,15 +131,18 @@ class SnvReTable:
             for strand, all_syn_table in strand_all_syn_tables.items()
         }
 
-    def get_snvres(self, genomic_range: GenomicRange, frame: int, seq: str, snvs: pd.DataFrame) -> pd.DataFrame:
-        strand: str = genomic_range.strand
-        return get_fast_snvre(
-            self._strand_all_syn_table[strand],
-            self._strand_top_syn_table[strand],
-            genomic_range,
-            frame,
-            seq,
-            snvs)
+        # Pre-compute the SNVRE codon replacements
+        self._strand_codon_snvre_table = {
+            strand: build_codon_snvre_table(
+                self._snv_table._strand_snv_table[strand],
+                self._strand_all_syn_table[strand],
+                self._strand_top_syn_table[strand])
+            for strand in snv_table.strands
+        }
+
+    def get_snvres(self, genomic_range: GenomicRange, frame: int, seq: str) -> pd.DataFrame:
+        codon_snvres, codon_snvre_offsets = self._strand_codon_snvre_table[genomic_range.strand]
+        return get_fast_snvre(codon_snvres, codon_snvre_offsets, frame, seq)
 
 
 @dataclass
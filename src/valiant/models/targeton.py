@@ -33,30 +33,41 @@
 
 import abc
 from collections.abc import Sized
-from typing import Callable, ClassVar, Dict, List, Set
+from typing import ClassVar, Dict, Set
 import numpy as np
 import pandas as pd
 from .codon_table import CodonTable, STOP_CODE
-from .mutated_sequences import (
-    DeletionMutatedSequence,
-    Deletion1MutatedSequence,
-    Deletion2Offset0MutatedSequence,
-    Deletion2Offset1MutatedSequence,
-    MutationCollection,
-    SingleNucleotideMutatedSequence,
-    SingleCodonMutatedSequence
-)
+from .mutated_sequences import MutationCollection
 from .pam_protection import PamProtectedReferenceSequence
 from .snv_table import AuxiliaryTables
+from ..array_mutators import get_non_overlapping_deletions, get_nucleotides, replace_single_nucleotides
 from ..enums import TargetonMutator, VariantType
-from ..string_mutators import delete_non_overlapping_3_offset, replace_codons_const
-from ..utils import get_constant_category, get_out_of_frame_offset
+from ..globals import NUCLEOTIDES
+from ..snv import build_const_codon_sub_table, get_fast_codon_subs
+from ..utils import encode_dna, get_out_of_frame_offset
 
 
 def get_snv_mutations(sequence: str) -> MutationCollection:
-    return MutationCollection.from_variants(
-        SingleNucleotideMutatedSequence.from_sequence(
-            sequence))
+    positions, alt_codes = replace_single_nucleotides(encode_dna(sequence))
+
+    return MutationCollection(df=pd.DataFrame({
+        'var_type': np.repeat(np.int8(VariantType.SUBSTITUTION.value), positions.shape[0]),
+        'mut_position': positions,
+        'ref': get_nucleotides(sequence, positions),
+        'new': pd.Categorical.from_codes(alt_codes, categories=NUCLEOTIDES)
+    }))
+
+
+def get_deletion_mutations(sequence: str, count: int, offset: int = 0) -> MutationCollection:
+    positions, refs = get_non_overlapping_deletions(sequence, count, offset=offset)
+    n: int = positions.shape[0]
+
+    return MutationCollection(df=pd.DataFrame({
+        'var_type': np.repeat(np.int8(VariantType.DELETION.value), n),
+        'mut_position': positions,
+        'ref': refs,
+        'new': pd.Categorical.from_codes(np.full(n, -1, dtype=np.int8), categories=[])
+    }))
 
 
 class BaseTargeton(abc.ABC, Sized):
@@ -87,16 +98,13 @@ class BaseTargeton(abc.ABC, Sized):
         return self._get_mutator_method(mutator)(aux_tables=aux_tables)
 
     def get_1del_mutations(self, **kwargs) -> MutationCollection:
-        return MutationCollection.from_variants(
-            Deletion1MutatedSequence.from_sequence(self.sequence))
+        return get_deletion_mutations(self.sequence, 1)
 
     def get_2del0_mutations(self, **kwargs) -> MutationCollection:
-        return MutationCollection.from_variants(
-            Deletion2Offset0MutatedSequence.from_sequence(self.sequence))
+        return get_deletion_mutations(self.sequence, 2, offset=0)
 
     def get_2del1_mutations(self, **kwargs) -> MutationCollection:
-        return MutationCollection.from_variants(
-            Deletion2Offset1MutatedSequence.from_sequence(self.sequence))
+        return get_deletion_mutations(self.sequence, 2, offset=1)
 
     def get_snv_mutations(self, **kwargs) -> MutationCollection:
         return get_snv_mutations(self.sequence)
@@ -210,12 +218,11 @@ class CDSTargeton(BaseTargeton):
         snv_joint.mut_position -= self.start
 
         # Wrap complete SNV metadata in a collection
-        return MutationCollection(
-            df=snv_joint, mutations=snvs.mutations)
+        return MutationCollection(df=snv_joint)
 
-    def _get_snvres(self, aux: AuxiliaryTables, snvs: pd.DataFrame) -> MutationCollection:
+    def _get_snvres(self, aux: AuxiliaryTables) -> MutationCollection:
         df: pd.DataFrame = aux.snvre_table.get_snvres(
-            self.ref_sequence.genomic_range, self.frame, self.sequence, snvs).rename(
+            self.ref_sequence.genomic_range, self.frame, self.sequence).rename(
                 columns={
                     'pos': 'mut_position',
                     'alt': 'new',
@@ -224,45 +231,11 @@ class CDSTargeton(BaseTargeton):
                     'mut_type': 'mut_type'
                 })
 
-        # TODO: avoid generating mutation list when possible
-        return MutationCollection(df=df, mutations=[
-            SingleCodonMutatedSequence(r.mut_position, r.mseq, r.ref, r.new)
-            for r in df.itertuples()
-        ])
+        return MutationCollection(df=df)
 
     def _get_codon_mutations(self, codon_table: CodonTable, aa: str) -> MutationCollection:
-
-        # Retrieve top codon for amino acid (or stop)
-        get_top_ranking_codon: Callable[[str], str] = (
-            codon_table.get_top_ranking_codon if self.strand == '+' else
-            codon_table.get_top_ranking_codon_rc
-        )
-        codon: str = get_top_ranking_codon(aa)
-
-        # Generate single-codon substitutions
-        offset: int = get_out_of_frame_offset(self.frame)
-        mc: MutationCollection = MutationCollection.from_variants([
-            SingleCodonMutatedSequence(pos, mseq, ref, alt)
-            for pos, ref, alt, mseq in replace_codons_const(self.sequence, offset, codon)
-        ])
-
-        if mc.df is None:
-            raise RuntimeError("Mutation collection table not found!")
-
-        # Get amino acid information
-        tr: Callable[[str], str] = (
-            codon_table.translate if self.strand == '+' else
-            codon_table.translate_rc
-        )
-        rown: int = mc.df.shape[0]
-        amino_acid_symbols: List[str] = codon_table.amino_acid_symbols
-        mc.df['ref_aa'] = pd.Categorical(mc.df.ref.apply(tr), categories=amino_acid_symbols)
-        mc.df['alt_aa'] = get_constant_category(aa, rown, amino_acid_symbols)
-
-        # Add variant type
-        mc.df['var_type'] = np.int8(VariantType.SUBSTITUTION.value)
-
-        return mc
+        return MutationCollection(df=get_fast_codon_subs(
+            build_const_codon_sub_table(codon_table, self.strand, aa), self.frame, self.sequence))
 
     def get_ala_mutations(self, aux_tables: AuxiliaryTables = None) -> MutationCollection:
         if not aux_tables:
@@ -281,10 +254,7 @@ class CDSTargeton(BaseTargeton):
             raise RuntimeError("Auxiliary tables not provided!")
         df: pd.DataFrame = aux_tables.all_aa_table.get_subs(
             self.ref_sequence.genomic_range, self.frame, self.sequence)
-        return MutationCollection(df=df, mutations=[
-            SingleCodonMutatedSequence(r.mut_position, r.mseq, r.ref, r.new)
-            for r in df.itertuples()
-        ])
+        return MutationCollection(df=df)
 
     def compute_mutations(self, mutators: Set[TargetonMutator], aux: AuxiliaryTables) -> Dict[TargetonMutator, MutationCollection]:
 
@@ -319,7 +289,7 @@ class CDSTargeton(BaseTargeton):
                 if mutator == TargetonMutator.SNV_RE:
 
                     # Compute SNVRE mutations
-                    mutations[TargetonMutator.SNV_RE] = self._get_snvres(aux, snv_meta_full)
+                    mutations[TargetonMutator.SNV_RE] = self._get_snvres(aux)
 
                 else:
                     raise NotImplementedError(f"Mutator '{mutator.value}' not yet implemented!")
@@ -329,8 +299,9 @@ class CDSTargeton(BaseTargeton):
     def get_inframe_mutations(self, **kwargs) -> MutationCollection:
         start_offset: int = get_out_of_frame_offset(self.cds_prefix_length)
         end_offset: int = get_out_of_frame_offset(self.cds_suffix_length)
-        return MutationCollection.from_variants([
-            DeletionMutatedSequence(pos, mseq, ref_seq)
-            for pos, ref_seq, mseq in delete_non_overlapping_3_offset(
-                self.sequence, start_offset, end_offset)
-        ])
+
+        # Delete in-frame codons only
+        mc: MutationCollection = get_deletion_mutations(
+            self.sequence[start_offset:len(self.sequence) - end_offset], 3)
+        mc.df.mut_position += np.int32(start_offset)
+        return mc
@@ -35,7 +35,8 @@ from __future__ import annotations
 from dataclasses import dataclass
 from functools import partial
 import logging
-from typing import Dict, List, Optional, Set, Tuple, ClassVar, Any, Callable
+from typing import Dict, List, Optional, Tuple, ClassVar, Any
+import numpy as np
 import pandas as pd
 from pyranges import PyRanges
 from pysam import VariantRecord
@@ -43,9 +44,9 @@ from .base import GenomicPosition, GenomicRange
 from .refseq_repository import ReferenceSequenceRepository
 from .sequences import ReferenceSequence
 from ..enums import VariantType, VariantClassification
-from ..loaders.vcf import load_vcf_manifest, var_type_sub, var_type_del, var_type_ins, var_class_unclass, var_class_mono
+from ..loaders.vcf import load_vcf_manifest, VcfRegions, var_type_sub, var_type_del, var_type_ins, var_class_unclass, var_class_mono
 from ..string_mutators import delete_nucleotides, insert_nucleotides, replace_nucleotides
-from ..utils import get_id_column, is_dna, get_var_types
+from ..utils import get_contained_intervals, is_dna, merge_regions
 
 # Metadata table fields used to generate the VCF output
 VCF_RECORD_METADATA_FIELDS: List[str] = [
@@ -92,6 +93,11 @@ class BaseVariant:
 
     type: ClassVar[VariantType]
 
+    # Required to allow multiprocessing to pickle the object
+    def __setstate__(self, state: Tuple) -> None:
+        for slot, value in state[1].items():
+            object.__setattr__(self, slot, value)
+
     def get_ref_offset(self, ref_seq: ReferenceSequence) -> int:
         if not ref_seq.genomic_range.contains_position(self.genomic_position):
             raise ValueError(
@@ -173,140 +179,121 @@ class CustomVariant:
     vcf_alias: Optional[str]
     vcf_variant_id: Optional[str]
 
+    # Required to allow multiprocessing to pickle the object
+    def __setstate__(self, state: Tuple) -> None:
+        for slot, value in state[1].items():
+            object.__setattr__(self, slot, value)
 
-VAR_TYPE_CONSTRUCTOR: Dict[int, Callable[[Any], BaseVariant]] = {
-    var_type_sub: lambda t: SubstitutionVariant(
-        GenomicPosition(t.Chromosome, t.Start_var + 1), t.ref, t.alt),
-    var_type_del: lambda t: DeletionVariant(
-        GenomicPosition(t.Chromosome, t.Start_var + 1), t.ref),
-    var_type_ins: lambda t: InsertionVariant(
-        GenomicPosition(t.Chromosome, t.Start_var + 1), t.alt)
-}
 
+def get_vcf_regions(regions: PyRanges) -> VcfRegions:
 
-def _map_variants(variants: pd.DataFrame, var_type: int, mask: bool = True) -> Dict[int, CustomVariant]:
-    constructor = VAR_TYPE_CONSTRUCTOR[var_type]
+    # Merge regions to query indexed VCF files
     return {
-        t.variant_id: CustomVariant(
-            constructor(t),
-            t.vcf_alias,
-            t.vcf_var_id)
-        for t in (
-            variants[variants.var_type == var_type] if mask else
-            variants
-        ).itertuples(index=False)
+        chromosome: merge_regions(zip((df.Start + 1).tolist(), df.End.tolist()))
+        for chromosome, df in regions.dfs.items()
     }
 
 
+def _log_variants(variants: pd.DataFrame, variant_ids: np.ndarray) -> None:
+    df: pd.DataFrame = variants.iloc[variant_ids]
+
+    # Log monomorphic variants
+    for r in df[df.var_class == var_class_mono].itertuples(index=False):
+        logging.info(f"Monomorphic variant at {r.Chromosome}:{r.Start + 1} (SKIPPED).")
+
+    # Log unclassified variants
+    for r in df[df.var_class == var_class_unclass].itertuples(index=False):
+        logging.info(f"Unclassified variant at {r.Chromosome}:{r.Start + 1}: {r.ref}>{r.alt}.")
+
+
 @dataclass
 class VariantRepository:
-    _variants: Dict[int, CustomVariant]
-    _region_variants: Dict[Tuple[str, int, int], Set[int]]
+    _region_variants: Dict[Tuple[str, int, int], np.ndarray]
+    _variant_table: Optional[pd.DataFrame] = None
 
     @classmethod
-    def load(cls, manifest_fp: str, regions: PyRanges) -> VariantRepository:
+    def load(
+        cls,
+        manifest_fp: str,
+        regions: PyRanges,
+        workers: int = 1,
+        cache_dir: Optional[str] = None
+    ) -> VariantRepository:
 
         # Load all permitted variants from multiple VCF files
         chromosome_boundaries: Dict[str, Tuple[int, int]] = {
             chromosome: (df.Start.min() + 1, df.End.max())
             for chromosome, df in regions.dfs.items()
         }
-        custom_variants: pd.DataFrame = load_vcf_manifest(manifest_fp, chromosome_boundaries)
+
+        custom_variants: pd.DataFrame = load_vcf_manifest(
+            manifest_fp, chromosome_boundaries, regions=get_vcf_regions(regions), workers=workers, cache_dir=cache_dir)
         custom_variants_n: int = custom_variants.shape[0]
 
         if custom_variants_n == 0:
-            return cls({}, {})
+            return cls({})
 
         logging.debug("Collected %d custom variants." % custom_variants_n)
 
-        # Make start positions zero-based
-        custom_variants.Start -= 1
-
-        # Assign identifier to all variants
-        custom_variants['variant_id'] = get_id_column(custom_variants_n)
-        custom_variant_ranges: PyRanges = PyRanges(df=custom_variants)
-
-        # Match regions with variants
-        ref_ranges_variants: pd.DataFrame = regions.join(
-            custom_variant_ranges,
-            suffix='_var'
-        )[[
-            'Start_var',
-            'End_var',
-            'variant_id',
+        # Make start positions zero-based (variant identifiers being row indices)
+        custom_variants = custom_variants[[
+            'Chromosome',
+            'Start',
+            'End',
             'ref',
             'alt',
             'vcf_alias',
             'vcf_var_id',
             'var_type',
             'var_class'
-        ]].as_df()
-        del custom_variant_ranges
-
-        variants: pd.DataFrame = ref_ranges_variants.drop([
-            'Start',
-            'End'
-        ], axis=1).drop_duplicates([
-            'variant_id'
-        ])
-
-        # Log and discard monomorphic variants
-        mono_mask: pd.Series = variants.var_class == var_class_mono
-        if mono_mask.any():
-            for chromosome, start in variants.loc[mono_mask, [
-                'Chromosome',
-                'Start_var'
-            ]].itertuples(index=False, name=None):
-                logging.info(f"Monomorphic variant at {chromosome}:{start + 1} (SKIPPED).")
-            variants = variants[~mono_mask]
-            mono_mask = ref_ranges_variants.var_class != var_class_mono
-            ref_ranges_variants = ref_ranges_variants[mono_mask]
-        del mono_mask
-
-        # Log unclassified variants
-        unclass_mask: pd.Series = variants.var_class == var_class_unclass
-        for r in variants[unclass_mask].itertuples(index=False):
-            logging.info(f"Unclassified variant at {r.Chromosome}:{r.Start_var + 1}: {r.ref}>{r.alt}.")
-        del unclass_mask
-
-        # List all variant types represented in the collection
-        var_types: List[int] = get_var_types(variants.var_type)
-        var_types_n: int = len(var_types)
-
-        if not var_types_n:
-            raise RuntimeError("No variant types in custom variant table!")
-
-        # Map variant indices to variant objects
-        var_types_gt_one: bool = var_types_n > 1
-        matching_variants: Dict[int, CustomVariant] = _map_variants(
-            variants, var_types[0], mask=var_types_gt_one)
-        if var_types_gt_one:
-            for var_type in var_types[1:]:
-                matching_variants.update(_map_variants(variants, var_type))
-        del variants, var_types_gt_one
-
-        # Map regions to variant indices
-        ref_ranges_variant_ids: Dict[Tuple[str, int, int], Set[int]] = {
-            (chromosome, start + 1, end): set(g.variant_id[(
-                (g.Start_var >= start)
-                & (g.End_var <= end)
-            )].unique())
-            for (chromosome, start, end), g in ref_ranges_variants.groupby([
-                'Chromosome',
-                'Start',
-                'End'
-            ])
-        }
-
-        return cls(matching_variants, ref_ranges_variant_ids)
+        ]].reset_index(drop=True)
+        custom_variants.Start -= 1
 
-    def get_variants(self, genomic_range: GenomicRange) -> Set[CustomVariant]:
+        var_starts: np.ndarray = custom_variants.Start.to_numpy()
+        var_ends: np.ndarray = custom_variants.End.to_numpy()
+        is_mono: np.ndarray = (custom_variants.var_class == var_class_mono).to_numpy()
+        chromosome_variant_ids: Dict[str, np.ndarray] = custom_variants.groupby(
+            'Chromosome', observed=True).indices
+
+        # Map regions to the indices of the variants they contain
+        ref_ranges_variant_ids: Dict[Tuple[str, int, int], np.ndarray] = {}
+        for chromosome, df in regions.dfs.items():
+            if chromosome not in chromosome_variant_ids:
+                continue
+
+            variant_ids: np.ndarray = chromosome_variant_ids[chromosome]
+            region_starts: np.ndarray = df.Start.to_numpy()
+            region_ends: np.ndarray = df.End.to_numpy()
+            region_indices, indices = get_contained_intervals(
+                region_starts, region_ends, var_starts[variant_ids], var_ends[variant_ids])
+            indices = variant_ids[indices]
+
+            # Log monomorphic and unclassified variants
+            _log_variants(custom_variants, np.unique(indices))
+
+            # Discard monomorphic variants
+            mask: np.ndarray = ~is_mono[indices]
+            region_indices = region_indices[mask]
+            indices = indices[mask]
+
+            # Split variant indices by region (region indices being sorted)
+            region_indices, split_indices = np.unique(region_indices, return_index=True)
+            for region_index, ids in zip(region_indices, np.split(indices, split_indices[1:])):
+                ref_ranges_variant_ids[(
+                    chromosome,
+                    int(region_starts[region_index]) + 1,
+                    int(region_ends[region_index])
+                )] = ids
+
+        return cls(ref_ranges_variant_ids, custom_variants)
+
+    def get_variant_table(self, genomic_range: GenomicRange) -> Optional[pd.DataFrame]:
         r: Tuple[str, int, int] = genomic_range.as_unstranded()
 
-        if r not in self._region_variants or not self._region_variants[r]:
-            return set()
+        if r not in self._region_variants:
+            return None
 
-        return set(self._variants[var_id] for var_id in self._region_variants[r])
+        return self._variant_table.iloc[self._region_variants[r]]
 
 
 def get_variant_from_tuple(chromosome: str, position: int, ref: str, alt: str) -> BaseVariant:
@@ -31,6 +31,7 @@
 # legal@sanger.ac.uk. Contact details are: legal@sanger.ac.uk quoting reference Valiant-software.
 #############################
 
+from functools import lru_cache
 from typing import Callable, Dict, List, Tuple
 import numpy as np
 import pandas as pd
@@ -40,7 +41,7 @@ from .globals import NUCLEOTIDES, TRIPLET_RCS, TRIPLETS
 from .models.base import GenomicRange
 from .models.codon_table import CodonTable, STOP_CODE
 from .string_mutators import replace_single_nucleotides
-from .utils import get_inner_cds_relative_boundaries, validate_strand
+from .utils import TRIPLET_COUNT, encode_dna, get_inner_cds_relative_boundaries, get_triplet_codes, validate_strand
 
 SYN_CODON_FIELDS = [
     'triplet',
@@ -57,6 +58,9 @@ SNV_SYN_FIELDS = [
     'mut_type'
 ]
 
+# Number of single nucleotide substitutions per triplet
+SNV_PER_TRIPLET: int = 3 * (len(NUCLEOTIDES) - 1)
+
 syn_code: int = MutationType.SYNONYMOUS.value
 mis_code: int = MutationType.MISSENSE.value
 non_code: int = MutationType.NONSENSE.value
@@ -88,6 +92,23 @@ def _get_triplet_aa_table(
     return df
 
 
+def get_triplet_amino_acids(codon_table: CodonTable, strand: str) -> pd.Categorical:
+    """Translate all triplets (in triplet code order) on the given strand"""
+
+    validate_strand(strand)
+    tr: Callable[[str], str] = (
+        codon_table.translate if strand == '+' else
+        codon_table.translate_rc
+    )
+    return as_amino_acids([tr(t) for t in TRIPLETS], codon_table.amino_acid_symbols)
+
+
+def _sort_codon_sub_table(df: pd.DataFrame) -> pd.DataFrame:
+
+    # Group substitutions by reference triplet code (as required by the codon substitution lookup)
+    return df.take(np.argsort(df.index.codes, kind='stable'))
+
+
 def build_aa_sub_table(codon_table: CodonTable, strand: str) -> pd.DataFrame:
     plus_strand: bool = strand == '+'
     amino_acid_symbols: List[str] = codon_table.amino_acid_symbols
@@ -118,43 +139,85 @@ def build_aa_sub_table(codon_table: CodonTable, strand: str) -> pd.DataFrame:
         pd.concat([aa_df] * len(TRIPLETS), axis=0, ignore_index=True)
     ], axis=1)
 
-    return df[df.aa_ref != df.aa_alt].set_index('triplet_ref').rename(columns={
+    return _sort_codon_sub_table(df[df.aa_ref != df.aa_alt].set_index('triplet_ref').rename(columns={
         'triplet_alt': 'alt',
         'aa_ref': 'ref_aa',
         'aa_alt': 'alt_aa'
-    })
+    }))
 
 
-def get_fast_aa_subs(aa_sub_table: pd.DataFrame, frame: int, seq: str) -> pd.DataFrame:
-    seq_len: int = len(seq)
+@lru_cache(maxsize=8)
+def build_const_codon_sub_table(codon_table: CodonTable, strand: str, aa: str) -> pd.DataFrame:
+    """Replace all triplets with the top-ranking codon of an amino acid (or stop)"""
 
-    # Get longest in-frame CDS subsequence
-    start, end = get_inner_cds_relative_boundaries(seq_len, frame)
+    codon: str = (
+        codon_table.get_top_ranking_codon(aa) if strand == '+' else
+        codon_table.get_top_ranking_codon_rc(aa)
+    )
+    mask: np.ndarray = np.array(TRIPLETS) != codon
+    n: int = int(mask.sum())
+    amino_acid_symbols: List[str] = codon_table.amino_acid_symbols
 
-    # Obtain reference triplets and relative positions
-    df: pd.DataFrame = pd.DataFrame.from_records(
-        [(seq[i:i + 3], i) for i in range(start, 3 * (end // 3), 3)],
-        columns=['triplet', 'pos'])
-    df.triplet = as_triplets(df.triplet)
-    df.pos = df.pos.astype(np.int32)
+    return pd.DataFrame({
+        'alt': as_triplets([codon]).repeat(n),
+        'ref_aa': get_triplet_amino_acids(codon_table, strand)[mask],
+        'alt_aa': as_amino_acids([aa], amino_acid_symbols).repeat(n)
+    }, index=pd.CategoricalIndex(as_triplets(TRIPLETS)[mask], name='triplet_ref'))
 
-    # Join alternative triplets and amino acid change information
-    df = df.set_index('triplet', drop=True).join(aa_sub_table).reset_index()
 
-    # Render mutated sequences
-    df['mseq'] = _get_snvre_mseq(seq, df)
+def _gather_groups(offsets: np.ndarray, groups: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Get the rows of the selected groups (in order) and the size of each group"""
 
-    # Add variant type
-    df['var_type'] = np.int8(VariantType.SUBSTITUTION.value)
+    group_starts: np.ndarray = offsets[groups]
+    group_lengths: np.ndarray = offsets[groups + 1] - group_starts
+    n: int = int(group_lengths.sum())
+    rows: np.ndarray = (
+        np.arange(n, dtype=np.int64)
+        + np.repeat(group_starts - (np.cumsum(group_lengths) - group_lengths), group_lengths)
+    )
+    return rows, group_lengths
+
+
+def _get_inner_triplet_codes(frame: int, seq: str) -> Tuple[np.ndarray, np.ndarray]:
+    """Get the relative positions and codes of the triplets fully included in the target"""
+
+    start, end = get_inner_cds_relative_boundaries(len(seq), frame)
+    if end <= start:
+        return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int64)
+    return (
+        np.arange(start, end, 3, dtype=np.int32),
+        get_triplet_codes(encode_dna(seq[start:end])).astype(np.int64)
+    )
+
+
+def get_fast_codon_subs(codon_sub_table: pd.DataFrame, frame: int, seq: str) -> pd.DataFrame:
+    """
+    Get the codon substitutions of all in-frame triplets
+
+    codon_sub_table: build_aa_sub_table or build_const_codon_sub_table
+    """
 
-    return df.rename(columns={
-        'triplet': 'ref',
-        'pos': 'mut_position',
-        'alt': 'new'
+    # Locate the substitutions of each triplet
+    codon_positions, triplet_codes = _get_inner_triplet_codes(frame, seq)
+    offsets: np.ndarray = np.searchsorted(
+        codon_sub_table.index.codes, np.arange(TRIPLET_COUNT + 1))
+    rows, group_lengths = _gather_groups(offsets, triplet_codes)
+
+    # Gather the substitutions
+    subs: pd.DataFrame = codon_sub_table.take(rows)
+    return pd.DataFrame({
+        'var_type': np.repeat(np.int8(VariantType.SUBSTITUTION.value), rows.shape[0]),
+        'mut_position': np.repeat(codon_positions, group_lengths),
+        'ref': subs.index.values,
+        'new': subs.alt.values,
+        'ref_aa': subs.ref_aa.values,
+        'alt_aa': subs.alt_aa.values
     })
 
 
 def _build_base_snv_table() -> pd.DataFrame:
+
+    # Group the substitutions by triplet code (as required by the SNV lookup)
     data = pd.DataFrame.from_records([
         (t, *res)
         for t in TRIPLETS
@@ -225,23 +288,33 @@ def get_fast_exon_snv(
     if cds_seq_len != len(genomic_range) + cds_prefix_length + cds_suffix_length:
         raise ValueError("Inconsistent CDS sequence and boundaries!")
 
-    # Assemble SNV table
-    df: pd.DataFrame = snv_table.loc[[
-        cds_seq[i:i + 3]
-        for i in range(0, cds_seq_len, 3)
-    ]]
+    # Locate the SNV's of each triplet (rows sorted by triplet code)
+    triplet_codes: np.ndarray = get_triplet_codes(encode_dna(cds_seq))
+    rows: np.ndarray = (
+        SNV_PER_TRIPLET * triplet_codes.astype(np.int64)[:, np.newaxis]
+        + np.arange(SNV_PER_TRIPLET, dtype=np.int64)[np.newaxis, :]
+    )
 
     # Adjust SNV positions
-    df.pos += (
-        np.arange(0, df.shape[0] // 3, step=3, dtype=np.int32).repeat(9)
+    pos: np.ndarray = (
+        snv_table.pos.to_numpy()[rows]
+        + np.arange(0, cds_seq_len, 3, dtype=np.int32)[:, np.newaxis]
         + np.int32(genomic_range.start - cds_prefix_length)
-    )
+    ).ravel()
+    rows = rows.ravel()
 
     # Filter out SNV's exceeding the target range
-    if cds_prefix_length > 0:
-        df = df.loc[df.pos >= np.int32(genomic_range.start)]
-    if cds_suffix_length > 0:
-        df = df.loc[df.pos <= np.int32(genomic_range.end)]
+    if cds_prefix_length > 0 or cds_suffix_length > 0:
+        mask: np.ndarray = (
+            (pos >= np.int32(genomic_range.start)) &
+            (pos <= np.int32(genomic_range.end))
+        )
+        rows = rows[mask]
+        pos = pos[mask]
+
+    # Assemble SNV table
+    df: pd.DataFrame = snv_table.take(rows)
+    df.pos = pos
 
     return df.reset_index(drop=True) if reset_index else df
 
@@ -331,81 +404,76 @@ def _get_top_syn_from_non_snvs(syn_top_df: pd.DataFrame, snvs: pd.DataFrame) ->
     return _get_syn_from_snvs(syn_top_df, snvs, non_code)
 
 
-def _get_snvre_mseq(seq: str, snvre_meta: pd.DataFrame) -> pd.Series:
-    def f(item) -> str:
-        pos: int = int(item.pos)
-        return f"{seq[:pos]}{item.alt}{seq[pos + 3:]}" if pos > 0 else f"{item.alt}{seq[3:]}"
-
-    return snvre_meta[['pos', 'alt']].apply(f, axis=1).astype('string')
-
-
-def get_fast_snvre(
+def build_codon_snvre_table(
+    snv_table: pd.DataFrame,
     syn_df: pd.DataFrame,
-    syn_top_df: pd.DataFrame,
-    genomic_range: GenomicRange,
-    frame: int,
-    seq: str,
-    snvs: pd.DataFrame
-) -> pd.DataFrame:
+    syn_top_df: pd.DataFrame
+) -> Tuple[pd.DataFrame, np.ndarray]:
     """
-    Get SNVRE variants as a dataframe given a SNV variant dataframe
+    Pre-compute the SNVRE codon replacements of all reference triplets
 
-    Auxiliary tables syn_df and syn_top_df are computed once per run.
+    The replacements are grouped by mutation type and reference triplet code,
+    group g = mutation type * 64 + triplet code spanning rows offsets[g] to offsets[g + 1].
 
+    snv_table: build_snv_table
     syn_df: get_all_syn_codons
     syn_top_df: get_top_syn_codons
-    snvs: get_fast_exon_snv(..., reset_index=False)
     """
 
-    if not isinstance(snvs.index, pd.CategoricalIndex):
-        raise ValueError("Invalid index for SNV metadata table!")
-
-    start_pos: int = genomic_range.start
-    end_pos: int = genomic_range.end
+    snvs: pd.DataFrame = snv_table[SNV_SYN_FIELDS].copy()
 
-    snvs_local: pd.DataFrame = snvs[SNV_SYN_FIELDS].copy()
+    # Replacements of a triplet do not depend on the SNV position within it
+    snvs.pos = np.int32(0)
 
-    # Filter out SNV's that belong to triplets exceeding the target
-    inner_cds_start: int = start_pos if frame == 0 else (start_pos + 3 - frame)
-    if inner_cds_start != start_pos:
-        snvs_local = snvs_local[snvs_local.pos >= np.int32(inner_cds_start)]
-    inner_cds_end: int = end_pos - ((end_pos - inner_cds_start + 1) % 3)
-    if inner_cds_end != end_pos:
-        if inner_cds_end < start_pos:
-            return pd.DataFrame([])
-        snvs_local = snvs_local[snvs_local.pos <= np.int32(inner_cds_end)]
+    meta: pd.DataFrame = pd.concat([
+        mut_type_meta
+        for mut_type_meta in [
+            _get_all_syn_from_syn_snvs(syn_df, snvs),
+            _get_top_syn_from_mis_snvs(syn_top_df, snvs),
+            _get_top_syn_from_non_snvs(syn_top_df, snvs)
+        ]
+        if mut_type_meta.shape[0] != 0
+    ], ignore_index=True).drop_duplicates().drop('pos', axis=1)
 
-    # Get synonymous mutations
-    syn_meta: pd.DataFrame = _get_all_syn_from_syn_snvs(syn_df, snvs_local)
+    # Sort replacements by group (preserving the order within each group)
+    groups: np.ndarray = (
+        meta.mut_type.to_numpy().astype(np.int64) * TRIPLET_COUNT
+        + meta.ref.cat.codes.to_numpy()
+    )
+    order: np.ndarray = np.argsort(groups, kind='stable')
+    offsets: np.ndarray = np.searchsorted(
+        groups[order], np.arange(3 * TRIPLET_COUNT + 1, dtype=np.int64))
 
-    # Get top-ranking missense mutation
-    mis_meta: pd.DataFrame = _get_top_syn_from_mis_snvs(syn_top_df, snvs_local)
+    return meta.take(order).reset_index(drop=True), offsets
 
-    # Get top-ranking nonsense mutation
-    non_meta: pd.DataFrame = _get_top_syn_from_non_snvs(syn_top_df, snvs_local)
 
-    # Merge SNVRE mutations
-    meta = pd.concat([
-        mut_type_meta
-        for mut_type_meta in [syn_meta, mis_meta, non_meta]
-        if mut_type_meta.shape[0] != 0
-    ], ignore_index=True)
-
-    # TODO: to remove when oligonucleotide names will be generated from metadata directly
-    meta.pos -= np.int32(start_pos)
+def get_fast_snvre(
+    codon_snvres: pd.DataFrame,
+    codon_snvre_offsets: np.ndarray,
+    frame: int,
+    seq: str
+) -> pd.DataFrame:
+    """
+    Get SNVRE variants as a dataframe
 
-    # Convert parent SNV positions to SNVRE positions
-    offset: int = (3 - frame) if frame > 0 else 0
-    meta.pos = pd.Series((
-        (offset + 3 * ((meta.pos - offset) // 3)) if offset > 0 else
-        (3 * (meta.pos // 3))
-    ), dtype=np.int32)
+    Auxiliary tables codon_snvres and codon_snvre_offsets are computed once per run.
 
-    # Drop duplicate alternative codons
-    meta = meta.drop_duplicates().reset_index(drop=True)
+    codon_snvres, codon_snvre_offsets: build_codon_snvre_table
+    """
 
-    # Render triplet replacements
-    meta['mseq'] = _get_snvre_mseq(seq, meta)
+    # Locate the replacements of each triplet by mutation type
+    codon_positions, triplet_codes = _get_inner_triplet_codes(frame, seq)
+    if triplet_codes.shape[0] == 0:
+        return pd.DataFrame([])
+    groups: np.ndarray = (
+        np.array([syn_code, mis_code, non_code], dtype=np.int64)[:, np.newaxis] * TRIPLET_COUNT
+        + triplet_codes[np.newaxis, :]
+    ).ravel()
+    rows, group_lengths = _gather_groups(codon_snvre_offsets, groups)
+
+    # Gather the replacements
+    meta: pd.DataFrame = codon_snvres.take(rows).reset_index(drop=True)
+    meta.insert(0, 'pos', np.repeat(np.tile(codon_positions, 3), group_lengths))
 
     # Add variant type
     meta['var_type'] = np.int8(VariantType.SUBSTITUTION.value)
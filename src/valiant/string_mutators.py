@@ -107,11 +107,3 @@ def insert_nucleotides(seq: str, offset: int, alt: str) -> str:
     if offset > n:
         raise ValueError("Insertion out of range!")
     return f"{seq[:offset]}{alt}{seq[offset:]}" if offset < n else (seq + alt)
-
-
-def replace_codons_const(seq: str, offset: int, codon: str) -> List[Tuple[int, str, str, str]]:
-    return [
-        (i, seq[i:i + 3], codon, f"{seq[:i]}{codon}{seq[i + 3:]}")
-        for i in range(offset, offset + (3 * ((len(seq) - offset) // 3)), 3)
-        if seq[i:i + 3] != codon
-    ]
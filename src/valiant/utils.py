@@ -35,13 +35,25 @@ from functools import lru_cache
 import os
 import pathlib
 import re
-from typing import List, Type, Tuple
+from typing import Iterable, List, Type, Tuple
 import numpy as np
 import pandas as pd
+from .constants import DNA_ALPHABET
 
 dna_complement_tr_table = str.maketrans('ACGT', 'TGCA')
 dna_re = re.compile('^[ACGT]+$')
 
+# Nucleotide codes (alphabet order), any other symbol being encoded as unknown
+NT_UNKNOWN: int = 255
+nt_codes: np.ndarray = np.arange(len(DNA_ALPHABET), dtype=np.uint8)
+nt_encoding_table: np.ndarray = np.full(256, NT_UNKNOWN, dtype=np.uint8)
+nt_encoding_table[np.frombuffer(DNA_ALPHABET.encode('ascii'), dtype=np.uint8)] = nt_codes
+nt_decoding_table: np.ndarray = np.frombuffer(DNA_ALPHABET.encode('ascii'), dtype=np.uint8)
+
+# Triplet codes (0-63, following the order of the triplet list)
+TRIPLET_COUNT: int = len(DNA_ALPHABET) ** 3
+triplet_code_weights: np.ndarray = np.array([16, 4, 1], dtype=np.uint8)
+
 i8_0: np.int8 = np.int8(0)
 i8_1: np.int8 = np.int8(1)
 i8_2: np.int8 = np.int8(2)
@@ -71,10 +83,69 @@ def get_region(chromosome: str, start: int, end: int) -> str:
     return f"{chromosome}:{start}-{end}"
 
 
+def merge_regions(regions: Iterable[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    merged: List[Tuple[int, int]] = []
+    for start, end in sorted(regions):
+
+        # Merge overlapping and adjacent regions (one-based, end included)
+        if merged and start <= merged[-1][1] + 1:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+
+    return merged
+
+
+def get_contained_intervals(
+    region_starts: np.ndarray,
+    region_ends: np.ndarray,
+    starts: np.ndarray,
+    ends: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    # Sort intervals (zero-based, end excluded) by start
+    order: np.ndarray = np.argsort(starts, kind='stable')
+
+    # Find the intervals starting within each region
+    sorted_starts: np.ndarray = starts[order]
+    lo: np.ndarray = np.searchsorted(sorted_starts, region_starts, side='left')
+    hi: np.ndarray = np.searchsorted(sorted_starts, region_ends, side='left')
+    counts: np.ndarray = np.maximum(hi - lo, 0)
+
+    # Expand the candidate region-interval pairs
+    region_indices: np.ndarray = np.repeat(np.arange(region_starts.shape[0]), counts)
+    offsets: np.ndarray = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    indices: np.ndarray = order[np.repeat(lo, counts) + offsets]
+
+    # Retain the intervals ending within each region
+    mask: np.ndarray = ends[indices] <= region_ends[region_indices]
+    return region_indices[mask], indices[mask]
+
+
 def reverse_complement(seq: str) -> str:
     return seq[::-1].translate(dna_complement_tr_table)
 
 
+def get_sequence_bytes(seq: str) -> np.ndarray:
+    return np.frombuffer(seq.encode('ascii'), dtype=np.uint8)
+
+
+def encode_dna(seq: str) -> np.ndarray:
+    return nt_encoding_table[get_sequence_bytes(seq)]
+
+
+def decode_dna(seq_codes: np.ndarray) -> str:
+    return nt_decoding_table[seq_codes].tobytes().decode('ascii')
+
+
+def get_triplet_codes(seq_codes: np.ndarray) -> np.ndarray:
+    if seq_codes.shape[0] % 3 != 0:
+        raise ValueError("The sequence length must be a multiple of three!")
+    if (seq_codes == NT_UNKNOWN).any():
+        raise ValueError("Invalid nucleotide in sequence!")
+    return seq_codes.reshape(-1, 3) @ triplet_code_weights
+
+
 def parse_list(s: str) -> List[str]:
     return [
         item for item in [
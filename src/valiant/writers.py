@@ -31,21 +31,25 @@
 # legal@sanger.ac.uk. Contact details are: legal@sanger.ac.uk quoting reference Valiant-software.
 #############################
 
-import csv
-from typing import Iterable, List
+from hashlib import blake2b
+from typing import List, Set, TextIO, Union
 import pandas as pd
 
 
-def write_reference_sequences(rows: Iterable[List[str]], fp: str) -> None:
-    with open(fp, 'w') as fh:
-        writer = csv.writer(fh)
-        for row in rows:
-            writer.writerow(row)
+def write_oligo_metadata(df: pd.DataFrame, fp: Union[str, TextIO], header: bool = True) -> None:
+    df.to_csv(fp, index=False, header=header)
 
 
-def write_oligo_metadata(df: pd.DataFrame, fp: str) -> None:
-    df.to_csv(fp, index=False)
+def write_oligo_unique(df: pd.DataFrame, fp: Union[str, TextIO], header: bool = True) -> None:
+    df.to_csv(fp, index=False, header=header)
 
 
-def write_oligo_unique(df: pd.DataFrame, fp: str) -> None:
-    df.to_csv(fp, index=False)
+def get_unique_oligos(df: pd.DataFrame, digests: Set[bytes]) -> pd.DataFrame:
+    """Filter out the oligonucleotides whose sequence was already seen (by digest)"""
+
+    mask: List[bool] = []
+    for mseq in df.mseq:
+        digest: bytes = blake2b(mseq.encode('ascii'), digest_size=16).digest()
+        mask.append(digest not in digests)
+        digests.add(digest)
+    return df[mask]
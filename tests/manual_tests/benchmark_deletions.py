@@ -0,0 +1,101 @@
+########## LICENCE ##########
+# VaLiAnT, (c) 2020, GRL (the "Software")
+# 
+# The Software remains the property of Genome Research Ltd ("GRL").
+# 
+# The Software is distributed "AS IS" under this Licence solely for non-commercial use in the hope that it will be useful,
+# but in order that GRL as a charitable foundation protects its assets for the benefit of its educational and research
+# purposes, GRL makes clear that no condition is made or to be implied, nor is any warranty given or to be implied, as to
+# the accuracy of the Software, or that it will be suitable for any particular purpose or for use under any specific
+# conditions. Furthermore, GRL disclaims all responsibility for the use which is made of the Software. It further
+# disclaims any liability for the outcomes arising from using  the Software.
+# 
+# The Licensee agrees to indemnify GRL and hold GRL harmless from and against any and all claims, damages and liabilities
+# asserted by third parties (including claims for negligence) which arise directly or indirectly from the use of the
+# Software or the sale of any products based on the Software.
+# 
+# No part of the Software may be reproduced, modified, transmitted or transferred in any form or by any means, electronic
+# or mechanical, without the express permission of GRL. The permission of GRL is not required if the said reproduction,
+# modification, transmission or transference is done without financial return, the conditions of this Licence are imposed
+# upon the receiver of the product, and all original and amended source code is included in any transmitted product. You
+# may be held legally responsible for any copyright infringement that is caused or encouraged by your failure to abide by
+# these terms and conditions.
+# 
+# You are not permitted under this Licence to use this Software commercially. Use for which any financial return is
+# received shall be defined as commercial use, and includes (1) integration of all or part of the source code or the
+# Software into a product for sale or license by or on behalf of Licensee to third parties or (2) use of the Software
+# or any derivative of it for research with the final aim of developing software products for sale or license to a third
+# party or (3) use of the Software or any derivative of it for research with the final aim of developing non-software
+# products for sale or license to a third party, or (4) use of the Software to provide any service to an external
+# organisation for which payment is received. If you are interested in using the Software commercially, please contact
+# legal@sanger.ac.uk. Contact details are: legal@sanger.ac.uk quoting reference Valiant-software.
+#############################
+
+
+import random
+import sys
+import timeit
+import numpy as np
+import pandas as pd
+from valiant.array_mutators import render_mutated_sequences
+from valiant.enums import VariantType
+from valiant.models.targeton import get_deletion_mutations
+from valiant.string_mutators import delete_1, delete_non_overlapping_2, delete_non_overlapping_3
+
+
+TARGETON_LENGTHS = [200, 5000]
+
+MUTATORS = [
+    ('1del', 1, 0, delete_1),
+    ('2del0', 2, 0, lambda seq: delete_non_overlapping_2(seq, 0)),
+    ('2del1', 2, 1, lambda seq: delete_non_overlapping_2(seq, 1)),
+    ('inframe', 3, 0, delete_non_overlapping_3)
+]
+
+
+def get_random_sequence(length, seed=0):
+    rnd = random.Random(seed)
+    return ''.join(rnd.choice('ACGT') for _ in range(length))
+
+
+def run_object_engine(seq, f):
+    mutations = f(seq)
+    df = pd.DataFrame.from_records([
+        (VariantType.DELETION.value, i, ref, None)
+        for i, ref, _ in mutations
+    ], columns=['var_type', 'mut_position', 'ref', 'new'])
+    df.var_type = df.var_type.astype(np.int8)
+    df.mut_position = df.mut_position.astype(np.int32)
+    df.ref = df.ref.astype('category')
+    df.new = df.new.astype('category')
+    df['mseq'] = pd.array([mseq for _, _, mseq in mutations], dtype='string')
+    return df
+
+
+def run_array_engine(seq, count, offset):
+    df = get_deletion_mutations(seq, count, offset=offset).df
+    df['mseq'] = pd.array(render_mutated_sequences(
+        seq, df.mut_position.to_numpy(), df.ref, df.new), dtype='string')
+    return df
+
+
+def benchmark(number):
+    print("mutator\tlength\tobject (ms)\tarray (ms)\tspeed-up")
+    for length in TARGETON_LENGTHS:
+        seq = get_random_sequence(length)
+        for name, count, offset, f in MUTATORS:
+
+            # Check the engines agree
+            exp = run_object_engine(seq, f)
+            res = run_array_engine(seq, count, offset)
+            assert res.mut_position.tolist() == exp.mut_position.tolist()
+            assert res.ref.astype(str).tolist() == exp.ref.astype(str).tolist()
+            assert res.mseq.tolist() == exp.mseq.tolist()
+
+            t_obj = timeit.timeit(lambda: run_object_engine(seq, f), number=number) / number
+            t_arr = timeit.timeit(lambda: run_array_engine(seq, count, offset), number=number) / number
+            print(f"{name}\t{length}\t{t_obj * 1000:.3f}\t{t_arr * 1000:.3f}\t{t_obj / t_arr:.1f}x")
+
+
+if __name__ == '__main__':
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
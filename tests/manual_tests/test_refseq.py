@@ -34,12 +34,12 @@
 import logging
 import sys
 from valiant.models.base import GenomicRange
-from valiant.models.refseq_repository import ReferenceSequenceRepository, fetch_reference_sequences, get_fasta_file
+from valiant.models.reference_file import open_reference_file
+from valiant.models.refseq_repository import ReferenceSequenceRepository
 
 
 def test_reference_sequence_retrieval(ref_fp):
     ref = ReferenceSequenceRepository()
-    fasta_file = get_fasta_file(ref_fp)
 
     chromosome = 'X'
     start = 41341615
@@ -55,8 +55,8 @@ def test_reference_sequence_retrieval(ref_fp):
     assert seq is None
 
     # Retrieve sequences for all regions
-    ref.fetch_sequences(fasta_file)
-    fasta_file.close()
+    with open_reference_file(ref_fp) as reference:
+        ref.fetch_sequences(reference)
 
     # Check the sequence has been retrieved
     seq = ref.get_sequence(*r)
@@ -67,7 +67,6 @@ def test_reference_sequence_retrieval(ref_fp):
 
 def test_reference_subsequence(ref_fp):
     ref = ReferenceSequenceRepository()
-    fasta_file = get_fasta_file(ref_fp)
 
     chromosome = 'X'
     strand = '+'
@@ -77,7 +76,8 @@ def test_reference_subsequence(ref_fp):
     ref_range = GenomicRange(chromosome, start, end, strand)
 
     ref.register_genomic_range(ref_range)
-    ref.fetch_sequences(fasta_file)
+    with open_reference_file(ref_fp) as reference:
+        ref.fetch_sequences(reference)
     seq = ref.get_genomic_range_sequence(ref_range)
     offset = 10
     pre = ref.get_genomic_range_subsequence(ref_range, start, start + offset)
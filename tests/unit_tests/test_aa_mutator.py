@@ -33,7 +33,7 @@
 
 import pytest
 from valiant.models.codon_table import STOP_CODE
-from valiant.snv import build_aa_sub_table, get_fast_aa_subs
+from valiant.snv import build_aa_sub_table, get_fast_codon_subs
 from .utils import load_codon_table, get_aux_tables
 
 codon_table = load_codon_table()
@@ -59,6 +59,6 @@ all_aa_table = aux.all_aa_table
 @pytest.mark.parametrize('strand', ['+', '-'])
 def test_get_fast_aa_subs(seq, frame, prefix, suffix, strand):
     seq_ = ('T' * prefix) + seq + ('T' * suffix)
-    df = get_fast_aa_subs(
+    df = get_fast_codon_subs(
         all_aa_table._strand_table[strand], frame, seq_)
     assert not df.ref.isna().any()
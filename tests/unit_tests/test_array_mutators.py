@@ -0,0 +1,84 @@
+########## LICENCE ##########
+# VaLiAnT, (c) 2020, GRL (the "Software")
+# 
+# The Software remains the property of Genome Research Ltd ("GRL").
+# 
+# The Software is distributed "AS IS" under this Licence solely for non-commercial use in the hope that it will be useful,
+# but in order that GRL as a charitable foundation protects its assets for the benefit of its educational and research
+# purposes, GRL makes clear that no condition is made or to be implied, nor is any warranty given or to be implied, as to
+# the accuracy of the Software, or that it will be suitable for any particular purpose or for use under any specific
+# conditions. Furthermore, GRL disclaims all responsibility for the use which is made of the Software. It further
+# disclaims any liability for the outcomes arising from using  the Software.
+# 
+# The Licensee agrees to indemnify GRL and hold GRL harmless from and against any and all claims, damages and liabilities
+# asserted by third parties (including claims for negligence) which arise directly or indirectly from the use of the
+# Software or the sale of any products based on the Software.
+# 
+# No part of the Software may be reproduced, modified, transmitted or transferred in any form or by any means, electronic
+# or mechanical, without the express permission of GRL. The permission of GRL is not required if the said reproduction,
+# modification, transmission or transference is done without financial return, the conditions of this Licence are imposed
+# upon the receiver of the product, and all original and amended source code is included in any transmitted product. You
+# may be held legally responsible for any copyright infringement that is caused or encouraged by your failure to abide by
+# these terms and conditions.
+# 
+# You are not permitted under this Licence to use this Software commercially. Use for which any financial return is
+# received shall be defined as commercial use, and includes (1) integration of all or part of the source code or the
+# Software into a product for sale or license by or on behalf of Licensee to third parties or (2) use of the Software
+# or any derivative of it for research with the final aim of developing software products for sale or license to a third
+# party or (3) use of the Software or any derivative of it for research with the final aim of developing non-software
+# products for sale or license to a third party, or (4) use of the Software to provide any service to an external
+# organisation for which payment is received. If you are interested in using the Software commercially, please contact
+# legal@sanger.ac.uk. Contact details are: legal@sanger.ac.uk quoting reference Valiant-software.
+#############################
+
+import pytest
+from valiant.array_mutators import get_non_overlapping_deletions, replace_single_nucleotides
+from valiant.models.targeton import get_deletion_mutations, get_snv_mutations
+from valiant.string_mutators import (
+    delete_1,
+    delete_non_overlapping_2,
+    delete_non_overlapping_3,
+    replace_single_nucleotides as replace_single_nucleotides_str
+)
+from valiant.utils import encode_dna
+from .constants import DNA_ALPHABET_SET
+from .utils import render_mseqs
+
+
+@pytest.mark.parametrize('seq', ['CC', 'AAA', 'ACGTTGCA'])
+def test_replace_single_nucleotides(seq):
+    positions, alt_codes = replace_single_nucleotides(encode_dna(seq))
+
+    # Validate positions and alternative nucleotides
+    assert positions.tolist() == sorted(i for i in range(len(seq)) for _ in range(3))
+    assert all(seq[i] != 'ACGT'[nt] for i, nt in zip(positions, alt_codes))
+
+
+@pytest.mark.parametrize('seq', ['CC', 'AAA', 'ACGTTGCA'])
+def test_get_snv_mutations(seq):
+    df = get_snv_mutations(seq).df
+
+    # Compare with the string mutator
+    assert set(zip(
+        df.mut_position.tolist(),
+        df.ref.astype(str),
+        df.new.astype(str),
+        render_mseqs(seq, df)
+    )) == set(replace_single_nucleotides_str(seq, DNA_ALPHABET_SET))
+
+
+@pytest.mark.parametrize('seq', ['', 'A', 'AAATTT', 'ACGTTGCA'])
+@pytest.mark.parametrize('count,offset,f', [
+    (1, 0, delete_1),
+    (2, 0, lambda seq: delete_non_overlapping_2(seq, 0)),
+    (2, 1, lambda seq: delete_non_overlapping_2(seq, 1)),
+    (3, 0, delete_non_overlapping_3)
+])
+def test_get_non_overlapping_deletions(seq, count, offset, f):
+    positions, refs = get_non_overlapping_deletions(seq, count, offset=offset)
+    df = get_deletion_mutations(seq, count, offset=offset).df
+
+    # Compare with the string mutator
+    exp = f(seq)
+    assert list(zip(positions.tolist(), list(refs))) == [(i, ref) for i, ref, _ in exp]
+    assert render_mseqs(seq, df) == [mseq for _, _, mseq in exp]
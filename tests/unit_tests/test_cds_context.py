@@ -75,31 +75,50 @@ def test_cds_context_repository_register_target_ranges():
     assert ccr._target_ranges == ranges
 
 
-def test_cds_context_repository_get_cds_by_index():
-    chromosome, strand, start, end, _, transcript_id, _, exon_index = CDS_RANGES[0]
-    ccr = CDSContextRepository(PyRanges(df=CDS_RANGES_DF))
-    gr = ccr.get_cds_by_index(transcript_id, exon_index)
-
-    assert gr.chromosome == chromosome
-    assert gr.strand == strand
-    assert gr.start == start
-    assert gr.end == end
+def get_cds_context_repository(cds_ranges_df, gr):
+    target_ranges = PyRanges(df=pd.DataFrame.from_records([
+        gr.as_pyrange()
+    ], columns=PYRANGES_FIELDS))
+    target_ranges.is_const = False
 
-    with pytest.raises(Exception):
-        ccr.get_cds_by_index(transcript_id, 999)
+    ccr = CDSContextRepository(PyRanges(df=cds_ranges_df))
+    ccr.register_target_ranges(target_ranges)
+    return ccr
 
 
-@pytest.mark.parametrize('strand,len5p,len3p,exp_cds_pre,exp_cds_suf', [
-    ('+', 0, 0, None, None)
+@pytest.mark.parametrize('start,end,exp_ext_5,exp_ext_3', [
+    (200, 207, (119, 120), (300, 301)),
+    (201, 207, None, (300, 301)),
+    (200, 205, (119, 120), (206, 206))
 ])
-def test_cds_context_repository_get_cds_genomic_ranges(strand, len5p, len3p, exp_cds_pre, exp_cds_suf):
-    transcript_id = TID
-    exon_index = 1
-    ccr = CDSContextRepository(PyRanges(df=CDS_RANGES_DF))
-    cds_pre, cds_suf = ccr.get_cds_genomic_ranges(transcript_id, strand, exon_index, GR, 0, 0, len5p, len3p)
+def test_cds_context_repository_get_cds_extensions(start, end, exp_ext_5, exp_ext_3):
+    gr = GenomicRange('X', start, end, '+')
+    ccr = get_cds_context_repository(CDS_RANGES_DF, gr)
+    ccr.compute_cds_contexts()
+
+    # Check CDS extensions (from the same or the adjacent exons)
+    assert ccr.get_cds_extensions(gr) == (
+        GenomicRange('X', *exp_ext_5, '+') if exp_ext_5 else None,
+        GenomicRange('X', *exp_ext_3, '+') if exp_ext_3 else None
+    )
+    assert ccr.get_all_cds_extensions() == set(
+        GenomicRange('X', *ext, '+') for ext in [exp_ext_5, exp_ext_3] if ext)
+
+
+def test_cds_context_repository_get_cds_extensions_not_found():
+    gr = GenomicRange('X', 200, 207, '+')
+    ccr = get_cds_context_repository(CDS_RANGES_DF.iloc[:2], gr)
+
+    with pytest.raises(RuntimeError, match='not found'):
+        ccr.compute_cds_contexts()
 
-    assert cds_pre == exp_cds_pre
-    assert cds_suf == exp_cds_suf
+
+def test_cds_context_repository_get_cds_extensions_not_unique():
+    gr = GenomicRange('X', 200, 207, '+')
+    ccr = get_cds_context_repository(pd.concat([CDS_RANGES_DF, CDS_RANGES_DF.iloc[:1]]), gr)
+
+    with pytest.raises(RuntimeError, match='not unique'):
+        ccr.compute_cds_contexts()
 
 
 @pytest.mark.parametrize('start,end,exp_ext_5,exp_ext_3', [
@@ -126,8 +145,9 @@ def test_cds_context_repository_compute_cds_contexts(start, end, exp_ext_5, exp_
     ccr.compute_cds_contexts()
 
     # Check CDS contexts
-    assert len(ccr._target_cds_contexts) == 1
-    exon_info, (ext_5, ext_3) = ccr._target_cds_contexts[gr]
+    assert len(ccr._target_indices) == 1
+    exon_info = ccr.get_exon_info(gr)
+    ext_5, ext_3 = ccr.get_cds_extensions(gr)
 
     # Check exon information
     assert isinstance(exon_info, ExonInfo)
@@ -149,3 +169,31 @@ def test_cds_context_repository_compute_cds_contexts(start, end, exp_ext_5, exp_
     assert ccr.get_cds_extensions(gr) == (ext_5, ext_3)
     assert ccr.get_exon_info(gr) == exon_info
     assert ccr.get_transcript_info(gr) == exon_info.transcript_info
+
+
+@pytest.mark.parametrize('transcript_tag,transcript_id,exp_transcript_id', [
+    (None, None, 'T2'),
+    ('MANE_Select', None, 'T1'),
+    ('MANE_Select', 'T2', 'T2'),
+    ('other', None, 'T2')
+])
+def test_cds_context_repository_compute_cds_contexts_multi(transcript_tag, transcript_id, exp_transcript_id):
+    cds_ranges = PyRanges(df=pd.DataFrame.from_records([
+        ('X', '+', 99, 120, GID, 'T1', 0, 0, 'basic,MANE_Select'),
+        ('X', '+', 99, 130, GID, 'T2', 0, 1, 'basic')
+    ], columns=PYRANGES_FIELDS + ['gene_id', 'transcript_id', 'frame', 'exon_index', 'tags']))
+
+    gr = GenomicRange('X', 100, 110, '+')
+    target_ranges = PyRanges(df=pd.DataFrame.from_records([
+        (*gr.as_pyrange(), False, 0)
+    ], columns=PYRANGES_FIELDS + ['is_const', 'targeton_id']))
+
+    # Compute CDS contexts
+    ccr = CDSContextRepository(cds_ranges)
+    ccr.register_target_ranges(target_ranges, transcript_ids={0: transcript_id} if transcript_id else None)
+    ccr.compute_cds_contexts(transcript_tag=transcript_tag)
+
+    # Check the selected transcript
+    exon_info = ccr.get_exon_info(gr, transcript_id=transcript_id)
+    assert exon_info.transcript_id == exp_transcript_id
+    assert exon_info.exon_index == (0 if exp_transcript_id == 'T1' else 1)
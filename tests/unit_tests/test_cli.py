@@ -32,12 +32,19 @@
 #############################
 
 from contextlib import nullcontext
+import os
+import tempfile
 import pytest
-from valiant.cli import _load_codon_table, _load_gff_file, _load_pam_protection_vcf
+from valiant.cli import _load_codon_table, _load_gff_file, _load_pam_protection_vcf, generate_all_oligos
+from valiant.enums import TargetonMutator, VariantType
+from valiant.models.base import TranscriptInfo
 from valiant.models.codon_table import CodonTable
 from valiant.models.exon import AnnotationRepository
+from valiant.models.oligo_template import OligoTemplate, TargetonOligoSegment
+from valiant.models.options import Options
+from valiant.models.refseq_repository import ReferenceSequenceRepository
 from .constants import CODON_TABLE_FP, GTF_SINGLE, GTF_MULTI, PAM_VCF_FP
-from .utils import get_data_file_path
+from .utils import get_aux_tables, get_custom_variant_table, get_data_file_path, get_pam_protected_sequence, get_targeton
 
 
 def test_load_codon_table_default():
@@ -73,10 +80,21 @@ def test_load_gff_file_none():
 
 
 def test_load_gff_file_invalid():
-    with pytest.raises(SystemExit):
+    with tempfile.NamedTemporaryFile('w+', suffix='.gtf') as f:
+        f.write('X\tsrc\tCDS\t100\t120\t.\t+\t3\tgene_id "G1"; transcript_id "T1";\n')
+        f.flush()
+
+        with pytest.raises(SystemExit):
+
+            # Load invalid GTF (frame out of range)
+            _load_gff_file(f.name)
+
 
-        # Load invalid GTF
-        _load_gff_file(get_data_file_path(GTF_MULTI))
+def test_load_gff_file_multi():
+
+    # Load GTF with multiple transcripts per gene
+    annotation = _load_gff_file(get_data_file_path(GTF_MULTI))
+    assert annotation.cds is not None
 
 
 def test_load_gff_file_valid():
@@ -112,5 +130,51 @@ def test_load_pam_protection_vcf_valid():
 
     # Check PAM variant repository
     assert vr.sgrna_ids == sgrna_ids
-    assert len(vr._variants) == 4
+    assert len(vr._sgrna_variants) == 4
     assert len(vr._ranges) == 5
+
+
+def test_generate_all_oligos_parallel():
+    seq = 'ACGTTGCAAGCTAGCTTACGGATCCATGCA'
+    pam_ref_seq = get_pam_protected_sequence(seq, False)
+
+    ref = ReferenceSequenceRepository()
+    ref.register_genomic_range(pam_ref_seq.genomic_range)
+    ref.register_sequence('X', 1, len(seq), seq)
+
+    # Custom variants (duplicated across VCF aliases)
+    custom_variants = get_custom_variant_table([
+        (vcf_alias, f"{vcf_alias}_{i}", var_type, pos, ref, alt)
+        for vcf_alias in ['b', 'a']
+        for i, (var_type, pos, ref, alt) in enumerate([
+            *(
+                (VariantType.SUBSTITUTION, pos, seq[pos - 1], 'A' if seq[pos - 1] != 'A' else 'C')
+                for pos in range(2, len(seq) + 1)
+            ),
+            *((VariantType.DELETION, pos, seq[pos - 1:pos + 1], None) for pos in range(2, len(seq), 4)),
+            *((VariantType.INSERTION, pos, None, 'GG') for pos in range(3, len(seq), 5))
+        ])
+    ])
+
+    ot = OligoTemplate(
+        TranscriptInfo('GENE_ID', 'TRANSCRIPT_ID'),
+        pam_ref_seq,
+        set(),
+        custom_variants,
+        'AAAAAA',
+        'AAAAAA',
+        [TargetonOligoSegment(get_targeton(seq, False), {TargetonMutator.DEL1})])
+
+    def generate(threads, output):
+        generate_all_oligos(
+            threads, output, ref, get_aux_tables(), [ot, ot], 'homo sapiens', 'GRCh38', Options(False, 300))
+        return {
+            fn: open(os.path.join(output, fn)).read()
+            for fn in os.listdir(output)
+        }
+
+    # Check parallel generation matches serial generation
+    with tempfile.TemporaryDirectory() as serial_dir, tempfile.TemporaryDirectory() as parallel_dir:
+        serial_files = generate(1, serial_dir)
+        assert serial_files
+        assert generate(2, parallel_dir) == serial_files
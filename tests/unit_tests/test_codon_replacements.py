@@ -37,7 +37,7 @@ from valiant.enums import VariantType
 from valiant.models.base import GenomicRange
 from valiant.models.pam_protection import PamProtectedReferenceSequence
 from valiant.models.targeton import CDSTargeton
-from .utils import get_aux_tables, seq2triplets
+from .utils import get_aux_tables, render_mseqs, seq2triplets
 
 CONST_CODON_METHODS = {
     'A': 'get_ala_mutations',
@@ -67,7 +67,7 @@ def test_get_snvre_aa_mutations(aa, strand, seq, exp_mseq):
 
     # Check results
     assert mc.df.alt_aa.unique()[0] == aa
-    assert np.array_equal(mc.df.mseq.to_numpy(), np.array(exp_mseq))
+    assert render_mseqs(seq, mc.df) == exp_mseq
     assert mc.df.var_type.unique()[0] == sub_var_type
     assert np.array_equal(
         mc.df.ref.astype('string').to_numpy(),
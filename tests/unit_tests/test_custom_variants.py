@@ -35,8 +35,11 @@ import pandas as pd
 import pytest
 from valiant.enums import VariantType
 from valiant.models.base import GenomicPosition
-from valiant.models.custom_variants import CustomVariantMutation, CustomVariantMutationCollection
-from valiant.models.variant import CustomVariant, DeletionVariant, InsertionVariant, SubstitutionVariant
+from valiant.models.custom_variants import CustomVariantMutationCollection, CustomVariantOligoRenderer
+from valiant.models.variant import DeletionVariant, InsertionVariant, SubstitutionVariant
+from .utils import get_custom_variant_table, get_pam_protected_sequence, render_mseqs
+
+REF_SEQ = 'AAAAAAAAAA'
 
 deletion_variant = DeletionVariant(GenomicPosition('X', 5), 'A')
 insertion_variant = InsertionVariant(GenomicPosition('X', 5), 'C')
@@ -55,52 +58,25 @@ variant_mseqs = [
 ]
 
 
-@pytest.mark.parametrize('variant', variants)
-def test_custom_variant_mutation_init(variant):
-    seq = 'AAAAAAAAAA'
-    custom_variant = CustomVariant(variant, 'vcf_alias', 'VARIANT_ID')
-
-    # Initialise custom variant mutation
-    CustomVariantMutation(custom_variant, seq)
+def get_variant_record(variant, vcf_alias, vcf_var_id):
+    return (
+        vcf_alias,
+        vcf_var_id,
+        variant.type,
+        variant.genomic_position.position,
+        getattr(variant, 'ref', None),
+        getattr(variant, 'alt', None)
+    )
 
 
 @pytest.mark.parametrize('variant', variants)
-def test_custom_variant_mutation_to_row(variant):
-    seq = 'AAAAAAAAAA'
-    var_type = variant.type
-    custom_variant = CustomVariant(variant, 'vcf_alias', 'VARIANT_ID')
-
-    # Initialise custom variant mutation
-    cvm = CustomVariantMutation(custom_variant, seq)
-
-    # Check custom variant mutation
-    vcf_alias, vcf_variant_id, var_type_, pos, ref, alt, seq_ = cvm.to_row()
-    assert vcf_alias == custom_variant.vcf_alias
-    assert vcf_variant_id == custom_variant.vcf_variant_id
-    assert var_type_ == var_type.value
-    assert pos == custom_variant.base_variant.genomic_position.position
-
-    if var_type != VariantType.INSERTION:
-        assert ref == custom_variant.base_variant.ref
-    else:
-        assert ref is None
-
-    if var_type != VariantType.DELETION:
-        assert alt == custom_variant.base_variant.alt
-    else:
-        assert alt is None
-
-    assert seq_ == seq
-
-
-@pytest.mark.parametrize('variant,mseq', variant_mseqs)
-def test_custom_variant_mutation_collection_init(variant, mseq):
+def test_custom_variant_mutation_collection_init(variant):
     var_type = variant.type
     var_pos = variant.genomic_position.position
     var_ref = getattr(variant, 'ref', None)
     var_alt = getattr(variant, 'alt', None)
     df = pd.DataFrame.from_records([
-        ('VCF', 'ID', var_type.value, var_pos, var_ref, var_alt, mseq)
+        ('VCF', 'ID', var_type.value, var_pos, var_ref, var_alt)
     ])
 
     # Initialise mutation collection
@@ -111,23 +87,27 @@ def test_custom_variant_mutation_collection_init(variant, mseq):
 
 
 @pytest.mark.parametrize('variant,mseq', variant_mseqs)
-def test_custom_variant_mutation_collection_from_variants(variant, mseq):
+def test_custom_variant_mutation_collection_from_variant_table(variant, mseq):
     vcf_alias = 'vcf_alias'
     vcf_var_id = 'VARIANT_ID'
     var_type = variant.type
-    custom_variant = CustomVariant(variant, vcf_alias, vcf_var_id)
-    cvm = CustomVariantMutation(custom_variant, mseq)
 
     # Initialise mutation collection
-    cvmc = CustomVariantMutationCollection.from_variants([cvm])
+    cvmc = CustomVariantMutationCollection.from_variant_table(get_custom_variant_table([
+        get_variant_record(variant, vcf_alias, vcf_var_id)
+    ]))
 
     # Check data frame
     assert cvmc.df.shape[0] == 1
     var_row = cvmc.df.iloc[0]
     assert var_row.vcf_alias == vcf_alias
     assert var_row.vcf_var_id == vcf_var_id
+    assert var_row.var_type == var_type.value
     assert var_row.mut_position == variant.genomic_position.position
-    assert var_row.mseq == mseq
+
+    # Check mutated sequence (reference sequence starting at position one)
+    cvmc.df.mut_position -= 1
+    assert render_mseqs(REF_SEQ, cvmc.df) == [mseq]
 
     if var_type != VariantType.INSERTION:
         assert var_row.ref == variant.ref
@@ -138,3 +118,39 @@ def test_custom_variant_mutation_collection_from_variants(variant, mseq):
         assert var_row.new == variant.alt
     else:
         assert pd.isna(var_row.new)
+
+
+def test_custom_variant_mutation_collection_from_variant_table_sorted():
+    records = [
+        ('b', 'B_1', VariantType.SUBSTITUTION, 7, 'A', 'G'),
+        ('a', 'A_1', VariantType.SUBSTITUTION, 7, 'A', 'G'),
+        ('a', 'A_2', VariantType.DELETION, 3, 'AA', None),
+        ('a', 'A_3', VariantType.SUBSTITUTION, 3, 'A', 'C')
+    ]
+
+    # Initialise mutation collection
+    cvmc = CustomVariantMutationCollection.from_variant_table(get_custom_variant_table(records))
+
+    # Check the variants are sorted by position, type, alleles and source
+    assert cvmc.df.vcf_var_id.tolist() == ['A_2', 'A_3', 'A_1', 'B_1']
+    assert cvmc.df.index.tolist() == list(range(len(records)))
+
+    # Check the order does not depend on the order of the input table
+    assert cvmc.df.equals(CustomVariantMutationCollection.from_variant_table(
+        get_custom_variant_table(records[::-1])).df)
+
+
+def test_custom_variant_oligo_renderer_get_custom_oligo_names():
+    renderer = CustomVariantOligoRenderer(get_pam_protected_sequence(REF_SEQ, None), 'G1', 'T1', '', '')
+    cvmc = CustomVariantMutationCollection.from_variant_table(get_custom_variant_table([
+        get_variant_record(variant, f"vcf_{i}", None)
+        for i, variant in enumerate(variants)
+    ]))
+
+    # Check oligonucleotide names
+    names = dict(zip(cvmc.df.vcf_alias, renderer.get_custom_oligo_names(cvmc.df)))
+    assert names == {
+        'vcf_0': 'T1.G1_X:5_vcf_0',
+        'vcf_1': 'T1.G1_X:5_C_vcf_1',
+        'vcf_2': 'T1.G1_X:5_A>C_vcf_2'
+    }
@@ -37,6 +37,7 @@ from valiant.enums import VariantType
 from valiant.models.base import GenomicRange
 from valiant.models.pam_protection import PamProtectedReferenceSequence
 from valiant.models.targeton import Targeton, CDSTargeton
+from .utils import render_mseqs
 
 del_var_type = np.int8(VariantType.DELETION.value)
 
@@ -68,7 +69,7 @@ def test_get_2del_mutations(offset, seq, exp_pos, exp_ref, exp_mseq, cds):
     # Check metadata table
     assert np.array_equal(mc.df.mut_position, np.array(exp_pos))
     assert np.array_equal(mc.df.ref.astype('string').to_numpy(), np.array(exp_ref))
-    assert np.array_equal(mc.df.mseq.astype('string').to_numpy(), np.array(exp_mseq))
+    assert render_mseqs(seq, mc.df) == exp_mseq
     assert mc.df.new.isna().all()
     assert mc.df.var_type.unique()[0] == del_var_type
 
@@ -92,6 +93,6 @@ def test_get_inframe_mutations(seq, pre, suf, strand, exp_pos, exp_ref, exp_mseq
     # Check metadata table
     assert np.array_equal(mc.df.mut_position, np.array(exp_pos))
     assert np.array_equal(mc.df.ref.astype('string').to_numpy(), np.array(exp_ref))
-    assert np.array_equal(mc.df.mseq.astype('string').to_numpy(), np.array(exp_mseq))
+    assert render_mseqs(seq, mc.df) == exp_mseq
     assert mc.df.new.isna().all()
     assert mc.df.var_type.unique()[0] == del_var_type
@@ -31,17 +31,100 @@
 # legal@sanger.ac.uk. Contact details are: legal@sanger.ac.uk quoting reference Valiant-software.
 #############################
 
-from contextlib import nullcontext
+import os
+import tempfile
+import pandas as pd
+import pysam
 import pytest
-from valiant.loaders.gff import load_gff_cds
+from valiant.loaders.gff import get_tagged_transcript_ids, load_gff_cds
 from .constants import GTF_SINGLE, GTF_MULTI
 from .utils import get_data_file_path
 
 
-@pytest.mark.parametrize('fp,valid', [
-    (GTF_SINGLE, True),
-    (GTF_MULTI, False)
+@pytest.mark.parametrize('fp', [GTF_SINGLE, GTF_MULTI])
+def test_gff_load(fp):
+    load_gff_cds(get_data_file_path(fp))
+
+
+@pytest.mark.parametrize('field_index,old,new,msg', [
+    (6, '+', '-', 'Inconsistent strand'),
+    (8, 'gene_id "ENSG00000215301"', 'gene_id "ENSG00000000000"', 'Multiple genes')
 ])
-def test_gff_load(fp, valid):
-    with pytest.raises(ValueError) if not valid else nullcontext():
-        load_gff_cds(get_data_file_path(fp))
+def test_gff_load_invalid(field_index, old, new, msg):
+    with open(get_data_file_path(GTF_SINGLE)) as f:
+        lines = [line for line in f if not line.startswith('#')]
+
+    # Alter the strand or gene of the last CDS of the transcript
+    i = max(i for i, line in enumerate(lines) if line.split('\t')[2] == 'CDS')
+    fields = lines[i].split('\t')
+    fields[field_index] = fields[field_index].replace(old, new)
+    lines[i] = '\t'.join(fields)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        fp = os.path.join(tmp_dir, 'annotation.gtf')
+        with open(fp, 'w') as f:
+            f.writelines(lines)
+
+        with pytest.raises(ValueError, match=msg):
+            load_gff_cds(fp)
+
+
+def test_gff_load_multi():
+    cds_ranges, _ = load_gff_cds(get_data_file_path(GTF_MULTI))
+    df = cds_ranges.df
+
+    # Check exon indices are assigned per transcript
+    for _, tdf in df.groupby('transcript_id', observed=True):
+        assert sorted(tdf.exon_index.tolist()) == list(range(tdf.shape[0]))
+
+    # Check tags are retained
+    assert get_tagged_transcript_ids(df, 'CCDS') == set(
+        df[df.tags.astype(str).str.contains('CCDS')].transcript_id.astype(str))
+
+
+def test_gff_load_cached():
+    pytest.importorskip('pyarrow')
+    fp = get_data_file_path(GTF_SINGLE)
+    exp_cds_ranges, exp_utr_ranges = load_gff_cds(fp)
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+
+        # Check annotation is loaded both to and from the cache
+        for _ in range(2):
+            cds_ranges, utr_ranges = load_gff_cds(fp, cache_dir=cache_dir)
+            pd.testing.assert_frame_equal(cds_ranges.df, exp_cds_ranges.df, check_categorical=False)
+            assert len(utr_ranges) == len(exp_utr_ranges)
+        assert len(os.listdir(cache_dir)) == 2
+
+
+@pytest.mark.parametrize('indexed', [False, True])
+@pytest.mark.parametrize('regions,exp_all', [
+    ({'X': [(41337410, 41337420)]}, True),
+    ({'X': [(41320000, 41320100)]}, False),
+    ({'Y': [(41337410, 41337420)]}, False)
+])
+def test_gff_load_regions(indexed, regions, exp_all):
+    exp_cds_ranges, _ = load_gff_cds(get_data_file_path(GTF_SINGLE))
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        fp = os.path.join(tmp_dir, 'annotation.gtf')
+
+        # Sort GTF file by position
+        with open(get_data_file_path(GTF_SINGLE)) as f:
+            lines = [line for line in f if not line.startswith('#')]
+        with open(fp, 'w') as f:
+            f.writelines(sorted(lines, key=lambda line: int(line.split('\t')[3])))
+
+        # Compress and index GTF file
+        if indexed:
+            fp = pysam.tabix_index(fp, preset='gff', keep_original=True)
+
+        cds_ranges, _ = load_gff_cds(fp, regions=regions)
+
+    # Check either complete transcripts or no features are loaded
+    if exp_all:
+        pd.testing.assert_frame_equal(cds_ranges.df, exp_cds_ranges.df, check_categorical=False)
+    elif indexed:
+        assert len(cds_ranges) == 0
+    else:
+        assert len(cds_ranges) == (len(exp_cds_ranges) if 'X' in regions else 0)
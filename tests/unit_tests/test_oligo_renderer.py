@@ -31,7 +31,7 @@
 # legal@sanger.ac.uk. Contact details are: legal@sanger.ac.uk quoting reference Valiant-software.
 #############################
 
-from contextlib import nullcontext
+import numpy as np
 import pandas as pd
 import pytest
 from valiant.enums import VariantType, TargetonMutator
@@ -88,39 +88,27 @@ def test_base_oligo_renderer_constant_fields():
     assert const_fields[5] == ('pam_seq', renderer.ref_seq.pam_protected_sequence)
 
 
-@pytest.mark.parametrize('seq,a5,a3,exp,exp_rc', [
-    ('AACCGGCC', 'TTT', 'TTT', 'TTTAACCGGCCTTT', 'TTTGGCCGGTTTTT')
+@pytest.mark.parametrize('pos,ref,alt,a5,a3,rc,exp', [
+    (3, 'A', 'C', 'TTT', 'TTT', False, 'TTTAACACGTACGTACGTTTT'),
+    (3, 'A', 'C', 'TTT', 'TTT', True, 'TTTACGTACGTACGTGTTTTT'),
+    (1, 'AA', None, '', 'GG', False, 'AACGTACGTACGTGG'),
+    (15, None, 'TT', 'GG', '', False, 'GGAAAACGTACGTACGTTT')
 ])
-def test_base_oligo_renderer_render_mutated_sequence(seq, a5, a3, exp, exp_rc):
-    pam_seq = get_pam_protected_sequence(SEQ, None)
+def test_base_oligo_renderer_render_mutated_sequences(pos, ref, alt, a5, a3, rc, exp):
+    pam_seq = get_pam_protected_sequence(SEQ, None, strand='-' if rc else '+')
+    df = pd.DataFrame.from_records([
+        (pos, ref, alt)
+    ], columns=['mut_position', 'ref', 'new'])
 
     # Initialise renderer
     renderer = BaseOligoRenderer(pam_seq, GENE_ID, TRANSCRIPT_ID, a5, a3)
 
-    # Check rendered oligonucleotide sequence
-    assert renderer._render_mutated_sequence(seq) == exp
-
-    # Check rendered oligonucleotide sequence (reverse complement)
-    assert renderer._render_mutated_sequence_rc(seq) == exp_rc
-
-
-@pytest.mark.parametrize('strand,rc,exp,valid', [
-    ('+', False, '_render_mutated_sequence', True),
-    ('+', True, None, False),
-    ('-', False, '_render_mutated_sequence', True),
-    ('-', True, '_render_mutated_sequence_rc', True)
-])
-def test_base_oligo_renderer_get_renderer(strand, rc, exp, valid):
-    pam_seq = get_pam_protected_sequence(SEQ, None, strand=strand)
-
-    # Initialise renderer
-    renderer = BaseOligoRenderer(pam_seq, GENE_ID, TRANSCRIPT_ID, '', '')
-
-    with pytest.raises(ValueError) if not valid else nullcontext():
-        assert renderer._get_renderer(rc).__name__ == exp
+    # Check rendered oligonucleotide sequence and length
+    assert list(renderer.render_mutated_sequences(df, Options(rc, 300))) == [exp]
+    assert list(renderer.get_oligo_lengths(df)) == [len(exp)]
 
 
-@pytest.mark.parametrize('var_type,source,start,ref,alt,exp', [
+OLIGO_NAMES = [
     (VariantType.DELETION, TargetonMutator.DEL1.value, 100, 'A', None, 'T1.G1_X:100_1del'),
     (VariantType.DELETION, TargetonMutator.DEL2_0.value, 100, 'AA', None, 'T1.G1_X:100_101_2del0'),
     (VariantType.DELETION, TargetonMutator.DEL2_1.value, 100, 'AA', None, 'T1.G1_X:100_101_2del1'),
@@ -128,14 +116,58 @@ def test_base_oligo_renderer_get_renderer(strand, rc, exp, valid):
     (VariantType.SUBSTITUTION, TargetonMutator.SNV.value, 100, 'AAA', 'CGT', 'T1.G1_X:100_102_AAA>CGT_snv'),
     (VariantType.SUBSTITUTION, TargetonMutator.SNV.value, 100, 'A', 'C', 'T1.G1_X:100_A>C_snv'),
     (VariantType.SUBSTITUTION, 'vcf', 100, 'A', 'C', 'T1.G1_X:100_A>C_vcf'),
-])
+]
+
+
+@pytest.mark.parametrize('var_type,source,start,ref,alt,exp', OLIGO_NAMES)
 def test_base_oligo_renderer_get_oligo_name(var_type, source, start, ref, alt, exp):
     pam_seq = get_pam_protected_sequence(SEQ, None)
+    df = pd.DataFrame.from_records([
+        (var_type.value, start, ref, alt)
+    ], columns=['var_type', 'mut_position', 'ref', 'new'])
+
+    # Initialise renderer
+    renderer = BaseOligoRenderer(pam_seq, GENE_ID, TRANSCRIPT_ID, '', '')
+
+    assert list(renderer.get_oligo_names(df, source)) == [exp]
+
+
+@pytest.mark.parametrize('start_offset', [0, 9])
+def test_base_oligo_renderer_get_oligo_names(start_offset):
+    pam_seq = get_pam_protected_sequence(SEQ, None)
+    df = pd.DataFrame.from_records([
+        (var_type.value, start - start_offset, ref, alt)
+        for var_type, _, start, ref, alt, _ in OLIGO_NAMES
+    ], columns=['var_type', 'mut_position', 'ref', 'new'])
+    df.ref = df.ref.astype('category')
+    sources = np.array([source for _, source, *_ in OLIGO_NAMES], dtype=object)
+
+    # Initialise renderer
+    renderer = BaseOligoRenderer(pam_seq, GENE_ID, TRANSCRIPT_ID, '', '')
+
+    # Check oligonucleotide names
+    names = renderer.get_oligo_names(df, sources, start_offset=start_offset)
+    assert list(names) == [exp for *_, exp in OLIGO_NAMES]
+
+
+@pytest.mark.parametrize('var_type,ref,alt', [
+    (VariantType.INSERTION, None, None),
+    (VariantType.SUBSTITUTION, None, 'A'),
+    (VariantType.SUBSTITUTION, 'A', None),
+    (VariantType.DELETION, None, None),
+    (VariantType.UNKNOWN, 'A', 'C')
+])
+def test_base_oligo_renderer_get_oligo_names_invalid(var_type, ref, alt):
+    pam_seq = get_pam_protected_sequence(SEQ, None)
+    df = pd.DataFrame.from_records([
+        (var_type.value, 100, ref, alt)
+    ], columns=['var_type', 'mut_position', 'ref', 'new'])
 
     # Initialise renderer
     renderer = BaseOligoRenderer(pam_seq, GENE_ID, TRANSCRIPT_ID, '', '')
 
-    assert renderer._get_oligo_name(var_type.value, source, start, ref, alt) == exp
+    with pytest.raises(ValueError):
+        renderer.get_oligo_names(df, 'snv')
 
 
 @pytest.mark.parametrize('rc', [True, False])
@@ -143,8 +175,8 @@ def test_base_oligo_renderer_get_metadata_table(rc):
     pam_seq = get_pam_protected_sequence(SEQ, None, strand='-')
 
     df = pd.DataFrame.from_records([
-        ('OLIGO_1', 100, 'A', 'C', 'snv', 'AAACGGG')
-    ], columns=['oligo_name', 'mut_position', 'ref', 'new', 'mutator', 'mseq'])
+        ('OLIGO_1', 100, 'A', 'C', 'snv')
+    ], columns=['oligo_name', 'mut_position', 'ref', 'new', 'mutator'])
 
     # Initialise renderer
     renderer = BaseOligoRenderer(pam_seq, GENE_ID, TRANSCRIPT_ID, '', '')
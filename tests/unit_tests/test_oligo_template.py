@@ -41,7 +41,7 @@ from valiant.models.pam_protection import PamProtectedReferenceSequence
 from valiant.models.sequences import Sequence, ReferenceSequence
 from valiant.models.targeton import Targeton
 from .constants import CODON_TABLE_FP, DUMMY_PAM_PROTECTION_NT
-from .utils import get_data_file_path, get_targeton
+from .utils import get_data_file_path, get_targeton, render_mseqs
 
 TRANSCRIPT_INFO = TranscriptInfo('GENE_ID', 'TRANSCRIPT_ID')
 
@@ -68,18 +68,20 @@ def test_oligo_compute_mutations(targetons, mutator, pam_protection):
     adaptor_3 = 'AAAAAA'
     segments = list(map(get_segment, targetons))
 
-    ot = OligoTemplate(TRANSCRIPT_INFO, pam_ref_seq, set(), set(), adaptor_5, adaptor_3, segments)
+    ot = OligoTemplate(TRANSCRIPT_INFO, pam_ref_seq, set(), None, adaptor_5, adaptor_3, segments)
     for _, target_segment in ot.target_segments:
         mutation_collections = target_segment.compute_mutations(ct)
         mutation_collection = mutation_collections[mutator]
+        df = mutation_collection.df
+        mseqs = render_mseqs(target_segment.pam_protected_sequence, df)
         if pam_protection:
             if mutator == TargetonMutator.DEL1:
                 assert all(
-                    set(m.sequence) == {DUMMY_PAM_PROTECTION_NT}
-                    for m in mutation_collection.mutations
+                    set(mseq) == {DUMMY_PAM_PROTECTION_NT}
+                    for mseq in mseqs
                 )
             elif mutator == TargetonMutator.SNV:
                 assert all(
-                    set(m.sequence) - {m.new} == {DUMMY_PAM_PROTECTION_NT}
-                    for m in mutation_collection.mutations
+                    set(mseq) - {new} == {DUMMY_PAM_PROTECTION_NT}
+                    for mseq, new in zip(mseqs, df.new)
                 )
@@ -58,3 +58,44 @@ def test_compute_pam_protected_sequence(seq, pos, ref, alt, ppseq, valid):
     if valid:
         assert pam_ref_seq.sequence == ref_seq.sequence
         assert pam_ref_seq.pam_protected_sequence == ppseq
+
+
+def test_compute_pam_protected_sequence_multiple():
+    gr = GenomicRange('X', 100, 104, '+')
+    ref_seq = ReferenceSequence('AACAA', gr)
+
+    # Apply multiple variants
+    pam_ref_seq = compute_pam_protected_sequence(ref_seq, {
+        PamVariant(GenomicPosition('X', 100), 'A', 'G'),
+        PamVariant(GenomicPosition('X', 102), 'C', 'T')
+    })
+    assert pam_ref_seq.pam_protected_sequence == 'GATAA'
+
+    # Report all mismatching variants
+    with pytest.raises(RuntimeError) as ex:
+        compute_pam_protected_sequence(ref_seq, {
+            PamVariant(GenomicPosition('X', 101), 'C', 'G'),
+            PamVariant(GenomicPosition('X', 102), 'C', 'T'),
+            PamVariant(GenomicPosition('X', 104), 'G', 'T')
+        })
+    assert 'X:101' in ex.value.args[0]
+    assert 'X:102' not in ex.value.args[0]
+    assert 'X:104' in ex.value.args[0]
+
+
+def test_compute_pam_protected_sequence_duplicate():
+    gr = GenomicRange('X', 100, 104, '+')
+    ref_seq = ReferenceSequence('AACAA', gr)
+
+    # Report all positions with multiple variants
+    with pytest.raises(RuntimeError) as ex:
+        compute_pam_protected_sequence(ref_seq, {
+            PamVariant(GenomicPosition('X', 100), 'A', 'G'),
+            PamVariant(GenomicPosition('X', 100), 'A', 'T'),
+            PamVariant(GenomicPosition('X', 102), 'C', 'T'),
+            PamVariant(GenomicPosition('X', 104), 'A', 'C'),
+            PamVariant(GenomicPosition('X', 104), 'A', 'G')
+        })
+    assert 'X:100' in ex.value.args[0]
+    assert 'X:102' not in ex.value.args[0]
+    assert 'X:104' in ex.value.args[0]
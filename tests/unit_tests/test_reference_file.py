@@ -0,0 +1,119 @@
+########## LICENCE ##########
+# VaLiAnT, (c) 2020, GRL (the "Software")
+# 
+# The Software remains the property of Genome Research Ltd ("GRL").
+# 
+# The Software is distributed "AS IS" under this Licence solely for non-commercial use in the hope that it will be useful,
+# but in order that GRL as a charitable foundation protects its assets for the benefit of its educational and research
+# purposes, GRL makes clear that no condition is made or to be implied, nor is any warranty given or to be implied, as to
+# the accuracy of the Software, or that it will be suitable for any particular purpose or for use under any specific
+# conditions. Furthermore, GRL disclaims all responsibility for the use which is made of the Software. It further
+# disclaims any liability for the outcomes arising from using  the Software.
+# 
+# The Licensee agrees to indemnify GRL and hold GRL harmless from and against any and all claims, damages and liabilities
+# asserted by third parties (including claims for negligence) which arise directly or indirectly from the use of the
+# Software or the sale of any products based on the Software.
+# 
+# No part of the Software may be reproduced, modified, transmitted or transferred in any form or by any means, electronic
+# or mechanical, without the express permission of GRL. The permission of GRL is not required if the said reproduction,
+# modification, transmission or transference is done without financial return, the conditions of this Licence are imposed
+# upon the receiver of the product, and all original and amended source code is included in any transmitted product. You
+# may be held legally responsible for any copyright infringement that is caused or encouraged by your failure to abide by
+# these terms and conditions.
+# 
+# You are not permitted under this Licence to use this Software commercially. Use for which any financial return is
+# received shall be defined as commercial use, and includes (1) integration of all or part of the source code or the
+# Software into a product for sale or license by or on behalf of Licensee to third parties or (2) use of the Software
+# or any derivative of it for research with the final aim of developing software products for sale or license to a third
+# party or (3) use of the Software or any derivative of it for research with the final aim of developing non-software
+# products for sale or license to a third party, or (4) use of the Software to provide any service to an external
+# organisation for which payment is received. If you are interested in using the Software commercially, please contact
+# legal@sanger.ac.uk. Contact details are: legal@sanger.ac.uk quoting reference Valiant-software.
+#############################
+
+import re
+import struct
+import pytest
+from valiant.models.reference_file import TwoBitReferenceFile, TWOBIT_SIGNATURE, open_reference_file
+
+SEQUENCES = {
+    'X': 'ACGTacgtNNNNAACCGGTTaacc',
+    'Y': 'GATTACA'
+}
+
+NUCLEOTIDE_CODES = {'T': 0, 'C': 1, 'A': 2, 'G': 3}
+
+
+def get_blocks(pattern, seq):
+    return [(m.start(), m.end() - m.start()) for m in re.finditer(pattern, seq)]
+
+
+def write_two_bit_file(fp, sequences):
+    names = list(sequences.keys())
+    index_size = sum(1 + len(name) + 4 for name in names)
+    records = []
+    offset = 16 + index_size
+    offsets = []
+    for name in names:
+        seq = sequences[name]
+        n_blocks = get_blocks('N+', seq)
+        mask_blocks = get_blocks('[a-z]+', seq)
+        codes = [NUCLEOTIDE_CODES.get(nt.upper(), 0) for nt in seq]
+        codes += [0] * (-len(codes) % 4)
+        packed = bytes(
+            (codes[i] << 6) | (codes[i + 1] << 4) | (codes[i + 2] << 2) | codes[i + 3]
+            for i in range(0, len(codes), 4))
+        record = struct.pack('<II', len(seq), len(n_blocks))
+        record += b''.join(struct.pack('<I', s) for s, _ in n_blocks)
+        record += b''.join(struct.pack('<I', n) for _, n in n_blocks)
+        record += struct.pack('<I', len(mask_blocks))
+        record += b''.join(struct.pack('<I', s) for s, _ in mask_blocks)
+        record += b''.join(struct.pack('<I', n) for _, n in mask_blocks)
+        record += struct.pack('<I', 0) + packed
+        offsets.append(offset)
+        records.append(record)
+        offset += len(record)
+
+    with open(fp, 'wb') as fh:
+        fh.write(struct.pack('<IIII', TWOBIT_SIGNATURE, 0, len(names), 0))
+        for name, record_offset in zip(names, offsets):
+            fh.write(struct.pack('<B', len(name)) + name.encode('ascii') + struct.pack('<I', record_offset))
+        for record in records:
+            fh.write(record)
+
+
+@pytest.fixture
+def two_bit_fp(tmp_path):
+    fp = str(tmp_path / 'ref.2bit')
+    write_two_bit_file(fp, SEQUENCES)
+    return fp
+
+
+def test_two_bit_reference_file_fetch(two_bit_fp):
+    with open_reference_file(two_bit_fp) as ref:
+        assert isinstance(ref, TwoBitReferenceFile)
+        assert ref.references == list(SEQUENCES.keys())
+
+        # Check all regions
+        for chromosome, seq in SEQUENCES.items():
+            for start in range(1, len(seq) + 1):
+                for end in range(start, len(seq) + 1):
+                    assert ref.fetch(chromosome, start, end) == seq[start - 1:end]
+
+
+@pytest.mark.parametrize('chromosome,start,end,exp', [
+    ('X', 1, 8, 'ACGTACGT'),
+    ('X', 5, 8, 'ACGT'),
+    ('X', 13, 24, 'AACCGGTTAACC'),
+    ('Y', 2, 4, 'ATT')
+])
+def test_two_bit_reference_file_fetch_normalised(two_bit_fp, chromosome, start, end, exp):
+    with open_reference_file(two_bit_fp) as ref:
+        assert ref.fetch_normalised(chromosome, start, end) == exp
+
+
+@pytest.mark.parametrize('start,end', [(8, 9), (12, 13), (1, 24)])
+def test_two_bit_reference_file_fetch_normalised_invalid(two_bit_fp, start, end):
+    with open_reference_file(two_bit_fp) as ref:
+        with pytest.raises(ValueError):
+            ref.fetch_normalised('X', start, end)
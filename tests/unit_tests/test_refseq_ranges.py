@@ -114,6 +114,19 @@ def test_reference_sequence_ranges_parse_mutators(s, exp_mutators):
     assert mutators == exp_mutators
 
 
+@pytest.mark.parametrize('row,exp_transcript_id', [
+    (['X', '+', '1', '1000', '100', '200', '0, 20', '(), (1del), ()', 'ID1'], None),
+    (['X', '+', '1', '1000', '100', '200', '0, 20', '(), (1del), ()', 'ID1', ''], None),
+    (['X', '+', '1', '1000', '100', '200', '0, 20', '(), (1del), ()', 'ID1', 'T1'], 'T1')
+])
+def test_reference_sequence_ranges_from_row(row, exp_transcript_id):
+    rsr = ReferenceSequenceRanges.from_row(row)
+    assert rsr.transcript_id == exp_transcript_id
+
+    rsrc = ReferenceSequenceRangeCollection([rsr])
+    assert rsrc.transcript_ids == ({0: exp_transcript_id} if exp_transcript_id else {})
+
+
 def test_reference_sequence_range_collection_init():
     r2_mutators = {TargetonMutator.DEL1}
     mutators = set(), r2_mutators, set()
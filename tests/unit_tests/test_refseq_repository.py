@@ -31,8 +31,10 @@
 # legal@sanger.ac.uk. Contact details are: legal@sanger.ac.uk quoting reference Valiant-software.
 #############################
 
+import time
 import pytest
 from valiant.models.base import GenomicRange
+from valiant.models.refseq_cache import ReferenceSequenceCache
 from valiant.models.refseq_repository import ReferenceSequenceRepository
 
 
@@ -77,3 +79,85 @@ def test_reference_sequence_repository_get_genomic_range_subsequence():
     assert rsr.get_genomic_range_subsequence(genomic_range, 1023, 1027) == a
     assert rsr.get_genomic_range_subsequence(genomic_range, 1028, 1032) == b
     assert a + b == sequence
+
+
+class FastaFileStub:
+    def __init__(self, chromosome, sequence):
+        self.sequences = {chromosome: sequence}
+        self.fetched = []
+
+    def fetch(self, reference, start, end):
+        self.fetched.append((reference, start, end))
+        return self.sequences[reference][start:end]
+
+
+def test_reference_sequence_repository_fetch_sequences():
+    chromosome = 'X'
+    sequence = 'acgtACGTAACCGGTTAAACCCGGGTTT'
+    fasta = FastaFileStub(chromosome, sequence)
+    regions = [(1, 4), (6, 10), (8, 12), (20, 24)]
+
+    rsr = ReferenceSequenceRepository()
+    for start, end in regions:
+        rsr.register_region(chromosome, start, end)
+    rsr.fetch_sequences(fasta)
+
+    # Check overlapping and adjacent regions are fetched once
+    assert fasta.fetched == [(chromosome, 0, 12), (chromosome, 18, 24)]
+
+    # Check sequences and preceding nucleotides
+    norm_sequence = sequence.upper()
+    for start, end in regions:
+        assert rsr.get_sequence(chromosome, start, end) == norm_sequence[start - 1:end]
+        if start > 1:
+            assert rsr.get_nucleotide(chromosome, start - 1) == norm_sequence[start - 2]
+
+    genomic_range = GenomicRange(chromosome, 6, 10, '+')
+    assert rsr.get_genomic_range_subsequence(genomic_range, 7, 9) == norm_sequence[6:9]
+
+
+def test_reference_sequence_repository_fetch_sequences_cached(tmp_path):
+    chromosome = 'X'
+    sequence = 'ACGTACGTAACCGGTTAAACCCGGGTTT'
+    ref_fp = tmp_path / 'ref.fa'
+    ref_fp.write_text(f">{chromosome}\n{sequence}\n")
+    regions = [(2, 4), (6, 10), (20, 24)]
+
+    def fetch(fasta):
+        cache = ReferenceSequenceCache(str(tmp_path / 'cache'), str(ref_fp), 1000)
+        rsr = ReferenceSequenceRepository()
+        for start, end in regions:
+            rsr.register_region(chromosome, start, end)
+        rsr.fetch_sequences(fasta, cache=cache)
+        cache.close()
+        return rsr
+
+    # Populate cache
+    fasta = FastaFileStub(chromosome, sequence)
+    fetch(fasta)
+    assert fasta.fetched
+
+    # Check no sequence is fetched from the reference when cached
+    fasta = FastaFileStub(chromosome, sequence)
+    rsr = fetch(fasta)
+    assert not fasta.fetched
+    for start, end in regions:
+        assert rsr.get_sequence(chromosome, start, end) == sequence[start - 1:end]
+        assert rsr.get_nucleotide(chromosome, start - 1) == sequence[start - 2]
+
+
+def test_reference_sequence_cache_evict(tmp_path):
+    ref_fp = tmp_path / 'ref.fa'
+    ref_fp.write_text(">X\nACGT\n")
+    cache = ReferenceSequenceCache(str(tmp_path / 'cache'), str(ref_fp), 10)
+    for start in [1, 11, 21]:
+        cache.set_sequences('X', {(start, start + 3): 'ACGT'})
+        time.sleep(0.01)
+    assert cache.size == 12
+
+    # Check the least recently used sequences are evicted first
+    cache.get_sequences('X', [(1, 4)])
+    assert cache.evict() == 1
+    assert cache.size == 8
+    assert set(cache.get_sequences('X', [(1, 4), (11, 14), (21, 24)]).keys()) == {(1, 4), (21, 24)}
+    cache.close()
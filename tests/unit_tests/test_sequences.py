@@ -32,8 +32,10 @@
 #############################
 
 from contextlib import nullcontext
+import numpy as np
 import pytest
 from valiant.models.base import GenomicRange
+from valiant.models.pam_protection import PamProtectedReferenceSequence
 from valiant.models.sequences import Sequence, ReferenceSequence
 
 
@@ -81,3 +83,23 @@ def test_reference_sequence_get_subsequence():
     # Check reference subsequence
     assert sub_ref_seq.genomic_range == gr_sub
     assert sub_ref_seq.sequence == 'AAA'
+
+
+def test_pam_protected_reference_sequence_get_subsequence():
+    seq = 'AAACCCGGG'
+    pam_seq = 'AAACCTGGG'
+    gr = GenomicRange('X', 100, 108, '+')
+    gr_sub = GenomicRange('X', 103, 105, '+')
+
+    # Initialise reference sequence
+    ref_seq = PamProtectedReferenceSequence(seq, gr, pam_seq)
+
+    # Extract reference subsequence
+    sub_ref_seq = ref_seq.get_subsequence(gr_sub)
+
+    # Check reference subsequence (sharing the packed sequence)
+    assert sub_ref_seq.genomic_range == gr_sub
+    assert sub_ref_seq.sequence == 'CCC'
+    assert sub_ref_seq.pam_protected_sequence == 'CCT'
+    assert np.shares_memory(sub_ref_seq.packed.codes, ref_seq.packed.codes)
+    assert np.shares_memory(sub_ref_seq.pam_protected_packed.codes, ref_seq.pam_protected_packed.codes)
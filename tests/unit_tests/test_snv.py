@@ -44,7 +44,7 @@ from valiant.models.snv_table import SnvTable, SnvReTable, AuxiliaryTables
 from valiant.models.targeton import CDSTargeton
 from valiant.utils import reverse_complement
 from .constants import STRANDS
-from .utils import get_aux_tables, md5sum, load_csv, trim_cds_extensions, seq2triplets
+from .utils import get_aux_tables, md5sum, load_csv, render_mseqs, trim_cds_extensions, seq2triplets
 
 SEQ = 'GGGGGG'
 SEQ_LENGTH = len(SEQ)
@@ -53,7 +53,7 @@ CDS_SEQ_LENGTH = len(CDS_SEQ)
 SNV_TABLE_ROWN = (4 ** 3) * 9
 SNV_BASE_TABLE_COLS = ['triplet', 'pos', 'ref', 'alt', 'alt_triplet']
 SNV_TABLE_COLS = SNV_BASE_TABLE_COLS + ['ref_aa', 'alt_aa', 'mut_type']
-SNVRE_TABLE_COLS = ['pos', 'ref_aa', 'alt_aa', 'mut_type', 'ref', 'alt', 'mseq', 'var_type']
+SNVRE_TABLE_COLS = ['pos', 'ref_aa', 'alt_aa', 'mut_type', 'ref', 'alt', 'var_type']
 TOP_SYN_TABLE_COLS = ['syn_triplet', 'ref_aa', 'alt_aa']
 ALL_SYN_TABLE_COLS = TOP_SYN_TABLE_COLS
 
@@ -169,7 +169,6 @@ def validate_snvre_meta(df):
     assert df.mut_type.dtype == 'int8'
     assert df.ref.dtype == 'category'
     assert df.alt.dtype == 'category'
-    assert df.mseq.dtype == 'string'
     assert df.var_type.dtype == 'int8'
 
 
@@ -247,17 +246,15 @@ def test_get_fast_exon_snv(strand, plen, slen):
 
 
 @pytest.mark.parametrize('records', [[
-    (0, 'AAT'),
-    (0, 'AAC'),
-    (0, 'AAG'),
-    (3, 'CAA')
+    (0, 'GGG', 'AAT'),
+    (0, 'GGG', 'AAC'),
+    (0, 'GGG', 'AAG'),
+    (3, 'GGG', 'CAA')
 ]])
-def test_get_snvre_mseq(records):
-    meta = pd.DataFrame.from_records(records, columns=['pos', 'alt'])
-    mseqs = snv._get_snvre_mseq(SEQ, meta)
-    assert isinstance(mseqs, pd.Series)
-    assert mseqs.dtype == 'string'
-    for (codon_pos, alt), mseq in zip(records, mseqs):
+def test_render_snvre_mseq(records):
+    meta = pd.DataFrame.from_records(records, columns=['pos', 'ref', 'alt'])
+    mseqs = render_mseqs(SEQ, meta, pos_col='pos', alt_col='alt')
+    for (codon_pos, _, alt), mseq in zip(records, mseqs):
         assert len(mseq) == SEQ_LENGTH
         assert mseq[codon_pos:codon_pos + 3] == alt
 
@@ -354,12 +351,8 @@ def test_snvre_table_get_snvres(strand, cds_seq, sub_seq, plen, slen):
     sub_seq_start = seq.index(sub_seq)
     sub_seq_end = sub_seq_start + len(sub_seq)
 
-    # Generate SNV metadata table
-    snv_meta = snvre_table._snv_table.get_snvs(
-        strand, cds_seq, gr, plen, slen, reset_index=False)
-
     # Generate SNVRE metadata table
-    snvre_meta = snvre_table.get_snvres(gr, plen, seq, snv_meta)
+    snvre_meta = snvre_table.get_snvres(gr, plen, seq)
 
     # Check table format
     validate_snvre_meta(snvre_meta)
@@ -372,6 +365,12 @@ def test_snvre_table_get_snvres(strand, cds_seq, sub_seq, plen, slen):
     ).all()
     snvre_meta.pos -= np.int32(gr.start)
 
+    # Render mutated sequences
+    snvre_meta.insert(
+        SNVRE_TABLE_COLS.index('alt') + 1,
+        'mseq',
+        pd.Series(render_mseqs(seq, snvre_meta, pos_col='pos', alt_col='alt'), dtype='string'))
+
     # Check all mutated sequences have the same length of the target
     assert snvre_meta.mseq.str.len().eq(seq_length).all()
 
@@ -31,9 +31,11 @@
 # legal@sanger.ac.uk. Contact details are: legal@sanger.ac.uk quoting reference Valiant-software.
 #############################
 
+import numpy as np
 import pytest
 from contextlib import nullcontext
 from valiant import utils
+from valiant.globals import TRIPLETS
 
 
 @pytest.mark.parametrize('strand,is_valid', [
@@ -75,3 +77,45 @@ def test_get_region(genomic_range, region):
 ])
 def test_is_dna(seq, is_valid):
     assert utils.is_dna(seq) == is_valid
+
+
+@pytest.mark.parametrize('seq,is_valid', [
+    ('', True),
+    ('AAATTT', True),
+    ('ACGTGCATG', True),
+    ('AAAT', False),
+    ('AAN', False)
+])
+def test_get_triplet_codes(seq, is_valid):
+    with pytest.raises(ValueError) if not is_valid else nullcontext():
+        codes = utils.get_triplet_codes(utils.encode_dna(seq))
+        assert [TRIPLETS[code] for code in codes] == [seq[i:i + 3] for i in range(0, len(seq), 3)]
+
+
+@pytest.mark.parametrize('seq', ['', 'A', 'ACGTGCATG'])
+def test_decode_dna(seq):
+    assert utils.decode_dna(utils.encode_dna(seq)) == seq
+
+
+@pytest.mark.parametrize('regions,exp', [
+    ([], []),
+    ([(10, 20)], [(10, 20)]),
+    ([(30, 40), (10, 20)], [(10, 20), (30, 40)]),
+    ([(10, 20), (21, 30)], [(10, 30)]),
+    ([(10, 20), (15, 18), (18, 25)], [(10, 25)])
+])
+def test_merge_regions(regions, exp):
+    assert utils.merge_regions(regions) == exp
+
+
+@pytest.mark.parametrize('regions,intervals,exp', [
+    ([], [(10, 11)], []),
+    ([(10, 20)], [], []),
+    ([(10, 20)], [(9, 10), (10, 11), (19, 20), (19, 21), (20, 21)], [(0, 1), (0, 2)]),
+    ([(10, 20), (15, 30)], [(25, 26), (12, 16), (16, 18)], [(0, 1), (0, 2), (1, 0), (1, 2)])
+])
+def test_get_contained_intervals(regions, intervals, exp):
+    region_starts, region_ends = np.array(regions, dtype=np.int32).reshape(-1, 2).T
+    starts, ends = np.array(intervals, dtype=np.int32).reshape(-1, 2).T
+    region_indices, indices = utils.get_contained_intervals(region_starts, region_ends, starts, ends)
+    assert sorted(zip(region_indices.tolist(), indices.tolist())) == exp
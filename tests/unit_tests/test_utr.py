@@ -63,3 +63,28 @@ def test_utr_repository_get_transcript_infos():
     gr = GenomicRange('chrX', 800, 1200, '+')
     ti = TranscriptInfo('G1', 'T1')
     assert d[gr] == ti
+
+
+@pytest.mark.parametrize('transcript_ids,transcript_tag,exp_transcript_id', [
+    (None, None, 'T3'),
+    (None, 'MANE_Select', 'T1'),
+    ({GenomicRange('chrX', 800, 1200, '+'): 'T3'}, 'MANE_Select', 'T3')
+])
+def test_utr_repository_get_transcript_infos_multi(transcript_ids, transcript_tag, exp_transcript_id):
+    utr = UTRRepository(from_string("""
+Chromosome	Start	End	Strand	gene_id	transcript_id	tags
+chrX	1000	1300	+	G1	T1	basic,MANE_Select
+chrX	1000	1300	+	G1	T3	basic
+"""))
+    d = utr.get_transcript_infos(REF_RANGES, transcript_ids=transcript_ids, transcript_tag=transcript_tag)
+    assert d[GenomicRange('chrX', 800, 1200, '+')] == TranscriptInfo('G1', exp_transcript_id)
+
+
+def test_utr_repository_get_transcript_infos_lexicographical():
+    utr = UTRRepository(from_string("""
+Chromosome	Start	End	Strand	gene_id	transcript_id
+chrX	1000	1300	+	G1	T2
+chrX	1000	1300	+	G1	T1
+"""))
+    d = utr.get_transcript_infos(REF_RANGES)
+    assert d[GenomicRange('chrX', 800, 1200, '+')] == TranscriptInfo('G1', 'T2')
@@ -32,6 +32,7 @@
 #############################
 
 from contextlib import nullcontext
+import pickle
 import pytest
 from valiant.models.variant import SubstitutionVariant, DeletionVariant, InsertionVariant, get_variant_from_tuple
 from valiant.models.base import GenomicPosition
@@ -78,3 +79,14 @@ def test_deletion_variant_mutate(seq, offset, ref, mseq):
 def test_insertion_variant_mutate(seq, offset, alt, mseq):
     var = InsertionVariant(POSITION, alt)
     assert var.mutate(seq, offset) == mseq
+
+
+@pytest.mark.parametrize('variant', [
+    SubstitutionVariant(POSITION, 'A', 'C'),
+    DeletionVariant(POSITION, 'CCC'),
+    InsertionVariant(POSITION, 'TTT')
+])
+def test_variant_pickle(variant):
+
+    # Required to share variants with worker processes
+    assert pickle.loads(pickle.dumps(variant)) == variant
@@ -31,13 +31,16 @@
 # legal@sanger.ac.uk. Contact details are: legal@sanger.ac.uk quoting reference Valiant-software.
 #############################
 
-from contextlib import contextmanager
+from contextlib import contextmanager, nullcontext
 import os
+import shutil
 import tempfile
 import pandas as pd
+import pysam
 from pyranges import PyRanges
 import pytest
 from valiant.enums import VariantType, VariantClassification
+from valiant.models.base import GenomicPosition, GenomicRange
 from valiant.loaders.vcf import get_vcf, load_vcf, load_vcf_manifest, normalise_variant_record
 from valiant.models.pam_protection import PamVariant, PamProtectionVariantRepository
 from valiant.models.variant import VariantRepository
@@ -128,16 +131,74 @@ def test_pam_variant_repository_load():
     sgrna_ids = {'sgRNA_1', 'sgRNA_4'}
     vr = PamProtectionVariantRepository(sgrna_ids)
 
-    assert set(vr._variants.keys()) == sgrna_ids
+    assert set(vr._sgrna_variants.keys()) == sgrna_ids
 
     vr.load(pam_vcf_fp)
 
     for sgrna_id in sgrna_ids:
-        assert sgrna_id in vr._variants
-        variants = vr._variants[sgrna_id]
+        assert sgrna_id in vr._sgrna_variants
+        variants = vr.get_sgrna_variants(sgrna_id)
         for variant in variants:
             assert isinstance(variant, PamVariant)
 
+    # Check bulk retrieval
+    assert vr.get_sgrna_variants_bulk(sgrna_ids) == set.union(*[
+        vr.get_sgrna_variants(sgrna_id)
+        for sgrna_id in sgrna_ids
+    ])
+
+
+def test_pam_variant_repository_load_indexed():
+    sgrna_ids = {'sgRNA_1', 'sgRNA_4'}
+    vr = PamProtectionVariantRepository(sgrna_ids)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        fp = os.path.join(tmp_dir, 'pam.vcf')
+        shutil.copyfile(pam_vcf_fp, fp)
+
+        # Compress and index VCF file
+        indexed_fp = pysam.tabix_index(fp, preset='vcf')
+
+        vr.load(indexed_fp, regions={'chrX': [(41341500, 41341505)]})
+
+    # Check only the variants in the region were loaded
+    assert vr.get_sgrna_variants('sgRNA_1') == set()
+    assert vr.get_sgrna_variants('sgRNA_4') == {
+        PamVariant(GenomicPosition('chrX', 41341504), 'T', 'C')
+    }
+    assert vr.count == 1
+
+
+@pytest.mark.parametrize('ref,alt,valid', [
+    ('A', 'G', True),
+    ('A', 'GT', False),  # not a substitution
+    ('AC', 'GT', False),  # not a single-nucleotide substitution
+    ('N', 'G', False),  # invalid reference nucleotide
+    ('A', '.', False)  # no alternative
+])
+def test_pam_variant_repository_load_invalid(ref, alt, valid):
+    vr = PamProtectionVariantRepository({'sgRNA_1'})
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        fp = os.path.join(tmp_dir, 'pam.vcf')
+        with open(fp, 'w') as f:
+            f.write(
+                '##fileformat=VCFv4.3\n'
+                '##contig=<ID=chrX>\n'
+                '##INFO=<ID=SGRNA,Number=1,Type=String,Description="sgRNA identifier">\n'
+                '#CHROM\tPOS\tID\tREF\tALT\tQUAL\tFILTER\tINFO\n'
+                'chrX\t100\t.\tC\tT\t.\t.\tSGRNA=sgRNA_1\n'
+                f'chrX\t200\t.\t{ref}\t{alt}\t.\t.\tSGRNA=sgRNA_1\n')
+
+        with pytest.raises(ValueError) if not valid else nullcontext():
+            vr.load(fp)
+
+    if valid:
+        assert vr.get_sgrna_variants('sgRNA_1') == {
+            PamVariant(GenomicPosition('chrX', 100), 'C', 'T'),
+            PamVariant(GenomicPosition('chrX', 200), ref, alt)
+        }
+
 
 def write_vcf_manifest(f, rows):
     f.write(','.join(VCF_MANIFEST_FIELDS) + '\n')
@@ -155,7 +216,8 @@ def write_dummy_vcf(f, ids, id_tag):
     f.seek(0)
 
 
-def test_load_vcf_manifest():
+@pytest.mark.parametrize('workers', [1, 2])
+def test_load_vcf_manifest(workers):
     vcf_alias_id_tag = [
         ('clinvar_1', 'ALLELEID'),
         ('clinvar_2', 'ALLELEID'),
@@ -182,7 +244,7 @@ def test_load_vcf_manifest():
             f.close()
 
         try:
-            df = load_vcf_manifest(manifest_f.name, {'chrX': (40000000, 42000000)})
+            df = load_vcf_manifest(manifest_f.name, {'chrX': (40000000, 42000000)}, workers=workers)
 
             clinvar_1_ids = df.vcf_var_id[df.vcf_alias == 'clinvar_1'].to_numpy()
             assert clinvar_1_ids[0] == '1'
@@ -206,6 +268,79 @@ def test_load_vcf_manifest():
                 os.unlink(f.name)
 
 
+@pytest.mark.parametrize('regions,exp_ids', [
+    ({'chrX': [(41334252, 41334252)]}, ['A']),
+    ({'chrX': [(41334200, 41334300), (41339000, 41339100)]}, ['A', None]),
+    ({'chrX': [(41334254, 41337415)]}, []),
+    ({'chrY': [(1, 100000000)]}, [])
+])
+def test_load_vcf_indexed(regions, exp_ids):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        fp = os.path.join(tmp_dir, 'variants.vcf')
+        with open(fp, 'w') as f:
+            write_dummy_vcf(f, ['A', 'B'], None)
+
+        # Compress and index VCF file
+        indexed_fp = pysam.tabix_index(fp, preset='vcf')
+
+        df = load_vcf(indexed_fp, {'chrX': (1, 100000000)}, regions=regions)
+        assert [
+            var_id if var_id is not pd.NA else None
+            for var_id in df.vcf_var_id.to_numpy()
+        ] == exp_ids
+
+
+@pytest.mark.parametrize('chromosomes', [
+    {'chrX': (40000000, 42000000)},
+    {'chrX': (41334252, 41337416)},
+    {'chrY': (1, 100000000)}
+])
+def test_load_vcf_cached(chromosomes):
+    pytest.importorskip('pyarrow')
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        fp = os.path.join(tmp_dir, 'variants.vcf')
+        cache_dir = os.path.join(tmp_dir, 'cache')
+        with open(fp, 'w') as f:
+            write_dummy_vcf(f, ['A', 'B'], 'ALLELEID')
+
+        exp_df = load_vcf(fp, chromosomes, vcf_id_tag='ALLELEID')
+
+        # Check variants are loaded both to and from the cache
+        for _ in range(2):
+            df = load_vcf(fp, chromosomes, vcf_id_tag='ALLELEID', cache_dir=cache_dir)
+            pd.testing.assert_frame_equal(df, exp_df, check_categorical=False, check_index_type=False)
+        assert len(os.listdir(cache_dir)) == 1
+
+
+@pytest.mark.parametrize('chromosomes,regions,valid', [
+    ({'chrX': (41334252, 41337416)}, None, True),
+    ({'chrX': (40000000, 42000000)}, None, False),
+    ({'chrX': (40000000, 42000000)}, {'chrX': [(41334252, 41337416)]}, True),
+    ({'chrX': (40000000, 42000000)}, {'chrX': [(41339000, 41339100)]}, False)
+])
+def test_load_vcf_cached_invalid(chromosomes, regions, valid):
+    pytest.importorskip('pyarrow')
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        fp = os.path.join(tmp_dir, 'variants.vcf')
+        cache_dir = os.path.join(tmp_dir, 'cache')
+        with open(fp, 'w') as f:
+            write_dummy_vcf(f, ['A', 'B'], 'ALLELEID')
+            f.seek(0, os.SEEK_END)
+
+            # Append a record with an empty reference
+            f.write("chrX\t41339080\t.\t.\tC\t.\t.\t.\n")
+
+        # Check the invalid record is only reported when loaded
+        with pytest.raises(ValueError) if not valid else nullcontext():
+            df = load_vcf(fp, chromosomes, vcf_id_tag='ALLELEID', regions=regions, cache_dir=cache_dir)
+
+        if valid:
+            assert df.shape[0] > 0
+            assert 41339080 not in set(df.Start)
+
+
 CHROMOSOME = 'X'
 POS = 1000
 REF_SEQ = 'AAACCCGGGTTT'
@@ -282,8 +417,7 @@ def test_variant_repository_load():
         if variant_ids:
             assert region in vr._region_variants
             assert variant_ids == set(
-                int(vr._variants[id_].vcf_variant_id)
-                for id_ in vr._region_variants[region]
-            )
+                vr.get_variant_table(GenomicRange(*region, '+')).vcf_var_id.astype(int))
         else:
             assert region not in vr._region_variants
+            assert vr.get_variant_table(GenomicRange(*region, '+')) is None
@@ -35,6 +35,7 @@ from hashlib import md5
 import os
 import pathlib
 import pandas as pd
+from valiant.array_mutators import render_mutated_sequences
 from valiant.models.base import GenomicRange
 from valiant.models.codon_table import CodonTable
 from valiant.models.pam_protection import PamProtectedReferenceSequence
@@ -95,3 +96,15 @@ def trim_cds_extensions(cds_seq, cds_prefix_length, cds_suffix_length):
 
 def seq2triplets(seq):
     return [seq[i:i + 3] for i in range(0, len(seq), 3)]
+
+
+def get_custom_variant_table(records, chromosome='X'):
+    return pd.DataFrame.from_records([
+        (chromosome, pos - 1, ref, alt, vcf_alias, vcf_var_id, var_type.value)
+        for vcf_alias, vcf_var_id, var_type, pos, ref, alt in records
+    ], columns=['Chromosome', 'Start', 'ref', 'alt', 'vcf_alias', 'vcf_var_id', 'var_type'])
+
+
+def render_mseqs(seq, df, pos_col='mut_position', alt_col='new'):
+    return list(render_mutated_sequences(
+        seq, df[pos_col].to_numpy(), df.ref, df[alt_col]))